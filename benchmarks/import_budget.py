@@ -0,0 +1,88 @@
+"""Check that importing the CLI and packages stays fast.
+
+Each module is imported in a fresh interpreter with ``-X importtime``. The
+check fails (exit status 1) when an import takes longer than its budget or
+pulls in a heavy dependency that should only load on first use.
+
+Example::
+
+    python benchmarks/import_budget.py --runs 5
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time allowed per module, in milliseconds.
+BUDGETS_MS: Dict[str, float] = {
+    "main": 50.0,
+    "src.agents": 15.0,
+    "src.core": 15.0,
+    "src.retrieval": 15.0,
+    "src.tools": 15.0,
+    "src.utils": 15.0,
+}
+
+# Dependencies that must not load just because a module was imported.
+DEFERRED_MODULES = ("openai", "httpx", "numpy", "dotenv", "tiktoken")
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module: str) -> Tuple[float, Set[str]]:
+    """Import ``module`` in a new interpreter; return (milliseconds, top-level modules loaded)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    total_us = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        loaded.add(match.group(4).split(".")[0])
+        if match.group(4) == module:
+            total_us = int(match.group(2))
+    return total_us / 1000, loaded
+
+def check(runs: int, scale: float) -> List[Dict]:
+    results = []
+    for module, budget in BUDGETS_MS.items():
+        timings, loaded = [], set()
+        for _ in range(runs):
+            elapsed, loaded = measure(module)
+            timings.append(elapsed)
+        best = min(timings)  # the least noisy estimate of the import's own cost
+        heavy = sorted(name for name in DEFERRED_MODULES if name in loaded)
+        results.append({
+            "module": module,
+            "import_ms": round(best, 2),
+            "budget_ms": budget * scale,
+            "deferred_modules_loaded": heavy,
+            "ok": best <= budget * scale and not heavy
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time budgets")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every budget, e.g. 2 on slow CI machines")
+    args = parser.parse_args()
+
+    results = check(args.runs, args.scale)
+    print(json.dumps(results, indent=2))
+    failed = [r["module"] for r in results if not r["ok"]]
+    if failed:
+        print(f"Import budget exceeded: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
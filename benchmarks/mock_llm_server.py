@@ -0,0 +1,328 @@
+"""Local OpenAI-compatible stand-in for benchmarking without API costs.
+
+Serves ``POST /v1/chat/completions`` (plain and streaming) with configurable
+latency, token rate and error injection. Requests with ``tools`` get a call
+to one of them; text replies are shaped after the prompt so every stage of
+the app can parse them.
+
+Run standalone with ``python benchmarks/mock_llm_server.py --port 8089``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+FILLER_WORDS = (
+    "the team agreed to ship the release after review and follow up on "
+    "open questions about budget timeline testing and customer feedback"
+).split()
+
+@dataclass
+class MockLLMConfig:
+    """Behaviour of the mock server."""
+    latency_dist: str = "lognormal"  # fixed, uniform, exponential or lognormal
+    latency_ms: float = 300.0        # Median time to first token
+    latency_spread: float = 0.5      # Sigma for lognormal, +/- fraction for uniform
+    tokens_per_second: float = 80.0  # Completion token rate; 0 disables the delay
+    completion_tokens: int = 40
+    error_rate: float = 0.0
+    error_status: int = 429
+    retry_after: Optional[float] = 0.05
+    seed: Optional[int] = None
+
+class MockLLMStats:
+    """Thread-safe request counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.streamed = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, streamed: bool, error: bool, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        with self._lock:
+            self.requests += 1
+            self.streamed += streamed
+            self.errors += error
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "streamed": self.streamed,
+                "errors": self.errors,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens
+            }
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size: four characters per token plus message overhead."""
+    return sum((len(m.get("content") or "") + 3) // 4 + 4 for m in messages)
+
+def reply_for(messages: List[Dict[str, str]], completion_tokens: int, rng: random.Random) -> str:
+    """Pick a reply the calling stage can parse, based on its system prompt."""
+    system = messages[0].get("content", "") if messages else ""
+    text = " ".join(rng.choice(FILLER_WORDS) for _ in range(max(1, completion_tokens)))
+    if '"needs_agent"' in system:
+        return json.dumps({"needs_agent": False, "agent_name": None, "reason": "mock"})
+    if '"delegate"' in system:
+        return json.dumps({"action": "none"})
+    if '"final_result"' in system:
+        return json.dumps({"action": "final_result", "result": text})
+    return text
+
+# Functions the mock prefers to call: the ones that end a stage.
+PREFERRED_FUNCTIONS = ("final_result", "respond_directly", "choose_agent")
+
+def tool_call_for(body: Dict, completion_tokens: int, rng: random.Random) -> Dict:
+    """Pick a function from the request's ``tools`` and fill in its arguments."""
+    functions = {tool["function"]["name"]: tool["function"] for tool in body["tools"]}
+    choice = body.get("tool_choice")
+    if isinstance(choice, dict):
+        name = choice["function"]["name"]
+    else:
+        name = next((n for n in PREFERRED_FUNCTIONS if n in functions), next(iter(functions)))
+
+    text = " ".join(rng.choice(FILLER_WORDS) for _ in range(max(1, completion_tokens)))
+    samples = {"string": text, "integer": 1, "number": 1.0, "boolean": False, "array": [], "object": {}}
+    schema = functions[name].get("parameters", {})
+    arguments = {}
+    for param in schema.get("required", []):
+        spec = schema.get("properties", {}).get(param, {})
+        param_type = spec.get("type", "string")
+        arguments[param] = spec["enum"][0] if spec.get("enum") else samples.get(
+            param_type if isinstance(param_type, str) else param_type[0], text
+        )
+    return {
+        "id": f"call_{uuid.uuid4().hex[:12]}",
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)}
+    }
+
+class MockLLMServer:
+    """Threaded HTTP server speaking the chat completions API."""
+
+    def __init__(self, config: Optional[MockLLMConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockLLMConfig()
+        self.stats = MockLLMStats()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def sample_latency(self) -> float:
+        """Seconds to wait before the first token."""
+        cfg = self.config
+        base = cfg.latency_ms / 1000
+        with self._rng_lock:
+            if cfg.latency_dist == "fixed":
+                return base
+            if cfg.latency_dist == "uniform":
+                return max(0.0, self._rng.uniform(base * (1 - cfg.latency_spread), base * (1 + cfg.latency_spread)))
+            if cfg.latency_dist == "exponential":
+                return self._rng.expovariate(1 / base) if base > 0 else 0.0
+            return base * self._rng.lognormvariate(0, cfg.latency_spread)
+
+    def should_fail(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.config.error_rate
+
+    def reply(self, messages: List[Dict[str, str]]) -> str:
+        with self._rng_lock:
+            return reply_for(messages, self.config.completion_tokens, self._rng)
+
+    def tool_call(self, body: Dict) -> Dict:
+        with self._rng_lock:
+            return tool_call_for(body, self.config.completion_tokens, self._rng)
+
+def _make_handler(server: MockLLMServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            messages = body.get("messages", [])
+            stream = bool(body.get("stream"))
+
+            time.sleep(server.sample_latency())
+            if server.should_fail():
+                server.stats.record(stream, error=True)
+                headers = {}
+                if server.config.retry_after is not None:
+                    headers["Retry-After"] = str(server.config.retry_after)
+                self._send_json(server.config.error_status, {
+                    "error": {"message": "injected error", "type": "mock_error"}
+                }, headers)
+                return
+
+            call = server.tool_call(body) if body.get("tools") and not stream else None
+            content = call["function"]["arguments"] if call else server.reply(messages)
+            words = content.split(" ")
+            usage = {
+                "prompt_tokens": estimate_tokens(messages),
+                "completion_tokens": len(words),
+                "total_tokens": estimate_tokens(messages) + len(words)
+            }
+            server.stats.record(stream, error=False, prompt_tokens=usage["prompt_tokens"],
+                                completion_tokens=usage["completion_tokens"])
+            delay = 1 / server.config.tokens_per_second if server.config.tokens_per_second > 0 else 0.0
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            model = body.get("model", "mock")
+
+            if call:
+                time.sleep(delay * len(words))
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": None, "tool_calls": [call]},
+                        "finish_reason": "tool_calls"
+                    }],
+                    "usage": usage
+                })
+                return
+
+            if not stream:
+                time.sleep(delay * len(words))
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            def chunk(delta: Dict, finish: Optional[str] = None, usage_block: Optional[Dict] = None) -> None:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}] if usage_block is None else [],
+                }
+                if usage_block is not None:
+                    payload["usage"] = usage_block
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            chunk({"role": "assistant", "content": ""})
+            for index, word in enumerate(words):
+                time.sleep(delay)
+                chunk({"content": word if index == 0 else f" {word}"})
+            chunk({}, finish="stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                chunk({}, usage_block=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+        def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the MockLLMConfig options on an argument parser."""
+    defaults = MockLLMConfig()
+    parser.add_argument("--latency-dist", default=defaults.latency_dist,
+                        choices=["fixed", "uniform", "exponential", "lognormal"])
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-spread", type=float, default=defaults.latency_spread)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--seed", type=int, default=None)
+
+def config_from_args(args: argparse.Namespace) -> MockLLMConfig:
+    return MockLLMConfig(
+        latency_dist=args.latency_dist,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the mock OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockLLMServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"Mock LLM server listening on {server.url}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Load-test the chat pipeline against the local mock LLM server.
+
+Runs scripted multi-turn conversations at a given concurrency through one of
+the entry points and reports turn latency percentiles, LLM calls, prompt
+tokens per turn and throughput. Results are written as JSON so runs of
+different versions can be compared with ``--baseline``.
+
+Example::
+
+    python benchmarks/run_benchmark.py --target chat_manager --concurrency 16 \\
+        --conversations 64 --output results/chat.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_llm_server import MockLLMServer, add_server_arguments, config_from_args  # noqa: E402
+
+DEFAULT_WORKLOAD = [
+    ["What was discussed in the product review meeting?", "Were there any action items?"],
+    ["Calculate 17 * 23 + 4", "Now divide that by 3"],
+    ["What's the weather forecast for Paris?", "Will it rain tomorrow?"],
+    ["Hi there!", "Can you tell me a fun fact?", "Thanks, bye"],
+]
+
+# Metrics compared against a baseline; higher is worse for all but throughput.
+COMPARED_METRICS = [
+    "latency.p50", "latency.p95", "latency.p99",
+    "llm_calls_per_turn", "prompt_tokens_per_turn", "throughput_turns_per_s"
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def load_workload(path: Optional[str], conversations: int) -> List[List[str]]:
+    """Scripted conversations, cycled to the requested count.
+
+    A workload file is JSON: a list of conversations, each a list of turns.
+    """
+    scripts = DEFAULT_WORKLOAD
+    if path:
+        with open(path, encoding="utf-8") as f:
+            scripts = json.load(f)
+    return [scripts[i % len(scripts)] for i in range(conversations)]
+
+def make_turn_runner(target: str, agents) -> Callable[[int], Callable[[str], Any]]:
+    """Return a factory building a per-conversation ``turn(message)`` callable."""
+    if target == "chat_manager":
+        from src.core.chat_manager import ChatManager
+        manager = ChatManager(agents=agents)
+
+        def conversation(index: int):
+            return lambda message: manager.handle_input(message, session_id=f"bench-{index}")
+        return conversation
+
+    if target == "message_handler":
+        from src.core.message_handler import MessageHandler
+        handler = MessageHandler(agents)
+
+        def conversation(index: int):
+            history: List[Dict[str, str]] = []
+
+            def turn(message: str):
+                history.append({"role": "user", "content": message})
+                result, _ = handler.process_message(message, history)
+                history.append({"role": "assistant", "content": result})
+                return result
+            return turn
+        return conversation
+
+    if target == "meeting_assistant":
+        assistant = next(agent for agent in agents if agent.name == "Meeting Assistant")
+
+        def conversation(index: int):
+            return lambda message: assistant.run_agent(message)
+        return conversation
+
+    raise ValueError(f"Unknown target: {target}")
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from main import create_registry
+    from src.utils.latency import LatencyPolicy
+    from src.utils.llm_utils import setup_openai
+    from src.utils.model_policy import get_model_policy
+
+    latency_policy = None
+    if args.hedge or args.speculate:
+        latency_policy = LatencyPolicy(hedge=args.hedge, hedge_delay=args.hedge_delay, speculate=args.speculate)
+    server = MockLLMServer(config_from_args(args)).start()
+    try:
+        client = setup_openai(
+            "mock-key",
+            base_url=server.url,
+            max_retries=args.max_retries,
+            backoff_base=0.05,
+            metrics_window=10 ** 7,
+            latency_policy=latency_policy
+        )
+        conversation = make_turn_runner(args.target, create_registry().lazy_agents())
+        workload = load_workload(args.workload, args.conversations)
+
+        latencies: List[float] = []
+        errors: List[str] = []
+
+        def run_conversation(index: int) -> None:
+            turn = conversation(index)
+            for message in workload[index]:
+                start = time.perf_counter()
+                try:
+                    turn(message)
+                except Exception as e:
+                    errors.append(str(e))
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(run_conversation, range(len(workload))))
+        duration = time.perf_counter() - started
+
+        calls = list(client.metrics)
+        turns = len(latencies)
+        return {
+            "label": args.label,
+            "target": args.target,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "config": {
+                "concurrency": args.concurrency,
+                "conversations": len(workload),
+                "workload": args.workload or "default",
+                "server": vars(server.config)
+            },
+            "turns": turns,
+            "turn_errors": len(errors),
+            "duration_s": duration,
+            "throughput_turns_per_s": turns / duration if duration else 0.0,
+            "latency": {
+                "mean": sum(latencies) / turns if turns else 0.0,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies, default=0.0)
+            },
+            "llm_calls_per_turn": len(calls) / turns if turns else 0.0,
+            "prompt_tokens_per_turn": sum(c.prompt_tokens for c in calls) / turns if turns else 0.0,
+            "completion_tokens_per_turn": sum(c.completion_tokens for c in calls) / turns if turns else 0.0,
+            "llm": client.metrics_summary(),
+            "latency_mode": client.latency_report(),
+            "stages": get_model_policy().report(),
+            "server": server.stats.as_dict()
+        }
+    finally:
+        server.stop()
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Print metric deltas against a baseline; return the regressed metrics."""
+    regressed = []
+    for name in COMPARED_METRICS:
+        current, previous = _lookup(result, name), _lookup(baseline, name)
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        worse = -change if name == "throughput_turns_per_s" else change
+        flag = "  REGRESSION" if worse > max_regression else ""
+        print(f"{name:28} {previous:10.4f} -> {current:10.4f} ({change:+.1%}){flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+def _lookup(data: Dict[str, Any], dotted: str) -> float:
+    for part in dotted.split("."):
+        data = data.get(part, {})
+    return data if isinstance(data, (int, float)) else 0.0
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chat pipeline against a mock LLM server")
+    parser.add_argument("--target", default="chat_manager",
+                        choices=["chat_manager", "message_handler", "meeting_assistant"])
+    parser.add_argument("--workload", help="JSON file with a list of conversations (lists of turns)")
+    parser.add_argument("--conversations", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--hedge", action="store_true", help="Hedge slow LLM requests")
+    parser.add_argument("--hedge-delay", type=float, help="Seconds before hedging (default: adaptive p95)")
+    parser.add_argument("--speculate", action="store_true", help="Start the likely agent while routing")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON result")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Relative change treated as a regression (default 0.10)")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    result = run(args)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressed = compare(result, json.load(f), args.max_regression)
+        if regressed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
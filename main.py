@@ -1,29 +1,18 @@
+import argparse
+import json
 import os
-from dotenv import load_dotenv
-from src.agents.agent_config import AgentConfig
-from src.tools.tool_config import ToolConfig, Parameter
-from src.core.chat_manager import ChatManager
-from src.utils.llm_utils import setup_openai
-from src.agents.meeting_assistant import MeetingAssistant
+from src.core.registry import Registry
 
-def create_tools():
-    """Create and return a list of available tools."""
-    tools = []
-    
-    # Calculator tool
-    calculator_tool = ToolConfig(
-        name="calculator",
-        description="Performs basic mathematical calculations",
-        parameters=[
-            Parameter("expression", "Mathematical expression to evaluate", True, "string")
-        ],
-        expected_response_format="Numerical result",
-        callable_function=lambda expression: eval(expression)
-    )
-    tools.append(calculator_tool)
-    
-    # Weather tool (example - you would need to implement the actual API call)
-    weather_tool = ToolConfig(
+# Modules below are imported where they are used, so that startup only pays
+# for what a run needs; agents and tools are built by the registry on first use.
+
+def get_weather(location, days=1):
+    return f"Weather info for {location} for {days} days"
+
+def create_weather_tool():
+    """Weather tool (example - you would need to implement the actual API call)."""
+    from src.tools.tool_config import ToolConfig, Parameter
+    return ToolConfig(
         name="weather",
         description="Gets weather information for a location",
         parameters=[
@@ -31,41 +20,140 @@ def create_tools():
             Parameter("days", "Number of days forecast (max 7)", False, "integer")
         ],
         expected_response_format="Weather information as text",
-        callable_function=lambda location, days=1: f"Weather info for {location} for {days} days"
+        callable_function=get_weather,
+        timeout=10.0,
+        max_concurrency=8,
+        cache_ttl=600.0
     )
-    tools.append(weather_tool)
-    
-    return tools
 
-def create_agents(tools):
-    """Create and return a list of available agents."""
-    agents = []
+def create_calculator_tool():
+    from src.tools.math_tool import create_calculator_tool
+    return create_calculator_tool()
+
+def create_meeting_notes_tool(transcript_store):
+    def build():
+        from src.tools.meeting_notes_tool import GetMeetingNotesTool
+        return GetMeetingNotesTool(transcript_store)
+    return build
+
+def create_meeting_assistant(tools, **options):
+    from src.agents.meeting_assistant import MeetingAssistant
+    return MeetingAssistant(tools=tools, **options)
+
+def create_registry(transcript_store=None):
+    """Register the available tools and agents; nothing is built yet."""
+    registry = Registry()
+    
+    registry.register_tool("calculator", "Performs mathematical calculations", create_calculator_tool)
+    registry.register_tool("weather", "Gets weather information for a location", create_weather_tool)
     
     # Math Agent
-    math_agent = AgentConfig(
-        name="Math Assistant",
+    registry.register_agent(
+        "Math Assistant",
         background="I am specialized in performing mathematical calculations and solving math problems.",
-        tools=[tools[0]],  # Calculator tool
-        expected_output="Mathematical results with explanations"
+        expected_output="Mathematical results with explanations",
+        keywords=["calculate", "compute", "math", "sum", "multiply", "divide", "square root"],
+        tools=["calculator"]
     )
-    agents.append(math_agent)
     
     # Weather Agent
-    weather_agent = AgentConfig(
-        name="Weather Assistant",
+    registry.register_agent(
+        "Weather Assistant",
         background="I am specialized in providing weather information and forecasts.",
-        tools=[tools[1]],  # Weather tool
-        expected_output="Weather information in a user-friendly format"
+        expected_output="Weather information in a user-friendly format",
+        keywords=["weather", "forecast", "temperature", "rain", "snow", "sunny"],
+        tools=["weather"]
     )
-    agents.append(weather_agent)
     
-    # Meeting Assistant
-    meeting_assistant = MeetingAssistant()
-    agents.append(meeting_assistant)
+    # Meeting Assistant; the routing metadata mirrors MeetingAssistant.__init__
+    registry.register_tool(
+        "get_meeting_notes",
+        "Retrieves meeting transcripts based on meeting descriptions or context",
+        create_meeting_notes_tool(transcript_store)
+    )
+    registry.register_agent(
+        "Meeting Assistant",
+        background="I specialize in retrieving and analyzing meeting transcripts to answer questions about past meetings.",
+        expected_output="Meeting information and transcript analysis",
+        keywords=["meeting", "discussion", "call", "sync", "standup", "review", "transcript", "notes", "minutes"],
+        tools=["get_meeting_notes"],
+        factory=create_meeting_assistant
+    )
     
-    return agents
+    return registry
+
+def load_registry(path, transcript_store=None):
+    """Load the agents and tools declared in a JSON/YAML file and follow its edits."""
+    registry = Registry.load(path, resources={"transcript_store": transcript_store})
+    registry.watch(interval=float(os.getenv("AGENT_CONFIG_REFRESH_SECONDS", "5")))
+    return registry
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AgenticAI chat")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a per-stage timing breakdown after each turn")
+    parser.add_argument("--trace-file", help="Append trace spans as JSON lines to this file")
+    parser.add_argument("--otlp-file", help="Append traces in OpenTelemetry (OTLP/JSON) format to this file")
+    parser.add_argument("--config", default=os.getenv("AGENT_CONFIG"),
+                        help="Load agents and tools from this JSON/YAML file (see config/agents.example.json)")
+    parser.add_argument("--model-policy", default=os.getenv("MODEL_POLICY"),
+                        help="JSON file choosing models per stage (see config/model_policy.example.json)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Send a duplicate of slow LLM requests and keep the first answer")
+    parser.add_argument("--hedge-delay", type=float,
+                        help="Seconds before hedging (default: the model's recent p95 latency)")
+    parser.add_argument("--speculate", action="store_true",
+                        help="Start the likely agent while the LLM is still routing")
+    parser.add_argument("--max-extra-tokens", type=int, default=50000,
+                        help="Tokens hedging and speculation may waste in total")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="Answer the questions in a JSONL file instead of chatting")
+    parser.add_argument("--output", help="Batch answers file (default: INPUT with .answers.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions answered at once in batch mode")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Start the batch over instead of skipping answered questions")
+    return parser.parse_args()
+
+def load_transcripts():
+    """Index TRANSCRIPTS_DIR, if set, and keep re-ingesting it in the background.
+
+    The index is kept in TRANSCRIPT_INDEX when set, otherwise in memory.
+    """
+    transcripts_dir = os.getenv("TRANSCRIPTS_DIR")
+    if not transcripts_dir:
+        return None
+    from src.retrieval.ingest import IngestPipeline
+    from src.retrieval.vector_index import RetrievalEngine
+    index_dir = os.getenv("TRANSCRIPT_INDEX")
+    store = RetrievalEngine(path=index_dir)
+    pipeline = IngestPipeline(store, manifest_path=os.path.join(index_dir, "manifest.json") if index_dir else None)
+    report = pipeline.ingest_directory(transcripts_dir, prune=True)
+    print(f"Indexed transcripts: {report.added} added, {report.updated} updated, "
+          f"{report.removed} removed, {report.unchanged} unchanged, {report.failed} failed")
+    pipeline.watch(transcripts_dir, interval=float(os.getenv("TRANSCRIPT_REFRESH_SECONDS", "60")))
+    return store
+
+def run_batch(args, registry, api_key):
+    """Answer a JSONL question set and print the throughput and cost report."""
+    from src.core.batch import BatchRunner
+    from src.core.chat_manager import ChatManager
+    from src.core.conversation_store import ConversationStore
+    output = args.output or os.path.splitext(args.batch)[0] + ".answers.jsonl"
+    chat_manager = ChatManager(registry=registry, openai_api_key=api_key, store=ConversationStore())
+    runner = BatchRunner(chat_manager, concurrency=args.concurrency, resume=not args.no_resume)
+    report = runner.run(args.batch, output)
+    print(json.dumps(report.as_dict(), indent=2))
+    print(f"Answers written to {output}")
 
 def main():
+    args = parse_args()
+
+    from dotenv import load_dotenv
+    from src.utils.llm_utils import setup_openai
+    from src.utils.tracing import (
+        JsonLinesExporter, OtlpJsonExporter, RingBufferExporter, configure_tracing, format_breakdown
+    )
+    
     # Load environment variables
     load_dotenv()
     
@@ -73,18 +161,55 @@ def main():
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY environment variable is not set")
-    setup_openai(api_key)
+    # Completions, routing and agent steps are cached; batch runs keep
+    # everything so repeated questions are free
+    from src.utils.cache import CompletionCache
+    cache = CompletionCache(max_entries=100000, ttl=None) if args.batch else CompletionCache()
+    latency_policy = None
+    if args.hedge or args.speculate:
+        from src.utils.latency import LatencyPolicy
+        latency_policy = LatencyPolicy(
+            hedge=args.hedge,
+            hedge_delay=args.hedge_delay,
+            speculate=args.speculate,
+            max_extra_tokens=args.max_extra_tokens
+        )
+    setup_openai(api_key, cache=cache, latency_policy=latency_policy)
+    if args.model_policy:
+        from src.utils.model_policy import ModelPolicy, configure_model_policy
+        configure_model_policy(ModelPolicy.from_file(args.model_policy))
+    
+    # Tracing is off (and free) unless an exporter is requested
+    profiler = RingBufferExporter(max_traces=1) if args.profile else None
+    exporters = [profiler] if profiler else []
+    if args.trace_file:
+        exporters.append(JsonLinesExporter(args.trace_file))
+    if args.otlp_file:
+        exporters.append(OtlpJsonExporter(args.otlp_file))
+    configure_tracing(*exporters)
+    
+    # Register tools and agents; each is built when first used
+    transcript_store = load_transcripts()
+    if args.config:
+        registry = load_registry(args.config, transcript_store)
+    else:
+        registry = create_registry(transcript_store)
+    
+    if args.batch:
+        run_batch(args, registry, api_key)
+        return
     
-    # Create tools and agents
-    tools = create_tools()
-    agents = create_agents(tools)
+    from src.core.chat_manager import ChatManager
+    from src.core.conversation_store import ConversationStore
+    from src.core.events import TokenEvent
     
     # Initialize chat manager
-    chat_manager = ChatManager(agents=agents, openai_api_key=api_key)
+    store = ConversationStore(os.getenv("CONVERSATION_DB", "conversations.db"))
+    chat_manager = ChatManager(registry=registry, openai_api_key=api_key, store=store)
     
     # Main chat loop
     print("Welcome to AgenticAI! Type 'exit' to end the conversation.")
-    print("Available agents:", ", ".join(agent.name for agent in agents))
+    print("Available agents:", ", ".join(agent.name for agent in chat_manager.agents))
     
     while True:
         try:
@@ -93,8 +218,13 @@ def main():
                 print("Goodbye!")
                 break
             
-            response = chat_manager.handle_input(user_input)
-            print(f"Assistant: {response}")
+            print("Assistant: ", end="", flush=True)
+            for event in chat_manager.handle_input_stream(user_input):
+                if isinstance(event, TokenEvent):
+                    print(event.text, end="", flush=True)
+            print()
+            if profiler and profiler.last():
+                print("\n" + format_breakdown(profiler.last()))
             
         except Exception as e:
             print(f"Error: {str(e)}")
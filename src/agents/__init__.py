@@ -1 +1,14 @@
-from .agent_config import AgentConfig 
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+_EXPORTS = {
+    "AgentConfig": ".agent_config",
+    "MeetingAssistant": ".meeting_assistant",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .agent_config import AgentConfig
+    from .meeting_assistant import MeetingAssistant
@@ -1,7 +1,42 @@
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import asyncio
+import json
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Set
 from ..tools.tool_config import ToolConfig
-import openai
+from ..utils.context_budget import count_message_tokens, count_tokens
+from ..utils.llm_utils import get_llm_client
+from ..utils.model_policy import get_model_policy
+from ..utils.scheduler import TaskNode, TaskResult, get_scheduler
+from ..utils.structured_output import (
+    ToolCall, acall_with_repair, call_with_repair, forced_choice, function_tool, parse_json
+)
+from ..utils.tracing import record_error, span
+
+# Functions every agent can call besides its tools.
+FINAL_RESULT_TOOL = function_tool(
+    "final_result",
+    "Give the final answer to the instruction.",
+    {"result": {"type": "string", "description": "The answer"}},
+    ["result"]
+)
+REPORT_ERROR_TOOL = function_tool(
+    "report_error",
+    "Report that the instruction cannot be carried out.",
+    {"message": {"type": "string", "description": "What went wrong"}},
+    ["message"]
+)
+
+# Tool results longer than this are truncated before the model sees them.
+MAX_TOOL_MESSAGE_CHARS = 4000
+
+def _call_key(call: ToolCall) -> str:
+    """Identity of a tool call: the function and its arguments."""
+    return f"{call.name}:{json.dumps(call.arguments, sort_keys=True, default=str)}"
+
+def _tool_message(result: Any) -> str:
+    text = result if isinstance(result, str) else json.dumps(result, default=str)
+    return text[:MAX_TOOL_MESSAGE_CHARS]
 
 @dataclass
 class AgentConfig:
@@ -9,7 +44,16 @@ class AgentConfig:
     background: str
     tools: List[ToolConfig]
     expected_output: str
-    model: str = "gpt-3.5-turbo"  # Default model
+    model: Optional[str] = None  # None: the model policy's tool_selection model
+    keywords: List[str] = field(default_factory=list)  # Routing hints
+    tool_timeout: Optional[float] = 30.0  # Per-call limit for tool calls
+    max_steps: int = 5  # Tool-calling rounds before a final answer is required
+    max_run_tokens: Optional[int] = 8000  # Prompt tokens one run may send in total
+
+    def can_handle(self, instruction: str) -> bool:
+        """Determine if the instruction mentions any of this agent's keywords."""
+        instruction = instruction.lower()
+        return any(keyword in instruction for keyword in self.keywords)
 
     def get_agent_info(self) -> Dict[str, Any]:
         """Format agent information into a JSON-readable format."""
@@ -21,31 +65,96 @@ class AgentConfig:
         }
 
     def run_agent(self, instruction: str) -> tuple[str, Dict[str, Any]]:
-        """Execute the agent with the given instruction."""
-        # Construct the prompt for the agent
-        system_prompt = self._build_system_prompt()
-        
-        try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": instruction}
-                ]
-            )
-            
-            # Parse the response and determine action
-            result = self._parse_agent_response(response.choices[0].message.content)
-            return result
-        except Exception as e:
-            return f"Error executing agent {self.name}: {str(e)}", {}
+        """Run the agent's tool loop until it gives a final result.
+
+        Tool results are appended to the conversation as tool messages, so
+        the model sees them and can chain further calls. The loop ends after
+        ``max_steps`` steps, when the model repeats a step or when another
+        step would leave too little of ``max_run_tokens`` for the final
+        call; the model is then asked for its final answer. If even that
+        call would not fit, the tool results so far are returned instead.
+        """
+        with span("agent", agent=self.name) as agent_span:
+            try:
+                llm = get_llm_client()
+                run = _ToolLoop(self, instruction)
+                while run.start_step():
+                    with span("agent_step", step=run.context["steps"]):
+                        message, calls = self._select_tools(llm, run.messages, "required")
+                        if not calls:
+                            return self._parse_agent_response(message.content or "")
+                        final = self._conclude(calls, run.context)
+                        if final:
+                            agent_span.set(steps=run.context["steps"], prompt_tokens_sent=run.spent)
+                            return final
+                        if run.repeats(calls):
+                            break
+                        run.add_results(message, calls, self._execute_calls(calls, run.tool_cache))
+
+                fits = run.start_final()
+                agent_span.set(steps=run.context["steps"], prompt_tokens_sent=run.spent, stop_reason=run.stop_reason)
+                if not fits:
+                    return run.out_of_tokens()
+                _, calls = self._select_tools(llm, run.messages, forced_choice("final_result"))
+                return self._conclude(calls, run.context) or run.tool_summary()
+            except Exception as e:
+                record_error(e)
+                return f"Error executing agent {self.name}: {str(e)}", {"error": str(e)}
+
+    async def run_agent_async(self, instruction: str) -> tuple[str, Dict[str, Any]]:
+        """Async counterpart of ``run_agent``, running the tool loop on the event loop.
+
+        Subclasses that only override ``run_agent`` keep running it on a
+        worker thread.
+        """
+        if type(self).run_agent is not AgentConfig.run_agent:
+            return await asyncio.to_thread(self.run_agent, instruction)
+        async with span("agent", agent=self.name) as agent_span:
+            try:
+                llm = get_llm_client()
+                run = _ToolLoop(self, instruction)
+                while run.start_step():
+                    async with span("agent_step", step=run.context["steps"]):
+                        message, calls = await self._select_tools_async(llm, run.messages, "required")
+                        if not calls:
+                            # Text actions may run a tool the blocking way; models rarely send them.
+                            return await asyncio.to_thread(self._parse_agent_response, message.content or "")
+                        final = self._conclude(calls, run.context)
+                        if final:
+                            agent_span.set(steps=run.context["steps"], prompt_tokens_sent=run.spent)
+                            return final
+                        if run.repeats(calls):
+                            break
+                        run.add_results(message, calls, await self._execute_calls_async(calls, run.tool_cache))
+
+                fits = run.start_final()
+                agent_span.set(steps=run.context["steps"], prompt_tokens_sent=run.spent, stop_reason=run.stop_reason)
+                if not fits:
+                    return run.out_of_tokens()
+                _, calls = await self._select_tools_async(llm, run.messages, forced_choice("final_result"))
+                return self._conclude(calls, run.context) or run.tool_summary()
+            except Exception as e:
+                record_error(e)
+                return f"Error executing agent {self.name}: {str(e)}", {"error": str(e)}
+
+    @cached_property
+    def system_prompt(self) -> str:
+        """System prompt for the agent, rendered once since agents do not change."""
+        return self._build_system_prompt()
+
+    @cached_property
+    def routing_fragment(self) -> str:
+        """This agent's entry in routing prompts, rendered once."""
+        return f"Agent: {self.name}\nBackground: {self.background}\n"
+
+    @cached_property
+    def tool_schemas(self) -> List[Dict[str, Any]]:
+        """Function-calling schemas offered to the model, built once."""
+        return [tool.function_schema for tool in self.tools] + [FINAL_RESULT_TOOL, REPORT_ERROR_TOOL]
 
     def _build_system_prompt(self) -> str:
         """Build the system prompt for the agent."""
-        tools_info = "\n".join([
-            f"Tool: {tool.name}\nDescription: {tool.description}\n"
-            for tool in self.tools
-        ])
+        tools_info = "\n".join(tool.prompt_fragment for tool in self.tools)
         
         return f"""You are an AI agent named {self.name} with the following background:
 {self.background}
@@ -56,25 +165,125 @@ Available tools:
 Expected output format:
 {self.expected_output}
 
-Respond in JSON format with either:
-1. {{"action": "use_tool", "tool": "tool_name", "parameters": {{...}}}}
-2. {{"action": "final_result", "result": "your result"}}
-3. {{"action": "error", "message": "error message"}}"""
+Call a tool to act, calling several at once when they do not depend on each other.
+Call final_result with your answer, or report_error if the instruction cannot be done."""
+
+    def _select_tools(self, llm: Any, messages: List[Dict[str, Any]], tool_choice: Any) -> tuple[Any, List[ToolCall]]:
+        """Ask for the next tool calls; a larger model retries when none are usable."""
+        return get_model_policy().run(
+            "tool_selection",
+            lambda model: call_with_repair(llm, messages, self.tool_schemas, model=model, tool_choice=tool_choice),
+            accept=lambda reply: bool(reply[1]) and all(call.ok for call in reply[1]),
+            model=self.model
+        )
+
+    async def _select_tools_async(
+        self, llm: Any, messages: List[Dict[str, Any]], tool_choice: Any
+    ) -> tuple[Any, List[ToolCall]]:
+        """Async counterpart of ``_select_tools``."""
+        return await get_model_policy().run_async(
+            "tool_selection",
+            lambda model: acall_with_repair(llm, messages, self.tool_schemas, model=model, tool_choice=tool_choice),
+            accept=lambda reply: bool(reply[1]) and all(call.ok for call in reply[1]),
+            model=self.model
+        )
+
+    def _conclude(self, calls: List[ToolCall], context: Dict[str, Any]) -> Optional[tuple[str, Dict[str, Any]]]:
+        """Return the run's outcome if the model answered or gave up, else None."""
+        for call in calls:
+            if call.ok and call.name == "final_result":
+                return call.arguments["result"], {**context, "final_result": call.arguments["result"]}
+            if call.ok and call.name == "report_error":
+                record_error(call.arguments["message"])
+                return call.arguments["message"], {**context, "error": call.arguments["message"]}
+        return None
+
+    def _execute_calls(self, calls: List[ToolCall], cache: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Run one step's tool calls, reusing results of identical earlier calls.
+
+        Calls run on the tools scheduler, independent ones in parallel, each
+        limited to ``tool_timeout``. Returns ``{call id: {"tool", "status",
+        "result"}}``; invalid calls get their error back as the result so the
+        model can correct itself.
+        """
+        nodes = self._tool_nodes(calls, cache)
+        outcomes = get_scheduler("tools").run(nodes) if nodes else {}
+        return self._call_results(calls, cache, outcomes)
+
+    async def _execute_calls_async(self, calls: List[ToolCall], cache: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Async counterpart of ``_execute_calls``."""
+        nodes = self._tool_nodes(calls, cache)
+        outcomes = await get_scheduler("tools").run_async(nodes) if nodes else {}
+        return self._call_results(calls, cache, outcomes)
+
+    def _tool_nodes(self, calls: List[ToolCall], cache: Dict[str, Any]) -> List[TaskNode]:
+        """Scheduler nodes for the valid calls not answered by ``cache``, one per distinct call."""
+        pending: Dict[str, ToolCall] = {}
+        for call in calls:
+            if call.ok and self._tools_by_name.get(call.name) and _call_key(call) not in cache:
+                pending.setdefault(_call_key(call), call)
+        return [
+            TaskNode(
+                id=key,
+                fn=lambda _inputs, tool=self._tools_by_name[call.name], params=call.arguments: tool.run_tool(params),
+                timeout=self.tool_timeout
+            )
+            for key, call in pending.items()
+        ]
+
+    def _call_results(
+        self, calls: List[ToolCall], cache: Dict[str, Any], outcomes: Dict[str, TaskResult]
+    ) -> Dict[str, Dict[str, Any]]:
+        for key, outcome in outcomes.items():
+            cache[key] = ("ok", outcome.value) if outcome.ok else (
+                outcome.status, f"Error: {outcome.error or outcome.status}"
+            )
+        results = {}
+        for call in calls:
+            if not call.ok:
+                status, value = "error", f"Error: {call.error}"
+            elif call.name not in self._tools_by_name:
+                status, value = "error", f"Error: Tool {call.name} not found"
+            else:
+                status, value = cache[_call_key(call)]
+            results[call.id] = {"tool": call.name, "status": status, "result": value}
+        return results
+
+    @cached_property
+    def _tools_by_name(self) -> Dict[str, ToolConfig]:
+        return {tool.name: tool for tool in self.tools}
 
     def _parse_agent_response(self, response: str) -> tuple[str, Dict[str, Any]]:
-        """Parse the agent's response and execute appropriate action."""
+        """Parse a JSON action written as text, for models that skip function calling."""
+        try:
+            parsed = parse_json(response)
+        except Exception as e:
+            record_error(e)
+            return f"Error parsing agent response: {str(e)}", {"error": str(e)}
+        return self._dispatch(parsed)
+
+    def _dispatch(self, parsed: Dict[str, Any]) -> tuple[str, Dict[str, Any]]:
+        """Execute a parsed agent action."""
         try:
-            import json
-            parsed = json.loads(response)
-            
             if parsed["action"] == "use_tool":
                 tool_name = parsed["tool"]
-                tool = next((t for t in self.tools if t.name == tool_name), None)
+                tool = self._tools_by_name.get(tool_name)
                 if not tool:
-                    return f"Error: Tool {tool_name} not found", {}
+                    return f"Error: Tool {tool_name} not found", {"error": f"Tool {tool_name} not found"}
                 
-                result = tool.run_tool(parsed["parameters"])
-                return str(result), {"tool_used": tool_name, "result": result}
+                outcome = get_scheduler("tools").run([TaskNode(
+                    id=tool_name,
+                    fn=lambda _inputs: tool.run_tool(parsed["parameters"]),
+                    timeout=self.tool_timeout
+                )])[tool_name]
+                if not outcome.ok:
+                    return f"Error: {outcome.error or outcome.status}", {
+                        "tool_used": tool_name, "error": outcome.error or outcome.status
+                    }
+                return str(outcome.value), {"tool_used": tool_name, "result": outcome.value}
+
+            elif parsed["action"] == "use_tools":
+                return self._run_tool_calls(parsed["calls"])
                 
             elif parsed["action"] == "final_result":
                 return parsed["result"], {"final_result": parsed["result"]}
@@ -83,4 +292,110 @@ Respond in JSON format with either:
                 return parsed["message"], {"error": parsed["message"]}
                 
         except Exception as e:
-            return f"Error parsing agent response: {str(e)}", {"error": str(e)} 
\ No newline at end of file
+            record_error(e)
+            return f"Error parsing agent response: {str(e)}", {"error": str(e)}
+
+    def _run_tool_calls(self, calls: List[Dict[str, Any]]) -> tuple[str, Dict[str, Any]]:
+        """Run several tool calls as a dependency DAG and merge their results."""
+        nodes = []
+        for index, call in enumerate(calls):
+            tool = self._tools_by_name.get(call["tool"])
+            if not tool:
+                return f"Error: Tool {call['tool']} not found", {"error": f"Tool {call['tool']} not found"}
+            nodes.append(TaskNode(
+                id=str(call.get("id", index)),
+                fn=lambda _inputs, tool=tool, params=call.get("parameters", {}): tool.run_tool(params),
+                depends_on=[str(dep) for dep in call.get("depends_on", [])],
+                timeout=self.tool_timeout
+            ))
+
+        results: Dict[str, TaskResult] = get_scheduler("tools").run(nodes)
+        lines, merged = [], {}
+        for node, call in zip(nodes, calls):
+            outcome = results[node.id]
+            value = outcome.value if outcome.ok else f"Error: {outcome.error or outcome.status}"
+            lines.append(f"{call['tool']}: {value}")
+            merged[node.id] = {"tool": call["tool"], "status": outcome.status, "result": value}
+        return "\n".join(lines), {"tools_used": [c["tool"] for c in calls], "results": merged}
+
+class _ToolLoop:
+    """Messages, token budget and results of one agent run.
+
+    ``run_agent`` and ``run_agent_async`` drive it with blocking and async
+    calls respectively.
+    """
+
+    def __init__(self, agent: AgentConfig, instruction: str):
+        self.agent = agent
+        self.messages: List[Dict[str, Any]] = [
+            {"role": "system", "content": agent.system_prompt},
+            {"role": "user", "content": instruction}
+        ]
+        self.model = agent.model or get_model_policy().model("tool_selection")  # for token counts
+        self.prompt_tokens = count_message_tokens(self.messages, self.model)
+        self.spent = 0
+        self.stop_reason = "max_steps"
+        self.seen_steps: Set[frozenset] = set()
+        self.tool_cache: Dict[str, Any] = {}
+        self.context: Dict[str, Any] = {"tools_used": [], "results": {}, "steps": 0}
+
+    def start_step(self) -> bool:
+        """Count another tool-calling step, or return False when the loop should end."""
+        if self.context["steps"] >= self.agent.max_steps:
+            return False
+        # Keep room for the final call, which resends at least this prompt.
+        if self.agent.max_run_tokens and self.spent + 2 * self.prompt_tokens > self.agent.max_run_tokens:
+            self.stop_reason = "max_run_tokens"
+            return False
+        self.spent += self.prompt_tokens
+        self.context["steps"] += 1
+        return True
+
+    def repeats(self, calls: List[ToolCall]) -> bool:
+        """Whether the model asked for exactly the calls of an earlier step."""
+        step_key = frozenset(_call_key(call) for call in calls)
+        if step_key in self.seen_steps:
+            self.stop_reason = "repeated"
+            return True
+        self.seen_steps.add(step_key)
+        return False
+
+    def add_results(self, message: Any, calls: List[ToolCall], results: Dict[str, Dict[str, Any]]) -> None:
+        """Append a step's calls and their results to the conversation."""
+        new_messages: List[Dict[str, Any]] = [{
+            "role": "assistant",
+            "content": message.content,
+            "tool_calls": [call.as_message() for call in calls]
+        }]
+        for call in calls:
+            self.context["tools_used"].append(call.name)
+            self.context["results"][call.id] = results[call.id]
+            new_messages.append({
+                "role": "tool",
+                "tool_call_id": call.id,
+                "content": _tool_message(results[call.id]["result"])
+            })
+        self.messages.extend(new_messages)
+        self.prompt_tokens += count_message_tokens(new_messages, self.model) + sum(
+            count_tokens(call.raw_arguments, self.model) for call in calls
+        )
+
+    def start_final(self) -> bool:
+        """Count the forced final_result call, or return False when it would not fit."""
+        if self.agent.max_run_tokens and self.spent + self.prompt_tokens > self.agent.max_run_tokens:
+            self.stop_reason = "max_run_tokens"
+            return False
+        self.spent += self.prompt_tokens
+        return True
+
+    def out_of_tokens(self) -> tuple[str, Dict[str, Any]]:
+        """The run's answer when not even the final call fits in ``max_run_tokens``."""
+        if self.context["results"]:
+            return self.tool_summary()
+        error = f"Instruction does not fit in max_run_tokens ({self.agent.max_run_tokens})"
+        record_error(error)
+        return f"Error executing agent {self.agent.name}: {error}", {**self.context, "error": error}
+
+    def tool_summary(self) -> tuple[str, Dict[str, Any]]:
+        """Answer with the tool results gathered so far, for runs without a final result."""
+        return "\n".join(f"{r['tool']}: {r['result']}" for r in self.context["results"].values()), self.context
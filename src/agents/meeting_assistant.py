@@ -1,47 +1,111 @@
-from typing import Dict, Any, Tuple
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
 from .agent_config import AgentConfig
+from ..retrieval.transcript_store import BaseTranscriptStore, tokenize
+from ..retrieval.vector_index import chunk_text
 from ..tools.meeting_notes_tool import GetMeetingNotesTool
+from ..utils.context_budget import ContextBudget
 from ..utils.llm_utils import create_chat_completion
-import json
+from ..utils.model_policy import get_model_policy
+from ..utils.tracing import record_error, span
+
+_WORD_RE = re.compile(r"\w+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Words that phrase a request rather than say what it is about.
+QUERY_FILLER = frozenset("""
+can could would should please tell know give show find summarize summary recap
+happened said say talk talked discuss discussed mention mentioned
+how why he she him his her
+""".split())
+
+# Questions asking for an account or an explanation rather than a fact; they are always generated.
+NON_LOOKUP = frozenset("""
+summarize summarise summary recap overview happened happen why how explain describe discuss discussed
+""".split())
+
+def rewrite_query(instruction: str) -> str:
+    """Reduce a question to the terms worth searching transcripts for."""
+    terms = tokenize(instruction)
+    kept = [t for t in terms if t not in QUERY_FILLER] or terms
+    return " ".join(dict.fromkeys(kept)) or instruction
+
+@dataclass
+class CachedAnswer:
+    """An answer and the transcripts it was drawn from."""
+    response: str
+    context: Dict[str, Any]
+    version: Optional[int]  # store version when the answer was made or last confirmed
+    meetings: str  # digest of the matched transcripts' ids and contents
 
 class MeetingAssistant(AgentConfig):
-    """Specialized agent for handling meeting-related queries."""
+    """Specialized agent for handling meeting-related queries.
+
+    Questions are turned into search queries locally (the routing call
+    already restates them), so a question costs at most one completion.
+    Answers are cached per question and transcript version. A lookup
+    question (not a summary, ``why`` or ``how``) is answered with
+    transcript sentences and no completion at all when retrieval is
+    confident and those sentences contain every query term.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        store: Optional[BaseTranscriptStore] = None,
+        tools: Optional[List[Any]] = None,
+        answer_cache_size: int = 256,
+        extractive_confidence: Optional[float] = 0.3,  # Retrieval confidence to answer extractively; None: never
+        extractive_coverage: float = 1.0,  # Share of query terms the excerpt must contain
+        extractive_sentences: int = 3
+    ):
         super().__init__(
             name="Meeting Assistant",
             background="I specialize in retrieving and analyzing meeting transcripts to answer questions about past meetings.",
-            tools=[GetMeetingNotesTool()],
-            expected_output="Meeting information and transcript analysis"
+            tools=tools or [GetMeetingNotesTool(store)],
+            expected_output="Meeting information and transcript analysis",
+            keywords=[
+                "meeting", "discussion", "call", "sync", "standup",
+                "review", "transcript", "notes", "minutes"
+            ]
         )
-
-    def can_handle(self, instruction: str) -> bool:
-        """Determine if this agent can handle the meeting-related query."""
-        meeting_keywords = [
-            "meeting", "discussion", "call", "sync", "standup", 
-            "review", "transcript", "notes", "minutes"
-        ]
-        return any(keyword in instruction.lower() for keyword in meeting_keywords)
+        self.context_budget = ContextBudget(model=get_model_policy().model("synthesis"), max_prompt_tokens=3000)
+        self.answer_cache_size = answer_cache_size
+        self.extractive_confidence = extractive_confidence
+        self.extractive_coverage = extractive_coverage
+        self.extractive_sentences = extractive_sentences
+        self._answers: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._answers_lock = threading.Lock()
 
     def run_agent(self, instruction: str) -> Tuple[str, Dict[str, Any]]:
         """Process a meeting-related query and return relevant information."""
-        
-        # 1. Create meeting context description
-        context_prompt = f"""
-        Based on this question, create a brief description of the meeting context needed:
-        Question: {instruction}
-        Respond with just the description, no other text.
-        """
-        
-        meeting_description = create_chat_completion([
-            {"role": "system", "content": context_prompt},
-            {"role": "user", "content": instruction}
-        ])
+        with span("agent", agent=self.name) as agent_span:
+            try:
+                return self._answer(instruction, agent_span)
+            except Exception as e:
+                record_error(e)
+                return f"Error executing agent {self.name}: {str(e)}", {"error": str(e)}
+
+    def _answer(self, instruction: str, agent_span: Any) -> Tuple[str, Dict[str, Any]]:
+        """Answer from the cache, from transcript sentences or with a completion."""
+        meeting_tool = self._tools_by_name["get_meeting_notes"]
+        version = getattr(getattr(meeting_tool, "store", None), "version", None)
+        key = " ".join(_WORD_RE.findall(instruction.lower()))
+
+        # 1. Nothing changed since this question was answered: skip retrieval too
+        cached = self._cached_answer(key)
+        if cached is not None and version is not None and cached.version == version:
+            agent_span.set(answer="cached")
+            return cached.response, {**cached.context, "answer": "cached"}
 
         # 2. Get meeting transcripts
-        meeting_tool = next(t for t in self.tools if t.name == "get_meeting_notes")
-        result = meeting_tool.run_tool({"description": meeting_description})
+        query = rewrite_query(instruction)
+        result = meeting_tool.run_tool({"description": query})
 
+        agent_span.set(transcripts=len(result["transcripts"]), confidence=result["confidence"])
         if not result["found"]:
             return (
                 "I couldn't find any meeting transcripts matching your query. "
@@ -49,25 +113,122 @@ class MeetingAssistant(AgentConfig):
                 {"found": False}
             )
 
-        # 3. Analyze transcripts and generate response
+        # 3. Same question over the same transcripts: other meetings changed, the answer did not
+        meetings = self._digest(result["transcripts"])
+        if cached is not None and cached.meetings == meetings:
+            cached.version = version
+            agent_span.set(answer="cached")
+            return cached.response, {**cached.context, "answer": "cached"}
+
+        context = {"found": True, "confidence": result["confidence"], "query": query}
+
+        # 4. A confident lookup whose best sentences cover the question needs no generation
+        excerpt = self._extract_answer(instruction, query, result["confidence"], result["transcripts"])
+        if excerpt is not None:
+            agent_span.set(answer="extractive")
+            context["answer"] = "extractive"
+            self._store_answer(key, CachedAnswer(excerpt, dict(context), version, meetings))
+            return excerpt, context
+
+        # 5. Analyze the most relevant transcript excerpts that fit the budget
         analysis_prompt = f"""
         Based on these meeting transcripts, answer the following question:
         Question: {instruction}
 
-        Transcripts:
-        {json.dumps(result["transcripts"], indent=2)}
-
         If the information is incomplete, mention that in your response.
         Be concise but informative.
         """
 
-        response = create_chat_completion([
-            {"role": "system", "content": analysis_prompt},
-            {"role": "user", "content": instruction}
-        ])
+        messages, report = self.context_budget.build(
+            "meeting_analysis",
+            analysis_prompt,
+            [{"role": "user", "content": instruction}],
+            retrieved=self._rank_chunks(instruction, result["transcripts"]),
+            retrieved_header="Transcripts:"
+        )
+        # Weak retrieval goes straight to the synthesis fallback model, if one is set.
+        response = get_model_policy().run(
+            "synthesis",
+            lambda model: create_chat_completion(messages, model=model),
+            confidence=result["confidence"]
+        )
+
+        agent_span.set(answer="generated")
+        context.update(answer="generated", prompt_tokens=report.as_dict())
+        self._store_answer(key, CachedAnswer(response, dict(context), version, meetings))
+        return response, context
+
+    def _extract_answer(
+        self,
+        instruction: str,
+        query: str,
+        confidence: float,
+        transcripts: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """The best matching transcript sentences, if they are a good enough answer."""
+        if self.extractive_confidence is None or confidence < self.extractive_confidence:
+            return None
+        if NON_LOOKUP & set(_WORD_RE.findall(instruction.lower())):
+            return None
+        terms = set(query.split())
+        if not terms:
+            return None
+        scored = []
+        for transcript in transcripts:
+            for sentence in _SENTENCE_RE.split(transcript["content"] or ""):
+                matched = terms & set(tokenize(sentence))
+                if matched:
+                    scored.append((len(matched) * transcript["relevance"], sentence.strip(), transcript["id"], matched))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        picked, covered, seen = [], set(), set()
+        for _, sentence, meeting_id, matched in scored:
+            if sentence in seen or (covered and matched <= covered):
+                continue
+            seen.add(sentence)
+            picked.append((meeting_id, sentence))
+            covered |= matched
+            if len(picked) == self.extractive_sentences:
+                break
+        if len(covered) < self.extractive_coverage * len(terms):
+            return None
+        return "\n".join(f"From {meeting_id}: {sentence}" for meeting_id, sentence in picked)
+
+    def _cached_answer(self, key: str) -> Optional[CachedAnswer]:
+        with self._answers_lock:
+            cached = self._answers.get(key)
+            if cached is not None:
+                self._answers.move_to_end(key)
+            return cached
+
+    def _store_answer(self, key: str, answer: CachedAnswer) -> None:
+        if self.answer_cache_size <= 0:
+            return
+        with self._answers_lock:
+            self._answers[key] = answer
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.answer_cache_size:
+                self._answers.popitem(last=False)
+
+    @staticmethod
+    def _digest(transcripts: List[Dict[str, Any]]) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for transcript in transcripts:
+            digest.update(transcript["id"].encode("utf-8") + b"\0")
+            digest.update((transcript["content"] or "").encode("utf-8") + b"\0")
+        return digest.hexdigest()
 
-        return response, {
-            "found": True,
-            "confidence": result["confidence"],
-            "meeting_description": meeting_description
-        } 
\ No newline at end of file
+    def _rank_chunks(
+        self,
+        instruction: str,
+        transcripts: List[Dict[str, Any]]
+    ) -> List[Tuple[str, float]]:
+        """Split transcripts into chunks scored by relevance to the question."""
+        question_terms = set(tokenize(instruction))
+        chunks = []
+        for transcript in transcripts:
+            for text in chunk_text(transcript["content"]):
+                overlap = len(question_terms & set(tokenize(text))) / max(1, len(question_terms))
+                score = transcript["relevance"] * (0.5 + 0.5 * overlap)
+                chunks.append((f"[{transcript['id']}] {text}", score))
+        return chunks 
\ No newline at end of file
@@ -1 +1,22 @@
-from .chat_manager import ChatManager 
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+_EXPORTS = {
+    "ChatManager": ".chat_manager", "TurnError": ".chat_manager",
+    "AsyncChatManager": ".async_chat_manager",
+    "ConversationStore": ".conversation_store",
+    "TieredRouter": ".router", "RouteDecision": ".router",
+    "BatchReport": ".batch", "BatchRunner": ".batch",
+    "Registry": ".registry", "LazyAgent": ".registry", "LazyTool": ".registry",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .chat_manager import ChatManager, TurnError
+    from .async_chat_manager import AsyncChatManager
+    from .conversation_store import ConversationStore
+    from .router import TieredRouter, RouteDecision
+    from .batch import BatchReport, BatchRunner
+    from .registry import Registry, LazyAgent, LazyTool
@@ -0,0 +1,272 @@
+import asyncio
+import weakref
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
+from ..agents.agent_config import AgentConfig
+from ..utils.context_budget import ContextBudget
+from ..utils.llm_utils import LLMClient
+from ..utils.model_policy import ModelPolicy
+from ..utils.scheduler import DagScheduler
+from ..utils.structured_output import acall_with_repair
+from ..utils.tracing import record_error, span
+from .chat_manager import ChatManager
+from .conversation_store import ConversationStore
+from .events import AgentResultEvent, AgentStartEvent, ChatEvent, DoneEvent, RoutingEvent, TokenEvent
+from .router import TieredRouter
+
+if TYPE_CHECKING:
+    from .registry import Registry
+
+class AsyncChatManager(ChatManager):
+    """ChatManager variant that serves many conversations on one event loop.
+
+    Each conversation is identified by a ``conversation_id``. Turns within a
+    conversation are serialized, while turns of different conversations run
+    concurrently up to ``max_concurrency``.
+    """
+
+    def __init__(
+        self,
+        agents: Optional[List[AgentConfig]] = None,
+        openai_api_key: Optional[str] = None,
+        llm_client: Optional[LLMClient] = None,
+        router: Optional[TieredRouter] = None,
+        context_budget: Optional[ContextBudget] = None,
+        scheduler: Optional[DagScheduler] = None,
+        max_concurrency: int = 100,
+        store: Optional[ConversationStore] = None,
+        registry: Optional["Registry"] = None,
+        model_policy: Optional[ModelPolicy] = None
+    ):
+        super().__init__(
+            agents=agents,
+            openai_api_key=openai_api_key,
+            llm_client=llm_client,
+            router=router,
+            context_budget=context_budget,
+            scheduler=scheduler,
+            store=store,
+            registry=registry,
+            model_policy=model_policy
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Locks of idle conversations are dropped with their last user.
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Background write of each conversation's last reply, with the reply itself.
+        self._pending_writes: Dict[str, Tuple[asyncio.Task, Dict[str, str]]] = {}
+
+    async def handle_input_async(
+        self,
+        user_message: str,
+        conversation_id: str = "default"
+    ) -> str:
+        """Handle user input for a conversation and return a response."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore, self._lock(conversation_id), span("turn", session=conversation_id):
+            user_entry = {"role": "user", "content": user_message}
+            turn_history = self._turn_history(conversation_id, user_entry)
+
+            # Route speculatively on the in-memory snapshot while the previous
+            # turn's reply and this turn's message are still being persisted.
+            routing = asyncio.create_task(self.agentic_action_async(turn_history))
+            await self._flush_pending(conversation_id)
+            await self.persist_message(conversation_id, user_entry)
+
+            result, context = await routing
+            response = await self._generate_response_async(result, context, turn_history)
+
+            self._persist_later(conversation_id, {"role": "assistant", "content": response})
+            return response
+
+    async def persist_message(self, conversation_id: str, message: Dict[str, str]) -> None:
+        """Store a message in the conversation history.
+
+        The default appends to ``self.store``; a WAL append is cheap enough
+        to run on the event loop, and keeps the hot window current for the
+        next turn's speculative routing.
+        """
+        self.store.append(conversation_id, message)
+
+    def _lock(self, conversation_id: str) -> asyncio.Lock:
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = self._locks[conversation_id] = asyncio.Lock()
+        return lock
+
+    def _persist_later(self, conversation_id: str, message: Dict[str, str]) -> None:
+        """Persist a message in the background; the next turn waits for it."""
+        task = asyncio.create_task(self.persist_message(conversation_id, message))
+        self._pending_writes[conversation_id] = (task, message)
+
+        def forget(done: asyncio.Task) -> None:
+            pending = self._pending_writes.get(conversation_id)
+            if pending is not None and pending[0] is done and not done.cancelled() and done.exception() is None:
+                del self._pending_writes[conversation_id]
+        task.add_done_callback(forget)
+
+    async def _flush_pending(self, conversation_id: str) -> None:
+        """Wait for the previous turn's history write to complete."""
+        pending = self._pending_writes.pop(conversation_id, None)
+        if pending is not None:
+            await pending[0]
+
+    def _turn_history(self, conversation_id: str, user_entry: Dict[str, str]) -> List[Dict[str, str]]:
+        """Stored history plus the previous reply while its write is in flight, then the new message."""
+        history = self.store.history(conversation_id)
+        pending = self._pending_writes.get(conversation_id)
+        if pending is not None and not pending[0].done():
+            history = [*history, pending[1]]
+        return [*history, user_entry]
+
+    async def handle_input_stream_async(
+        self,
+        user_message: str,
+        conversation_id: str = "default"
+    ) -> AsyncIterator[ChatEvent]:
+        """Async counterpart of ``handle_input_stream`` for one conversation."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore, self._lock(conversation_id), span("turn", session=conversation_id, stream=True):
+            user_entry = {"role": "user", "content": user_message}
+            turn_history = self._turn_history(conversation_id, user_entry)
+
+            routing = asyncio.create_task(self.route_async(turn_history))
+            await self._flush_pending(conversation_id)
+            await self.persist_message(conversation_id, user_entry)
+
+            try:
+                decision = await routing
+            except Exception as e:
+                decision = {"action": "error", "message": f"Error in agentic action: {str(e)}", "error": str(e)}
+            yield RoutingEvent(decision["action"], decision.get("agent"), decision.get("tier", "llm"))
+
+            for delegation in self._delegations(decision):
+                yield AgentStartEvent(delegation["agent"], delegation["instruction"])
+            result, context = await self.execute_decision_async(decision)
+
+            # Send the phrasing request before reporting the agent result.
+            tokens = self._stream_response_async(result, context, turn_history)
+            first = asyncio.ensure_future(tokens.__anext__())
+            for event in self._tool_events(decision, context):
+                yield event
+            yield AgentResultEvent(result, context)
+
+            parts = []
+            try:
+                parts.append(await first)
+                yield TokenEvent(parts[-1])
+                async for text in tokens:
+                    parts.append(text)
+                    yield TokenEvent(text)
+            except StopAsyncIteration:
+                pass
+            finally:
+                if not first.done():
+                    first.cancel()
+                    await asyncio.gather(first, return_exceptions=True)
+                await tokens.aclose()
+
+            response = "".join(parts)
+            self._persist_later(conversation_id, {"role": "assistant", "content": response})
+            yield DoneEvent(response)
+
+    async def agentic_action_async(self, message_history: List[Dict[str, str]]) -> tuple[str, Dict]:
+        """Async counterpart of ``agentic_action``."""
+        try:
+            return await self.execute_decision_async(await self.route_async(message_history))
+        except Exception as e:
+            record_error(e)
+            return f"Error in agentic action: {str(e)}", {"error": str(e)}
+
+    async def route_async(self, message_history: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Async counterpart of ``route``."""
+        async with span("route") as route_span:
+            decision = self._route_locally(message_history)
+            if not decision:
+                speculation = self._speculate(message_history, use_async=True)
+                try:
+                    # Building may summarize evicted turns, which is a blocking call.
+                    messages, _ = await asyncio.to_thread(
+                        self.context_budget.build, "routing", self.decision_prompt, message_history
+                    )
+
+                    async def choose(model: str) -> Dict[str, Any]:
+                        message, calls = await acall_with_repair(
+                            self.llm, messages, self.routing_tools, model=model, tool_choice="required"
+                        )
+                        return self._decision_from_calls(message, calls)
+
+                    decision = await self.models.run_async("routing", choose, accept=self._names_known_agents)
+                    decision["tier"] = "llm"
+                finally:
+                    self._settle_speculation(speculation, decision)
+            route_span.set(action=decision["action"], tier=decision["tier"])
+            return decision
+
+    async def execute_decision_async(self, decision: Dict[str, Any]) -> tuple[str, Dict]:
+        """Async counterpart of ``execute_decision``."""
+        async with span("execute", action=decision["action"]):
+            try:
+                if decision["action"] == "delegate":
+                    if "speculation" in decision:
+                        return await decision.pop("speculation").result_async()
+                    agent = self._find_agent(decision["agent"])
+                    if not agent:
+                        record_error(f"Agent {decision['agent']} not found")
+                        return f"Error: Agent {decision['agent']} not found", {"error": f"Agent {decision['agent']} not found"}
+                    return await agent.run_agent_async(decision["instruction"])
+                if decision["action"] == "delegate_many":
+                    nodes = self._delegation_nodes(decision, use_async=True)
+                    return self._merge_delegations(decision, await self.scheduler.run_async(nodes))
+                return self._resolve_decision(decision)
+            except Exception as e:
+                record_error(e)
+                return f"Error in agentic action: {str(e)}", {"error": str(e)}
+
+    async def _generate_response_async(
+        self,
+        result: str,
+        context: Dict,
+        message_history: List[Dict[str, str]]
+    ) -> str:
+        """Async counterpart of ``_generate_response``."""
+        async with span("response"):
+            try:
+                messages, _ = await asyncio.to_thread(
+                    self.context_budget.build,
+                    "response",
+                    self._build_response_prompt(result, context),
+                    message_history
+                )
+                with self.models.stage("response") as model:
+                    return await self.llm.achat(messages, model=model)
+
+            except Exception as e:
+                record_error(e)
+                return f"I apologize, but I encountered an error: {str(e)}"
+
+    async def _stream_response_async(
+        self,
+        result: str,
+        context: Dict,
+        message_history: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        """Async counterpart of ``_stream_response``."""
+        async with span("response", stream=True):
+            try:
+                messages, _ = await asyncio.to_thread(
+                    self.context_budget.build,
+                    "response",
+                    self._build_response_prompt(result, context),
+                    message_history
+                )
+                with self.models.stage("response") as model:
+                    async for text in self.llm.astream_chat(messages, model=model):
+                        yield text
+
+            except Exception as e:
+                record_error(e)
+                yield f"I apologize, but I encountered an error: {str(e)}"
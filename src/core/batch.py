@@ -0,0 +1,215 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from ..utils.cache import BaseCompletionCache
+from ..utils.model_policy import MODEL_PRICES, estimate_cost
+from .chat_manager import ChatManager
+
+# Pseudo-model under which final answers are stored in the completion cache.
+ANSWER_CACHE_MODEL = "batch-answer"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+@dataclass
+class BatchReport:
+    """Outcome of a batch run."""
+    records: int = 0
+    answered: int = 0
+    errors: int = 0
+    resumed: int = 0       # already answered by a previous run
+    deduplicated: int = 0  # answered from the cache or an identical question in flight
+    duration: float = 0.0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    usage: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    latency: Dict[str, Any] = field(default_factory=dict)  # hedging/speculation, when enabled
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # per-stage models, latency and cost
+
+    @property
+    def throughput(self) -> float:
+        """Questions processed per second, resumed ones excluded."""
+        processed = self.answered + self.errors
+        return processed / self.duration if self.duration else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "throughput_per_s": self.throughput}
+
+def read_questions(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield ``(id, question)`` from a JSONL file.
+
+    Each line is an object with a ``question`` (or ``content``) and an
+    optional ``id``; the line number is used when the id is missing.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            question = record.get("question", record.get("content"))
+            if not isinstance(question, str):
+                raise ValueError(f"Line {line_number} of {path} has no question")
+            yield str(record.get("id", line_number)), question
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Ids answered successfully in an existing output file.
+
+    A torn last line left by a crash is truncated so appending can resume.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    done = set()
+    for line in data[:end].decode("utf-8").splitlines():
+        if line.strip():
+            record = json.loads(line)
+            if record.get("error") is None:
+                done.add(record["id"])
+    return done
+
+class BatchRunner:
+    """Answers a JSONL question set through a ``ChatManager``.
+
+    Questions are answered concurrently, at most ``concurrency`` at a time,
+    each in its own session that is cleared afterwards. Answers are appended
+    to the output JSONL as they complete, which doubles as the checkpoint:
+    with ``resume`` the ids already answered there are skipped. Failed
+    questions are written with an ``error`` and retried on the next run; the
+    last line for an id wins.
+
+    Identical questions (ignoring case and whitespace) are answered once,
+    and answers are stored in ``cache`` (by default the LLM client's
+    completion cache) so repeated runs do not pay for them again.
+    """
+
+    def __init__(
+        self,
+        chat_manager: ChatManager,
+        concurrency: int = 8,
+        resume: bool = True,
+        cache: Optional[BaseCompletionCache] = None,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        self.chat_manager = chat_manager
+        self.concurrency = concurrency
+        self.resume = resume
+        self.cache = cache if cache is not None else chat_manager.llm.cache
+        self.prices = prices
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, input_path: str, output_path: str) -> BatchReport:
+        """Answer every question in ``input_path`` and return the report."""
+        report = BatchReport()
+        done = load_checkpoint(output_path) if self.resume else set()
+        usage_before = self.chat_manager.llm.usage_totals()
+        latency_before = self.chat_manager.llm.latency_report()
+        started = time.perf_counter()
+
+        with open(output_path, "a" if self.resume else "w", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as pool:
+            pending: Dict[Future, Tuple[str, str, float]] = {}
+
+            def drain(block: bool) -> None:
+                finished = (
+                    wait(pending, return_when=FIRST_COMPLETED).done if block
+                    else [future for future in pending if future.done()]
+                )
+                for future in finished:
+                    record_id, question, submitted = pending.pop(future)
+                    self._write(out, report, record_id, question, future, time.perf_counter() - submitted)
+
+            for record_id, question in read_questions(input_path):
+                report.records += 1
+                if record_id in done:
+                    report.resumed += 1
+                    continue
+                # Keep the window small so huge inputs are streamed, not queued.
+                while len(pending) >= self.concurrency * 2:
+                    drain(block=True)
+                pending[pool.submit(self._answer, record_id, question)] = (record_id, question, time.perf_counter())
+                drain(block=False)
+            while pending:
+                drain(block=True)
+
+        report.duration = time.perf_counter() - started
+        usage_after = self.chat_manager.llm.usage_totals()
+        for model, totals in usage_after.items():
+            before = usage_before.get(model, {})
+            delta = {name: value - before.get(name, 0) for name, value in totals.items()}
+            if delta["calls"]:
+                report.usage[model] = delta
+        report.llm_calls = sum(totals["calls"] for totals in report.usage.values())
+        report.prompt_tokens = sum(totals["prompt_tokens"] for totals in report.usage.values())
+        report.completion_tokens = sum(totals["completion_tokens"] for totals in report.usage.values())
+        report.cost_usd = estimate_cost(report.usage, self.prices)
+        report.latency = {
+            name: value if name == "max_extra_tokens" else value - latency_before.get(name, 0)
+            for name, value in self.chat_manager.llm.latency_report().items()
+        }
+        report.stages = self.chat_manager.models.report()
+        return report
+
+    def _answer(self, record_id: str, question: str) -> Tuple[str, bool]:
+        """Answer one question; returns ``(answer, deduplicated)``."""
+        key = _WHITESPACE_RE.sub(" ", question).strip().lower()
+        messages = [{"role": "user", "content": key}]
+        if self.cache is not None:
+            cached = self.cache.get(ANSWER_CACHE_MODEL, messages)
+            if cached is not None:
+                return cached, True
+
+        with self._lock:
+            leader = self._in_flight.get(key)
+            if leader is None:
+                own: Future = Future()
+                self._in_flight[key] = own
+        if leader is not None:
+            return leader.result()[0], True
+
+        session_id = f"batch-{record_id}"
+        try:
+            # answer() raises on failures that handle_input would turn into an apology,
+            # so they are written with an error and neither cached nor checkpointed.
+            answer = self.chat_manager.answer(question, session_id=session_id)
+            own.set_result((answer, False))
+        except BaseException as e:
+            own.set_exception(e)
+            raise
+        finally:
+            self.chat_manager.store.clear(session_id)
+            with self._lock:
+                self._in_flight.pop(key, None)
+        if self.cache is not None:
+            self.cache.set(ANSWER_CACHE_MODEL, messages, None, answer)
+        return answer, False
+
+    def _write(self, out, report: BatchReport, record_id: str, question: str, future: Future, duration: float) -> None:
+        try:
+            answer, deduplicated = future.result()
+            error = None
+            report.answered += 1
+            report.deduplicated += deduplicated
+        except Exception as e:
+            answer, deduplicated, error = None, False, str(e)
+            report.errors += 1
+        out.write(json.dumps({
+            "id": record_id,
+            "question": question,
+            "answer": answer,
+            "error": error,
+            "deduplicated": deduplicated,
+            "duration": round(duration, 4)
+        }, ensure_ascii=False) + "\n")
+        out.flush()
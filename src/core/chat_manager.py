@@ -1,72 +1,411 @@
-from typing import Dict, List, Optional
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
 from ..agents.agent_config import AgentConfig
-from openai import OpenAI
-import json
+from ..utils.context_budget import ContextBudget, HistorySummarizer
+from ..utils.latency import Speculation, speculate, speculate_async
+from ..utils.llm_utils import LLMClient, get_llm_client
+from ..utils.model_policy import ModelPolicy, get_model_policy
+from ..utils.scheduler import DagScheduler, TaskNode, TaskResult, get_scheduler
+from ..utils.structured_output import ToolCall, call_with_repair, function_tool, parse_json
+from ..utils.tracing import current_span, record_error, span
+from .events import (
+    AgentResultEvent, AgentStartEvent, ChatEvent, DoneEvent, RoutingEvent, TokenEvent, ToolEvent
+)
+from .conversation_store import ConversationStore
+from .router import TieredRouter
+
+if TYPE_CHECKING:
+    from .registry import Registry
+
+class TurnError(Exception):
+    """A turn that failed; ``handle_input`` would have replied with an apology."""
 
 class ChatManager:
-    def __init__(self, agents: List[AgentConfig], openai_api_key: str):
-        self.agents = agents
-        self.message_history = []
-        self.client = OpenAI(api_key=openai_api_key)  # NEW client-based SDK
+    def __init__(
+        self,
+        agents: Optional[List[AgentConfig]] = None,
+        openai_api_key: Optional[str] = None,
+        llm_client: Optional[LLMClient] = None,
+        router: Optional[TieredRouter] = None,
+        context_budget: Optional[ContextBudget] = None,
+        scheduler: Optional[DagScheduler] = None,
+        delegation_timeout: Optional[float] = 120.0,
+        store: Optional[ConversationStore] = None,
+        session_id: str = "default",
+        registry: Optional["Registry"] = None,
+        model_policy: Optional[ModelPolicy] = None
+    ):
+        # With a registry, agents follow its specs and pick up reloads.
+        self.registry = registry
+        self._registry_version = registry.version if registry else None
+        self.agents = registry.lazy_agents() if registry else agents or []
+        self.store = store or ConversationStore()
+        self.session_id = session_id
+        self.llm = llm_client or get_llm_client(openai_api_key)
+        self.models = model_policy or get_model_policy()
+        self._custom_router = router is not None
+        self.router = router or TieredRouter(self.agents)
+        self.context_budget = context_budget or ContextBudget(
+            max_prompt_tokens=4096, summarizer=HistorySummarizer(source=self.store)
+        )
+        self.scheduler = scheduler or get_scheduler()
+        self.delegation_timeout = delegation_timeout
+
+    @property
+    def message_history(self) -> List[Dict[str, str]]:
+        """Recent messages of the current session."""
+        return self.store.history(self.session_id)
+
+    @message_history.setter
+    def message_history(self, messages: List[Dict[str, str]]) -> None:
+        self.store.clear(self.session_id)
+        for message in messages:
+            self.store.append(self.session_id, message)
 
-    def handle_input(self, user_message: str) -> str:
+    def handle_input(self, user_message: str, session_id: Optional[str] = None) -> str:
         """Handle user input and return a response."""
-        self.message_history.append({"role": "user", "content": user_message})
-        
-        result, context = self.agentic_action(self.message_history)
-        response = self._generate_response(result, context)
-        self.message_history.append({"role": "assistant", "content": response})
-        
-        return response
+        return self._handle_turn(user_message, session_id, strict=False)
+
+    def answer(self, user_message: str, session_id: Optional[str] = None) -> str:
+        """Like ``handle_input``, but raise ``TurnError`` instead of replying with an apology.
+
+        For callers that must not mistake a failure for an answer, such as
+        batch runs. A failed turn leaves no assistant reply in the session.
+        """
+        return self._handle_turn(user_message, session_id, strict=True)
+
+    def _handle_turn(self, user_message: str, session_id: Optional[str], strict: bool) -> str:
+        session_id = session_id or self.session_id
+        with span("turn", session=session_id):
+            self.store.append(session_id, {"role": "user", "content": user_message})
+            history = self.store.history(session_id)
+
+            result, context = self.agentic_action(history)
+            if strict:
+                if context.get("error"):
+                    raise TurnError(context["error"])
+                response = self._respond(result, context, history)
+            else:
+                response = self._generate_response(result, context, history)
+            self.store.append(session_id, {"role": "assistant", "content": response})
+
+            return response
+
+    def handle_input_stream(self, user_message: str, session_id: Optional[str] = None) -> Iterator[ChatEvent]:
+        """Handle user input, yielding progress events and response tokens.
+
+        The last event is a ``DoneEvent`` carrying the full response.
+        """
+        session_id = session_id or self.session_id
+        with span("turn", session=session_id, stream=True):
+            self.store.append(session_id, {"role": "user", "content": user_message})
+            history = self.store.history(session_id)
+
+            try:
+                decision = self.route(history)
+            except Exception as e:
+                decision = {"action": "error", "message": f"Error in agentic action: {str(e)}", "error": str(e)}
+            yield RoutingEvent(decision["action"], decision.get("agent"), decision.get("tier", "llm"))
+
+            for delegation in self._delegations(decision):
+                yield AgentStartEvent(delegation["agent"], delegation["instruction"])
+            result, context = self.execute_decision(decision)
+            yield from self._tool_events(decision, context)
+            yield AgentResultEvent(result, context)
+
+            parts = []
+            for text in self._stream_response(result, context, history):
+                parts.append(text)
+                yield TokenEvent(text)
+
+            response = "".join(parts)
+            self.store.append(session_id, {"role": "assistant", "content": response})
+            yield DoneEvent(response)
 
     def agentic_action(self, message_history: List[Dict[str, str]]) -> tuple[str, Dict]:
         """Determine if an agent should be invoked and handle the action."""
+        try:
+            return self.execute_decision(self.route(message_history))
+        except Exception as e:
+            record_error(e)
+            return f"Error in agentic action: {str(e)}", {"error": str(e)}
+
+    def route(self, message_history: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Decide what to do with the latest turn.
+
+        Returns a decision dict like the routing model's JSON reply, with a
+        ``tier`` key naming which router tier made it.
+
+        When the LLM has to decide and the latency policy allows it, the
+        router's likely agent starts on the user's message meanwhile; if the
+        LLM delegates to that agent with the message as its instruction,
+        ``execute_decision`` uses its result.
+        """
+        with span("route") as route_span:
+            decision = self._route_locally(message_history)
+            if not decision:
+                speculation = self._speculate(message_history, use_async=False)
+                try:
+                    messages, _ = self.context_budget.build("routing", self.decision_prompt, message_history)
+
+                    def choose(model: str) -> Dict[str, Any]:
+                        message, calls = call_with_repair(
+                            self.llm, messages, self.routing_tools, model=model, tool_choice="required"
+                        )
+                        return self._decision_from_calls(message, calls)
+
+                    decision = self.models.run("routing", choose, accept=self._names_known_agents)
+                    decision["tier"] = "llm"
+                finally:
+                    self._settle_speculation(speculation, decision)
+            route_span.set(action=decision["action"], tier=decision["tier"])
+            return decision
+
+    def execute_decision(self, decision: Dict[str, Any]) -> tuple[str, Dict]:
+        """Carry out a routing decision and return (result, context)."""
+        with span("execute", action=decision["action"]):
+            try:
+                if decision["action"] == "delegate":
+                    if "speculation" in decision:
+                        return decision.pop("speculation").result()
+                    agent = self._find_agent(decision["agent"])
+                    if not agent:
+                        record_error(f"Agent {decision['agent']} not found")
+                        return f"Error: Agent {decision['agent']} not found", {"error": f"Agent {decision['agent']} not found"}
+                    return agent.run_agent(decision["instruction"])
+                if decision["action"] == "delegate_many":
+                    nodes = self._delegation_nodes(decision, use_async=False)
+                    return self._merge_delegations(decision, self.scheduler.run(nodes))
+                return self._resolve_decision(decision)
+            except Exception as e:
+                record_error(e)
+                return f"Error in agentic action: {str(e)}", {"error": str(e)}
+
+    def _route_locally(self, message_history: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """Try the local router on the latest user message.
+
+        Returns a delegate decision, or None when the LLM must decide.
+        """
+        self._sync_registry()
+        user_message = self._latest_user_message(message_history)
+        decision = self.router.route(user_message) if user_message else None
+        if decision is None or self._find_agent(decision.agent_name) is None:
+            self.router.record_fallback()
+            return None
+        return {
+            "action": "delegate",
+            "agent": decision.agent_name,
+            "instruction": user_message,
+            "tier": decision.tier
+        }
+
+    @staticmethod
+    def _latest_user_message(message_history: List[Dict[str, str]]) -> Optional[str]:
+        return next((m["content"] for m in reversed(message_history) if m["role"] == "user"), None)
 
-        agents_info = "\n".join([
-            f"Agent: {agent.name}\nBackground: {agent.background}\n"
-            for agent in self.agents
-        ])
+    def _speculate(self, message_history: List[Dict[str, str]], use_async: bool) -> Optional[Speculation]:
+        """Start the likely agent on the latest message if the latency policy allows it."""
+        tracker = getattr(self.llm, "latency", None)
+        if tracker is None or not tracker.policy.speculate:
+            return None
+        user_message = self._latest_user_message(message_history)
+        guess = self.router.likely(user_message) if user_message else None
+        agent = self._find_agent(guess.agent_name) if guess else None
+        if agent is None or guess.confidence < tracker.policy.speculate_confidence:
+            return None
+        if use_async:
+            return speculate_async(tracker, agent.name, agent.run_agent_async, user_message)
+        return speculate(tracker, agent.name, agent.run_agent, user_message)
+
+    @staticmethod
+    def _settle_speculation(speculation: Optional[Speculation], decision: Optional[Dict[str, Any]]) -> None:
+        """Attach a speculative run the routing decision agrees with; discard any other."""
+        if speculation is None:
+            return
+        # Routing rewrites follow-ups into self-contained instructions; a run
+        # on the raw message would answer without that context.
+        hit = (
+            bool(decision) and decision["action"] == "delegate"
+            and decision.get("agent") == speculation.agent_name
+            and speculation.args == (decision.get("instruction"),)
+        )
+        # A run cut off by the token cap is not adopted; the agent runs again normally.
+        hit = hit and speculation.adopt()
+        if hit:
+            decision["speculation"] = speculation
+        else:
+            speculation.discard()
+        current_span().set(speculation="hit" if hit else "miss")
+
+    @cached_property
+    def decision_prompt(self) -> str:
+        """Routing prompt, rendered once for the configured agents."""
+        return self._build_decision_prompt()
+
+    def _build_decision_prompt(self) -> str:
+        """Build the routing prompt listing the available agents."""
+        agents_info = "\n".join(agent.routing_fragment for agent in self.agents)
         
-        decision_prompt = f"""Given the following conversation history and available agents, 
+        return f"""Given the following conversation history and available agents, 
 determine if any agent should be invoked or if the chatbot should handle the response directly.
 
 Available Agents:
 {agents_info}
 
-Respond in JSON format with:
-{{"action": "none"}} or
-{{"action": "request_info", "message": "..."}} or
-{{"action": "delegate", "agent": "agent_name", "instruction": "..."}}"""
+Call delegate to hand the request to one agent, delegate_many when it needs
+several agents, request_info when you need more details from the user, or
+respond_directly when no agent is needed. In delegate_many, list ids in
+depends_on only when a step needs the result of another step."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": decision_prompt},
-                    *message_history
-                ]
-            )
-            decision_text = response.choices[0].message.content
-            decision = json.loads(decision_text)
+    @cached_property
+    def routing_tools(self) -> List[Dict[str, Any]]:
+        """Function-calling schemas for routing decisions, built once."""
+        agent_name = {"type": "string", "enum": [agent.name for agent in self.agents]}
+        # The routing call also rewrites the request, so agents can search with it as is.
+        instruction = {
+            "type": "string",
+            "description": "What the agent should do, self-contained: name the people, meetings and topics it concerns"
+        }
+        return [
+            function_tool("delegate", "Hand the request to one agent.",
+                          {"agent": agent_name, "instruction": instruction}, ["agent", "instruction"]),
+            function_tool("delegate_many", "Split the request across several agents.", {
+                "delegations": {"type": "array", "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"},
+                        "agent": agent_name,
+                        "instruction": instruction,
+                        "depends_on": {"type": "array", "items": {"type": "string"}}
+                    },
+                    "required": ["id", "agent", "instruction"]
+                }}
+            }, ["delegations"]),
+            function_tool("request_info", "Ask the user for missing details.",
+                          {"message": {"type": "string"}}, ["message"]),
+            function_tool("respond_directly", "Answer without involving an agent."),
+        ]
 
-            if decision["action"] == "none":
-                return "", {}
+    def _decision_from_calls(self, message: Any, calls: List[ToolCall]) -> Dict[str, Any]:
+        """Turn the routing model's function call into a decision dict."""
+        if not calls:
+            return self._parse_decision(message.content or "")
+        call = calls[0]
+        if not call.ok:
+            raise ValueError(f"Invalid routing call {call.name}: {call.error}")
+        if call.name == "respond_directly":
+            return {"action": "none"}
+        return {"action": call.name, **call.arguments}
 
-            elif decision["action"] == "request_info":
-                return decision["message"], {}
+    def _names_known_agents(self, decision: Dict[str, Any]) -> bool:
+        """Whether every agent a decision delegates to exists; otherwise a larger model retries."""
+        return all(self._find_agent(delegation.get("agent")) for delegation in self._delegations(decision))
 
-            elif decision["action"] == "delegate":
-                agent = next((a for a in self.agents if a.name == decision["agent"]), None)
-                if not agent:
-                    return f"Error: Agent {decision['agent']} not found", {}
-                return agent.run_agent(decision["instruction"])
+    def _parse_decision(self, decision_text: str) -> Dict:
+        """Parse a decision the routing model wrote as JSON text."""
+        return parse_json(decision_text)
 
-        except Exception as e:
-            return f"Error in agentic action: {str(e)}", {"error": str(e)}
+    def _resolve_decision(self, decision: Dict) -> tuple[str, Dict]:
+        """Turn a non-delegating decision into a (result, context) pair."""
+        if decision["action"] == "none":
+            return "", {}
 
-    def _generate_response(self, result: str, context: Dict) -> str:
-        """Generate a natural language response using the result and context."""
-        prompt = f"""As a friendly and informal chatbot assisting the user, generate a response 
+        elif decision["action"] == "request_info":
+            return decision["message"], {}
+
+        elif decision["action"] == "error":
+            return decision["message"], {"error": decision["error"]}
+
+        return f"Error: Unknown action {decision['action']}", {"error": f"Unknown action {decision['action']}"}
+
+    @staticmethod
+    def _delegations(decision: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """The agent delegations a decision asks for, as a list."""
+        if decision["action"] == "delegate":
+            return [decision]
+        if decision["action"] == "delegate_many":
+            return decision["delegations"]
+        return []
+
+    def _delegation_nodes(self, decision: Dict[str, Any], use_async: bool) -> List[TaskNode]:
+        """Build DAG nodes running each delegation on its agent.
+
+        Results of dependencies are appended to a delegation's instruction.
+        """
+        nodes = []
+        for index, delegation in enumerate(decision["delegations"]):
+            agent = self._find_agent(delegation["agent"])
+            if not agent:
+                raise ValueError(f"Agent {delegation['agent']} not found")
+
+            def instruction_with(inputs: Dict[str, Any], delegation=delegation) -> str:
+                if not inputs:
+                    return delegation["instruction"]
+                upstream = "\n".join(f"- {result}" for result, _ in inputs.values())
+                return f"{delegation['instruction']}\n\nResults from earlier steps:\n{upstream}"
+
+            if use_async:
+                async def fn(inputs, agent=agent, instruction_with=instruction_with):
+                    return await agent.run_agent_async(instruction_with(inputs))
+            else:
+                def fn(inputs, agent=agent, instruction_with=instruction_with):
+                    return agent.run_agent(instruction_with(inputs))
+
+            nodes.append(TaskNode(
+                id=str(delegation.get("id", index)),
+                fn=fn,
+                depends_on=[str(dep) for dep in delegation.get("depends_on", [])],
+                timeout=self.delegation_timeout
+            ))
+        return nodes
+
+    @staticmethod
+    def _merge_delegations(decision: Dict[str, Any], results: Dict[str, TaskResult]) -> tuple[str, Dict]:
+        """Combine per-agent results into one (result, context) pair."""
+        lines, merged = [], {}
+        for index, delegation in enumerate(decision["delegations"]):
+            node_id = str(delegation.get("id", index))
+            outcome = results[node_id]
+            result, context = outcome.value if outcome.ok else (f"Error: {outcome.error or outcome.status}", {})
+            lines.append(f"{delegation['agent']}: {result}")
+            merged[node_id] = {
+                "agent": delegation["agent"],
+                "status": outcome.status,
+                "result": result,
+                "context": context
+            }
+        failed = [
+            f"{item['agent']}: {item['context'].get('error') or item['status']}"
+            for item in merged.values()
+            if item["status"] != "ok" or item["context"].get("error")
+        ]
+        if failed:
+            return "\n".join(lines), {"delegations": merged, "error": "; ".join(failed)}
+        return "\n".join(lines), {"delegations": merged}
+
+    @cached_property
+    def agents_by_name(self) -> Dict[str, AgentConfig]:
+        """Agents indexed by name, built once."""
+        return {agent.name: agent for agent in self.agents}
+
+    def _find_agent(self, agent_name: str) -> Optional[AgentConfig]:
+        """Get an agent by name."""
+        return self.agents_by_name.get(agent_name)
+
+    def _sync_registry(self) -> None:
+        """Switch to the registry's agents if it was reloaded since the last turn."""
+        if self.registry is None or self.registry.version == self._registry_version:
+            return
+        self._registry_version = self.registry.version
+        self.agents = self.registry.lazy_agents()
+        for name in ("decision_prompt", "routing_tools", "agents_by_name"):
+            self.__dict__.pop(name, None)
+        if not self._custom_router:
+            self.router = TieredRouter(self.agents)
+
+    def _build_response_prompt(self, result: str, context: Dict) -> str:
+        """Build the system prompt for phrasing the final answer."""
+        return f"""As a friendly and informal chatbot assisting the user, generate a response 
 considering the following result and context from our AI agents:
 
 Result: {result}
@@ -74,15 +413,59 @@ Context: {context}
 
 Respond in a natural, conversational way while incorporating the information provided."""
 
+    def _generate_response(
+        self,
+        result: str,
+        context: Dict,
+        message_history: List[Dict[str, str]]
+    ) -> str:
+        """Generate a natural language response using the result and context."""
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": prompt},
-                    *self.message_history
-                ]
-            )
-            return response.choices[0].message.content
-
+            return self._respond(result, context, message_history)
         except Exception as e:
+            record_error(e)
             return f"I apologize, but I encountered an error: {str(e)}"
+
+    def _respond(
+        self,
+        result: str,
+        context: Dict,
+        message_history: List[Dict[str, str]]
+    ) -> str:
+        """Phrase the final answer; errors propagate."""
+        with span("response"):
+            messages, _ = self.context_budget.build(
+                "response", self._build_response_prompt(result, context), message_history
+            )
+            with self.models.stage("response") as model:
+                return self.llm.chat(messages, model=model)
+
+    def _stream_response(
+        self,
+        result: str,
+        context: Dict,
+        message_history: List[Dict[str, str]]
+    ) -> Iterator[str]:
+        """Stream the natural language response token by token."""
+        with span("response", stream=True):
+            try:
+                messages, _ = self.context_budget.build(
+                    "response", self._build_response_prompt(result, context), message_history
+                )
+                with self.models.stage("response") as model:
+                    yield from self.llm.stream_chat(messages, model=model)
+
+            except Exception as e:
+                record_error(e)
+                yield f"I apologize, but I encountered an error: {str(e)}"
+
+    @classmethod
+    def _tool_events(cls, decision: Dict[str, Any], context: Dict) -> Iterator[ToolEvent]:
+        """Report tools agents used, as recorded in their result contexts."""
+        agent = decision.get("agent", "")
+        if "tool_used" in context:
+            yield ToolEvent(agent, context["tool_used"], context.get("result"))
+        for call in context.get("results", {}).values() if "tools_used" in context else ():
+            yield ToolEvent(agent, call["tool"], call["result"])
+        for delegation in context.get("delegations", {}).values():
+            yield from cls._tool_events(delegation, delegation["context"])
@@ -0,0 +1,187 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+class ConversationStore:
+    """Session-keyed conversation history backed by an append-only SQLite log.
+
+    Messages are appended to a WAL-mode database and the newest
+    ``hot_window`` messages of each session are kept in memory. Sessions are
+    loaded lazily on first access and the least recently used ones are
+    evicted once more than ``max_sessions`` are resident, so memory stays
+    bounded however many sessions the database holds.
+
+    With ``path=None`` the log lives in memory and nothing survives a restart.
+
+    Messages handed out by ``history`` can be traced back to their rows with
+    ``locate``, which lets a ``HistorySummarizer`` extend a session's summary
+    by row id as the window slides (see ``rows_between``).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        hot_window: int = 200,
+        max_sessions: int = 10000,
+        retain_messages: Optional[int] = None,
+        compact_interval: Optional[float] = 300.0
+    ):
+        self.path = path or ":memory:"
+        self.hot_window = hot_window
+        self.max_sessions = max_sessions
+        self.retain_messages = retain_messages  # Per-session rows kept on disk by compact()
+        self._sessions: "OrderedDict[str, Deque[Dict[str, str]]]" = OrderedDict()
+        # id() of each resident message -> (message, session id, row id)
+        self._rows: Dict[int, Tuple[Dict[str, str], str, int]] = {}
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " session_id TEXT NOT NULL,"
+            " role TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id)")
+
+        self._compactor = None
+        if compact_interval and self.path != ":memory:":
+            self._compactor = threading.Thread(
+                target=self._compact_loop, args=(compact_interval,), name="conversation-compactor", daemon=True
+            )
+            self._compactor.start()
+
+    def append(self, session_id: str, message: Dict[str, str]) -> None:
+        """Append a message to a session's log and hot window."""
+        entry = {"role": message["role"], "content": message.get("content") or ""}
+        with self._lock:
+            window = self._window(session_id)  # load before the insert so it isn't read back
+            row_id = self._db.execute(
+                "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, entry["role"], entry["content"], time.time())
+            ).lastrowid
+            window.append(entry)
+            self._rows[id(entry)] = (entry, session_id, row_id)
+            while len(window) > self.hot_window:
+                self._forget(window.popleft())
+
+    def history(self, session_id: str) -> List[Dict[str, str]]:
+        """The session's most recent messages, oldest first."""
+        with self._lock:
+            return list(self._window(session_id))
+
+    def clear(self, session_id: str) -> None:
+        """Delete a session's messages from memory and disk."""
+        with self._lock:
+            self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            for entry in self._sessions.pop(session_id, ()):
+                self._forget(entry)
+
+    def sessions(self) -> List[str]:
+        """Ids of every session with stored messages."""
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT session_id FROM messages")]
+
+    def message_count(self, session_id: str) -> int:
+        """Number of messages stored on disk for a session."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def locate(self, message: Dict[str, str]) -> Optional[Tuple[str, int]]:
+        """``(session id, row id)`` of a message returned by ``history``, while it is in the hot window."""
+        with self._lock:
+            row = self._rows.get(id(message))
+            return row[1:] if row is not None and row[0] is message else None
+
+    def rows_between(
+        self,
+        session_id: str,
+        after_id: int,
+        through_id: int,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """A session's messages with ``after_id < row id <= through_id``, oldest first.
+
+        With ``limit``, only the most recent ``limit`` of them.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND id > ? AND id <= ?"
+                " ORDER BY id DESC LIMIT ?",
+                (session_id, after_id, through_id, -1 if limit is None else limit)
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    @property
+    def resident_sessions(self) -> int:
+        return len(self._sessions)
+
+    def compact(self) -> int:
+        """Drop rows beyond ``retain_messages`` per session and checkpoint the WAL.
+
+        Returns the number of deleted rows.
+        """
+        deleted = 0
+        with self._lock:
+            if self.retain_messages is not None:
+                deleted = self._db.execute(
+                    "DELETE FROM messages WHERE id IN ("
+                    " SELECT id FROM (SELECT id, ROW_NUMBER() OVER"
+                    " (PARTITION BY session_id ORDER BY id DESC) AS age FROM messages)"
+                    " WHERE age > ?)",
+                    (self.retain_messages,)
+                ).rowcount
+            if self.path != ":memory:":
+                self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return deleted
+
+    def close(self) -> None:
+        """Stop background compaction and close the database."""
+        self._closed.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            self._db.close()
+            self._sessions.clear()
+            self._rows.clear()
+
+    def _window(self, session_id: str) -> Deque[Dict[str, str]]:
+        """Return the session's hot window, loading it and evicting as needed."""
+        window = self._sessions.get(session_id)
+        if window is not None:
+            self._sessions.move_to_end(session_id)
+            return window
+
+        rows = self._db.execute(
+            "SELECT id, role, content FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, self.hot_window)
+        ).fetchall()
+        window: Deque[Dict[str, str]] = deque()
+        for row_id, role, content in reversed(rows):
+            entry = {"role": role, "content": content}
+            window.append(entry)
+            self._rows[id(entry)] = (entry, session_id, row_id)
+        self._sessions[session_id] = window
+        while len(self._sessions) > self.max_sessions:
+            for entry in self._sessions.popitem(last=False)[1]:
+                self._forget(entry)
+        return window
+
+    def _forget(self, entry: Dict[str, str]) -> None:
+        self._rows.pop(id(entry), None)
+
+    def _compact_loop(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            try:
+                self.compact()
+            except sqlite3.Error:
+                pass  # retried on the next interval
@@ -0,0 +1,46 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+@dataclass
+class ChatEvent:
+    """Base class for events emitted while a turn is being handled."""
+
+    @property
+    def type(self) -> str:
+        return type(self).__name__
+
+@dataclass
+class RoutingEvent(ChatEvent):
+    """The turn was routed; ``agent`` is None when no agent is involved."""
+    action: str
+    agent: Optional[str] = None
+    tier: str = "llm"
+
+@dataclass
+class AgentStartEvent(ChatEvent):
+    """A delegated agent started working on an instruction."""
+    agent: str
+    instruction: str
+
+@dataclass
+class ToolEvent(ChatEvent):
+    """An agent ran a tool."""
+    agent: str
+    tool: str
+    result: Any = None
+
+@dataclass
+class AgentResultEvent(ChatEvent):
+    """The agent (or router) produced the result to phrase for the user."""
+    result: str
+    context: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class TokenEvent(ChatEvent):
+    """A chunk of the final response text."""
+    text: str
+
+@dataclass
+class DoneEvent(ChatEvent):
+    """The turn finished; ``response`` is the full response text."""
+    response: str
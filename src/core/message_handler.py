@@ -1,12 +1,30 @@
-from typing import Dict, List, Optional, Tuple, Any
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Any
 from ..agents.agent_config import AgentConfig
-from ..utils.llm_utils import create_chat_completion
+from ..utils.llm_utils import create_chat_completion, get_llm_client
+from ..utils.model_policy import ModelPolicy, get_model_policy
+from ..utils.structured_output import call_with_repair, forced_choice, function_tool, parse_json
+from .router import TieredRouter
+
+if TYPE_CHECKING:
+    from .registry import Registry
 
 class MessageHandler:
     """Handles message processing and routing to appropriate agents."""
     
-    def __init__(self, agents: List[AgentConfig]):
-        self.agents = agents
+    def __init__(
+        self,
+        agents: Optional[List[AgentConfig]] = None,
+        router: Optional[TieredRouter] = None,
+        registry: Optional["Registry"] = None,
+        model_policy: Optional[ModelPolicy] = None
+    ):
+        self.registry = registry
+        self._registry_version = registry.version if registry else None
+        self.agents = registry.lazy_agents() if registry else agents or []
+        self._custom_router = router is not None
+        self.router = router or TieredRouter(self.agents)
+        self.models = model_policy or get_model_policy()
 
     def process_message(
         self, 
@@ -32,39 +50,92 @@ class MessageHandler:
         history: List[Dict[str, str]]
     ) -> Dict[str, Any]:
         """Decide which agent (if any) should handle the message."""
-        
-        agents_info = "\n".join([
-            f"Agent: {agent.name}\nBackground: {agent.background}"
-            for agent in self.agents
-        ])
-        
-        prompt = f"""Given the message and available agents, decide if an agent should handle this request.
-Available agents:
-{agents_info}
+        self._sync_registry()
+        route = self.router.route(message)
+        if route:
+            return {
+                "needs_agent": True,
+                "agent_name": route.agent_name,
+                "reason": f"{route.tier} match ({route.confidence:.2f})"
+            }
+        self.router.record_fallback()
+
+        prompt = f"""{self.decision_prompt}
 
 Message: {message}
 
-Respond in JSON format:
-{{"needs_agent": boolean, "agent_name": string or null, "reason": string}}"""
+Call choose_agent with your decision."""
 
-        response = create_chat_completion([
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": message}
-        ])
-        
-        import json
-        return json.loads(response)
+        def choose(model: str) -> Dict[str, Any]:
+            reply, calls = call_with_repair(
+                get_llm_client(),
+                [
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": message}
+                ],
+                [self.choose_agent_tool],
+                model=model,
+                tool_choice=forced_choice("choose_agent")
+            )
+            if calls and calls[0].ok:
+                return {"agent_name": None, "reason": "", **calls[0].arguments}
+            return parse_json(reply.content or "")
+
+        # A decision without needs_agent, or naming an unknown agent, is retried on the fallback model.
+        return self.models.run(
+            "routing",
+            choose,
+            accept=lambda decision: "needs_agent" in decision and (
+                not decision["needs_agent"] or decision.get("agent_name") in self.agents_by_name
+            )
+        )
+
+    @cached_property
+    def decision_prompt(self) -> str:
+        """Agent listing for the decision prompt, rendered once."""
+        agents_info = "\n".join(agent.routing_fragment.rstrip("\n") for agent in self.agents)
+        return f"""Given the message and available agents, decide if an agent should handle this request.
+Available agents:
+{agents_info}"""
+
+    @cached_property
+    def choose_agent_tool(self) -> Dict[str, Any]:
+        """Function-calling schema for the agent decision, built once."""
+        return function_tool(
+            "choose_agent",
+            "Decide whether an agent should handle the message.",
+            {
+                "needs_agent": {"type": "boolean"},
+                "agent_name": {"type": ["string", "null"], "enum": [a.name for a in self.agents] + [None]},
+                "reason": {"type": "string"}
+            },
+            ["needs_agent"]
+        )
+
+    @cached_property
+    def agents_by_name(self) -> Dict[str, AgentConfig]:
+        """Agents indexed by name, built once."""
+        return {agent.name: agent for agent in self.agents}
 
     def _get_agent(self, agent_name: str) -> Optional[AgentConfig]:
         """Get an agent by name."""
-        return next(
-            (agent for agent in self.agents if agent.name == agent_name), 
-            None
-        )
+        return self.agents_by_name.get(agent_name)
+
+    def _sync_registry(self) -> None:
+        """Switch to the registry's agents if it was reloaded since the last message."""
+        if self.registry is None or self.registry.version == self._registry_version:
+            return
+        self._registry_version = self.registry.version
+        self.agents = self.registry.lazy_agents()
+        for name in ("decision_prompt", "choose_agent_tool", "agents_by_name"):
+            self.__dict__.pop(name, None)
+        if not self._custom_router:
+            self.router = TieredRouter(self.agents)
 
     def _create_default_response(self, message: str) -> str:
         """Create a default response when no agent is needed."""
-        return create_chat_completion([
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": message}
-        ]) 
\ No newline at end of file
+        with self.models.stage("synthesis") as model:
+            return create_chat_completion([
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": message}
+            ], model=model) 
\ No newline at end of file
@@ -0,0 +1,365 @@
+import importlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+# A factory is a callable or an import path such as "main:create_weather_tool",
+# resolved when the tool or agent is first built.
+Factory = Union[Callable[..., Any], str]
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+@dataclass(frozen=True, slots=True)
+class ToolSpec:
+    """How to build a tool, plus what routing needs to know before it exists."""
+    name: str
+    description: str
+    factory: Factory
+    options: Mapping[str, Any] = field(default_factory=lambda: _EMPTY)  # keyword arguments for the factory
+    prompt_fragment: str = ""  # rendered once, joined into agent system prompts
+
+    def __post_init__(self):
+        if not self.prompt_fragment:
+            object.__setattr__(self, "prompt_fragment", f"Tool: {self.name}\nDescription: {self.description}\n")
+
+@dataclass(frozen=True, slots=True)
+class AgentSpec:
+    """How to build an agent from its tools, plus its routing metadata."""
+    name: str
+    background: str
+    expected_output: str
+    keywords: Tuple[str, ...] = ()
+    tools: Tuple[str, ...] = ()
+    factory: Optional[Factory] = None  # called with the built tools; default: a plain AgentConfig
+    options: Mapping[str, Any] = field(default_factory=lambda: _EMPTY)  # extra keyword arguments for the factory
+    custom_handler: bool = False  # the built agent overrides can_handle, so routing must build it
+    routing_fragment: str = ""  # rendered once, joined into routing prompts
+
+    def __post_init__(self):
+        if not self.routing_fragment:
+            object.__setattr__(self, "routing_fragment", f"Agent: {self.name}\nBackground: {self.background}\n")
+
+class LazyTool:
+    """Stand-in for a registered tool; the tool is built on first real use.
+
+    ``name``, ``description`` and ``prompt_fragment`` are answered from the
+    spec, so routers can describe the tool without building it.
+    """
+    __slots__ = ("_registry", "name", "description", "prompt_fragment")
+
+    def __init__(self, registry: "Registry", spec: ToolSpec):
+        self._registry = registry
+        self.name = spec.name
+        self.description = spec.description
+        self.prompt_fragment = spec.prompt_fragment
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._registry.tool(self.name), attribute)
+
+class LazyAgent:
+    """Stand-in for a registered agent; the agent is built on first real use.
+
+    Routing metadata (name, background, keywords, tool names and
+    descriptions) comes from the spec; anything else, such as
+    ``run_agent``, builds the agent and its tools once and delegates.
+    """
+    __slots__ = (
+        "_registry", "name", "background", "expected_output", "keywords", "tools", "routing_fragment",
+        "custom_handler"
+    )
+
+    def __init__(self, registry: "Registry", spec: AgentSpec):
+        self._registry = registry
+        self.name = spec.name
+        self.background = spec.background
+        self.expected_output = spec.expected_output
+        self.keywords = list(spec.keywords)
+        self.tools = [LazyTool(registry, registry.tool_spec(name)) for name in spec.tools]
+        self.routing_fragment = spec.routing_fragment
+        self.custom_handler = spec.custom_handler
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._registry.agent(self.name), attribute)
+
+class Registry:
+    """Agents and tools indexed by name, each built at most once, on first use.
+
+    Specs are registered in code or loaded from a JSON/YAML file (see
+    ``load``). Registering is cheap: factories given as import paths are
+    only imported when called, so a process only pays for the agents and
+    tools it actually runs.
+
+    Factory options whose value is a string starting with ``$`` name one of
+    the ``resources`` given to the registry (e.g. ``"$transcript_store"``),
+    so files can refer to objects created at startup.
+
+    ``version`` increases whenever the specs change. ``reload`` re-reads the
+    file when it was modified and rebuilds only the agents and tools whose
+    spec changed; ``watch`` does so periodically.
+    """
+
+    def __init__(self, path: Optional[str] = None, resources: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.resources = dict(resources or {})
+        self.version = 0
+        self._tool_specs: Dict[str, ToolSpec] = {}
+        self._agent_specs: Dict[str, AgentSpec] = {}
+        self._tools: Dict[str, Any] = {}
+        self._agents: Dict[str, Any] = {}
+        self._lazy_agents: Optional[Tuple[int, List[LazyAgent]]] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.RLock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def load(cls, path: str, resources: Optional[Dict[str, Any]] = None) -> "Registry":
+        """Create a registry from a JSON or YAML file.
+
+        The file holds ``tools`` and ``agents`` lists. A tool has a ``name``,
+        ``description`` and either a ``factory`` import path or an inline
+        ``function`` with ``parameters``, ``expected_response_format`` and
+        optional runtime settings (``kind``, ``timeout``, ...). An agent has a
+        ``name``, ``background``, ``expected_output``, ``keywords``, tool
+        names and optionally a ``factory``, ``options`` and ``custom_handler``
+        (true when the built agent overrides ``can_handle``).
+        """
+        registry = cls(path, resources)
+        registry.reload(force=True)
+        return registry
+
+    def register_tool(
+        self,
+        name: str,
+        description: str,
+        factory: Factory,
+        options: Optional[Mapping[str, Any]] = None
+    ) -> None:
+        with self._lock:
+            self._set_specs({**self._tool_specs, name: ToolSpec(name, description, factory, _frozen(options))},
+                            self._agent_specs)
+
+    def register_agent(
+        self,
+        name: str,
+        background: str,
+        expected_output: str,
+        keywords: Optional[List[str]] = None,
+        tools: Optional[List[str]] = None,
+        factory: Optional[Factory] = None,
+        options: Optional[Mapping[str, Any]] = None,
+        custom_handler: bool = False
+    ) -> None:
+        with self._lock:
+            spec = AgentSpec(
+                name, background, expected_output, tuple(keywords or ()), tuple(tools or ()),
+                factory, _frozen(options), custom_handler
+            )
+            self._set_specs(self._tool_specs, {**self._agent_specs, name: spec})
+
+    def tool_spec(self, name: str) -> ToolSpec:
+        try:
+            return self._tool_specs[name]
+        except KeyError:
+            raise KeyError(f"Unknown tool: {name}") from None
+
+    def agent_spec(self, name: str) -> AgentSpec:
+        try:
+            return self._agent_specs[name]
+        except KeyError:
+            raise KeyError(f"Unknown agent: {name}") from None
+
+    def tool(self, name: str) -> Any:
+        """The built tool, constructing it on first use."""
+        tool = self._tools.get(name)
+        if tool is None:
+            with self._lock:
+                tool = self._tools.get(name)
+                if tool is None:
+                    spec = self.tool_spec(name)
+                    tool = self._tools[name] = _resolve(spec.factory)(**self._bind(spec.options))
+        return tool
+
+    def agent(self, name: str) -> Any:
+        """The built agent, constructing it and its tools on first use."""
+        agent = self._agents.get(name)
+        if agent is None:
+            with self._lock:
+                agent = self._agents.get(name)
+                if agent is None:
+                    spec = self.agent_spec(name)
+                    tools = [self.tool(tool_name) for tool_name in spec.tools]
+                    factory = _resolve(spec.factory) if spec.factory else _default_agent(spec)
+                    agent = self._agents[name] = factory(tools, **self._bind(spec.options))
+        return agent
+
+    def lazy_agents(self) -> List[LazyAgent]:
+        """Stand-ins for every registered agent, in registration order."""
+        cached = self._lazy_agents
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        with self._lock:
+            agents = [LazyAgent(self, spec) for spec in self._agent_specs.values()]
+            self._lazy_agents = (self.version, agents)
+            return agents
+
+    def agents(self) -> List[Any]:
+        """Every registered agent, built now."""
+        return [self.agent(name) for name in self._agent_specs]
+
+    def tools(self) -> List[Any]:
+        """Every registered tool, built now."""
+        return [self.tool(name) for name in self._tool_specs]
+
+    def built(self) -> List[str]:
+        """Names of the agents and tools constructed so far."""
+        return list(self._agents) + list(self._tools)
+
+    def reload(self, force: bool = False) -> bool:
+        """Re-read ``path`` if it changed since the last load; return whether it did."""
+        if not self.path:
+            return False
+        mtime = os.stat(self.path).st_mtime
+        if not force and mtime == self._mtime:
+            return False
+        tool_specs, agent_specs = _parse_config(_read_config(self.path))
+        with self._lock:
+            changed = self._set_specs(tool_specs, agent_specs)
+            self._mtime = mtime
+        return changed
+
+    def watch(self, interval: float = 5.0) -> None:
+        """Call ``reload`` every ``interval`` seconds on a background thread."""
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception:
+                    pass  # keep serving the last valid config; retried next interval
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=loop, name="registry-reload", daemon=True)
+        self._watcher.start()
+
+    def close(self) -> None:
+        """Stop watching the registry file."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _bind(self, options: Mapping[str, Any]) -> Dict[str, Any]:
+        """Factory keyword arguments with ``$resource`` references replaced."""
+        bound = {}
+        for key, value in options.items():
+            if isinstance(value, str) and value.startswith("$"):
+                try:
+                    value = self.resources[value[1:]]
+                except KeyError:
+                    raise KeyError(f"Unknown registry resource: {value[1:]}") from None
+            bound[key] = value
+        return bound
+
+    def _set_specs(self, tool_specs: Dict[str, ToolSpec], agent_specs: Dict[str, AgentSpec]) -> bool:
+        """Swap in new specs, dropping built instances whose spec changed."""
+        for name, spec in agent_specs.items():
+            missing = [tool for tool in spec.tools if tool not in tool_specs]
+            if missing:
+                raise ValueError(f"Agent {name} uses unknown tools: {', '.join(missing)}")
+        if tool_specs == self._tool_specs and agent_specs == self._agent_specs:
+            return False
+
+        changed_tools = {
+            name for name in set(tool_specs) | set(self._tool_specs)
+            if tool_specs.get(name) != self._tool_specs.get(name)
+        }
+        for name in changed_tools:
+            self._tools.pop(name, None)
+        for name in set(agent_specs) | set(self._agent_specs):
+            spec = agent_specs.get(name)
+            if spec != self._agent_specs.get(name) or (spec and changed_tools.intersection(spec.tools)):
+                self._agents.pop(name, None)
+        self._tool_specs, self._agent_specs = dict(tool_specs), dict(agent_specs)
+        self.version += 1
+        return True
+
+def _frozen(options: Optional[Mapping[str, Any]]) -> Mapping[str, Any]:
+    return MappingProxyType(dict(options)) if options else _EMPTY
+
+def _resolve(factory: Factory) -> Callable[..., Any]:
+    """Import a ``"module:attribute"`` path; callables are returned unchanged."""
+    if callable(factory):
+        return factory
+    module_name, _, attribute = factory.partition(":")
+    if not attribute:
+        raise ValueError(f"Factory path must look like 'module:attribute', got {factory!r}")
+    target: Any = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        target = getattr(target, part)
+    return target
+
+def _default_agent(spec: AgentSpec) -> Callable[..., Any]:
+    def build(tools: List[Any], **options: Any) -> Any:
+        from ..agents.agent_config import AgentConfig
+        return AgentConfig(
+            name=spec.name,
+            background=spec.background,
+            tools=tools,
+            expected_output=spec.expected_output,
+            keywords=list(spec.keywords),
+            **options
+        )
+    return build
+
+def _inline_tool(**config: Any) -> Any:
+    """Build a ``ToolConfig`` from an inline tool definition in a registry file."""
+    from ..tools.tool_config import Parameter, ToolConfig
+    parameters = [
+        Parameter(p["name"], p.get("description", ""), bool(p.get("required", False)), p.get("type", "string"))
+        for p in config.pop("parameters", [])
+    ]
+    return ToolConfig(
+        parameters=parameters,
+        callable_function=_resolve(config.pop("function")),
+        **config
+    )
+
+def _read_config(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required to load YAML registry files") from None
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+def _parse_config(config: Dict[str, Any]) -> Tuple[Dict[str, ToolSpec], Dict[str, AgentSpec]]:
+    tool_specs: Dict[str, ToolSpec] = {}
+    for entry in config.get("tools") or []:
+        entry = dict(entry)
+        name, description = entry["name"], entry["description"]
+        if "factory" in entry:
+            spec = ToolSpec(name, description, entry["factory"], _frozen(entry.get("options")))
+        else:
+            # Inline definitions are built by _inline_tool from the remaining keys.
+            entry.setdefault("expected_response_format", "")
+            spec = ToolSpec(name, description, _inline_tool, _frozen(entry))
+        tool_specs[name] = spec
+
+    agent_specs: Dict[str, AgentSpec] = {}
+    for entry in config.get("agents") or []:
+        agent_specs[entry["name"]] = AgentSpec(
+            entry["name"],
+            entry.get("background", ""),
+            entry.get("expected_output", ""),
+            tuple(entry.get("keywords") or ()),
+            tuple(entry.get("tools") or ()),
+            entry.get("factory"),
+            _frozen(entry.get("options")),
+            bool(entry.get("custom_handler", False))
+        )
+    return tool_specs, agent_specs
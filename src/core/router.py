@@ -0,0 +1,159 @@
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..agents.agent_config import AgentConfig
+from ..utils.embeddings import BaseEmbedder, HashingEmbedder
+
+# Tool-name fragments that say nothing about intent (e.g. "get_meeting_notes").
+_NAME_STOPWORDS = {"get", "set", "fetch", "run", "tool", "info", "do"}
+
+@dataclass
+class RouteDecision:
+    """An agent chosen locally, without an LLM routing call."""
+    agent_name: str
+    tier: str
+    confidence: float
+
+class TieredRouter:
+    """Picks an agent locally when the intent is obvious.
+
+    Tiers are tried in order:
+
+    1. ``keyword``: one compiled regex over every agent's keywords and tool
+       names, plus any custom ``can_handle`` override. Confidence must
+       exceed ``keyword_threshold``, so by default it takes two distinct hits.
+    2. ``embedding``: cosine similarity between the message and precomputed
+       agent-description embeddings.
+
+    ``route`` returns None when neither tier is confident enough, in which
+    case the caller falls back to the LLM and reports it via
+    ``record_fallback``. ``stats`` counts how many turns each tier resolved.
+    """
+
+    def __init__(
+        self,
+        agents: List[AgentConfig],
+        embedder: Optional[BaseEmbedder] = None,
+        keyword_threshold: float = 0.5,
+        embedding_threshold: float = 0.35,
+        embedding_margin: float = 0.05
+    ):
+        self.agents = agents
+        self.embedder = embedder or HashingEmbedder()
+        self.keyword_threshold = keyword_threshold
+        self.embedding_threshold = embedding_threshold
+        self.embedding_margin = embedding_margin
+        self.stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
+
+        self._keyword_owner: Dict[str, List[str]] = {}
+        for agent in agents:
+            for keyword in self._agent_keywords(agent):
+                owners = self._keyword_owner.setdefault(keyword, [])
+                if agent.name not in owners:
+                    owners.append(agent.name)
+        alternatives = "|".join(
+            re.escape(k) for k in sorted(self._keyword_owner, key=len, reverse=True)
+        )
+        self._keyword_re = (
+            re.compile(rf"\b({alternatives})(?:s|es)?\b", re.IGNORECASE) if alternatives else None
+        )
+        self._custom_handlers = [agent for agent in agents if self._has_custom_handler(agent)]
+
+        self._agent_matrix = self.embedder.embed([self._describe(a) for a in agents])
+
+    @staticmethod
+    def _has_custom_handler(agent: AgentConfig) -> bool:
+        """Whether the agent overrides ``can_handle``; lazy agents say so in their spec."""
+        handler = getattr(type(agent), "can_handle", None)
+        if handler is None:
+            return bool(getattr(agent, "custom_handler", False))
+        return handler is not AgentConfig.can_handle
+
+    def route(self, message: str) -> Optional[RouteDecision]:
+        """Return a local routing decision, or None to defer to the LLM."""
+        decision = self._route_keywords(message) or self._route_embeddings(message)
+        if decision:
+            with self._stats_lock:
+                self.stats[decision.tier] += 1
+        return decision
+
+    def likely(self, message: str) -> Optional[RouteDecision]:
+        """The best-scoring agent even when no tier is confident enough.
+
+        Used to start that agent speculatively while the LLM routes.
+        """
+        ranked = self._score_embeddings(message)
+        candidates = [self._score_keywords(message), ranked[0] if ranked else None]
+        return max((c for c in candidates if c), key=lambda c: c.confidence, default=None)
+
+    def record_fallback(self) -> None:
+        """Count a turn that had to be routed by the LLM."""
+        with self._stats_lock:
+            self.stats["llm"] += 1
+
+    def _route_keywords(self, message: str) -> Optional[RouteDecision]:
+        decision = self._score_keywords(message)
+        # Strictly above: one incidental keyword (confidence 0.5) is not enough on its own.
+        return decision if decision and decision.confidence > self.keyword_threshold else None
+
+    def _score_keywords(self, message: str) -> Optional[RouteDecision]:
+        hits: Counter = Counter()
+        if self._keyword_re is not None:
+            for keyword in {m.group(1).lower() for m in self._keyword_re.finditer(message)}:
+                for owner in self._keyword_owner[keyword]:
+                    hits[owner] += 1
+        for agent in self._custom_handlers:
+            if agent.can_handle(message):
+                hits[agent.name] += 1
+        if not hits:
+            return None
+
+        ranked = hits.most_common(2)
+        best_name, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        # Saturates with more distinct hits and shrinks when agents compete.
+        confidence = (1 - 0.5 ** best) * (best - runner_up) / best
+        return RouteDecision(best_name, "keyword", confidence)
+
+    def _route_embeddings(self, message: str) -> Optional[RouteDecision]:
+        ranked = self._score_embeddings(message)
+        if ranked is None:
+            return None
+        decision, margin = ranked
+        if decision.confidence < self.embedding_threshold or margin < self.embedding_margin:
+            return None
+        return decision
+
+    def _score_embeddings(self, message: str) -> Optional[Tuple[RouteDecision, float]]:
+        """The most similar agent and its lead over the runner-up."""
+        if not self.agents:
+            return None
+        scores = self._agent_matrix @ self.embedder.embed_one(message)
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        runner_up = float(scores[order[1]]) if len(order) > 1 else 0.0
+        return RouteDecision(self.agents[order[0]].name, "embedding", best), best - runner_up
+
+    @staticmethod
+    def _agent_keywords(agent: AgentConfig) -> List[str]:
+        keywords = [k.lower() for k in agent.keywords]
+        for tool in agent.tools:
+            keywords.extend(
+                part for part in re.split(r"[\W_]+", tool.name.lower())
+                if part and part not in _NAME_STOPWORDS
+            )
+        return keywords
+
+    @staticmethod
+    def _describe(agent: AgentConfig) -> str:
+        tool_text = " ".join(f"{tool.name} {tool.description}" for tool in agent.tools)
+        return " ".join([
+            agent.name, agent.background, agent.expected_output,
+            " ".join(agent.keywords), tool_text
+        ])
@@ -0,0 +1,18 @@
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+_EXPORTS = {
+    "BaseTranscriptStore": ".transcript_store", "BM25TranscriptStore": ".transcript_store",
+    "SearchHit": ".transcript_store",
+    "Chunk": ".vector_index", "ChunkHit": ".vector_index", "IVFPQIndex": ".vector_index",
+    "RetrievalEngine": ".vector_index", "VectorStore": ".vector_index", "chunk_text": ".vector_index",
+    "IngestPipeline": ".ingest", "IngestReport": ".ingest", "iter_directory": ".ingest", "iter_jsonl": ".ingest",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .transcript_store import BaseTranscriptStore, BM25TranscriptStore, SearchHit
+    from .vector_index import Chunk, ChunkHit, IVFPQIndex, RetrievalEngine, VectorStore, chunk_text
+    from .ingest import IngestPipeline, IngestReport, iter_directory, iter_jsonl
@@ -0,0 +1,346 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .transcript_store import BaseTranscriptStore
+from .vector_index import chunk_text
+
+# File types read from directory sources.
+TRANSCRIPT_EXTENSIONS = (".txt", ".md", ".json", ".vtt", ".srt")
+
+_CUE_TIMING_RE = re.compile(r"^\s*(\d{1,2}:)?\d{1,2}:\d{2}[.,]\d{3}\s*-->")
+_CUE_NUMBER_RE = re.compile(r"^\s*\d+\s*$")
+_SPACES_RE = re.compile(r"[ \t]+")
+
+@dataclass
+class SourceItem:
+    """A transcript to ingest: a file to parse, or text already extracted."""
+    meeting_id: str
+    source: str
+    path: Optional[str] = None
+    text: Optional[str] = None
+    mtime: float = 0.0
+    size: int = 0
+    error: Optional[str] = None  # set when the source could not be read
+
+@dataclass
+class Document:
+    """A parsed, normalized and chunked transcript ready to index."""
+    meeting_id: str
+    source: str
+    content: str
+    content_hash: str
+    chunks: List[str]
+    mtime: float = 0.0
+    size: int = 0
+    error: Optional[str] = None
+
+@dataclass
+class IngestReport:
+    """Counts from one ingestion run."""
+    seen: int = 0
+    unchanged: int = 0  # skipped by file stat or content hash
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    failed: int = 0
+    duration: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> int:
+        return self.added + self.updated + self.removed
+
+def iter_directory(root: str, extensions: Sequence[str] = TRANSCRIPT_EXTENSIONS) -> Iterator[SourceItem]:
+    """Yield the transcript files under ``root``.
+
+    The meeting id is the path relative to ``root`` without its extension.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(tuple(extensions)):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # removed while scanning
+            meeting_id = os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, "/")
+            yield SourceItem(meeting_id, path, path=path, mtime=stat.st_mtime, size=stat.st_size)
+
+def iter_jsonl(path: str) -> Iterator[SourceItem]:
+    """Yield transcripts from a JSONL file of ``{"id", "content"}`` records.
+
+    ``transcript`` or ``segments`` (see ``parse_transcript``) may be given
+    instead of ``content``.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            meeting_id = str(record.get("id") or f"{os.path.basename(path)}:{line_number}")
+            try:
+                yield SourceItem(meeting_id, f"{path}:{line_number}", text=_record_text(record))
+            except ValueError as e:
+                yield SourceItem(meeting_id, f"{path}:{line_number}", error=str(e))
+
+def parse_transcript(path: str) -> str:
+    """Extract the transcript text of a file.
+
+    JSON files hold ``content``/``transcript`` text or a list of
+    ``segments`` with ``speaker`` and ``text``; WebVTT and SRT captions are
+    stripped of cue numbers and timings; anything else is read as text.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        raw = f.read()
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        return _record_text(json.loads(raw))
+    if extension in (".vtt", ".srt"):
+        lines = []
+        for line in raw.splitlines():
+            if line.strip() == "WEBVTT" or _CUE_NUMBER_RE.match(line) or _CUE_TIMING_RE.match(line):
+                continue
+            lines.append(line)
+        return "\n".join(lines)
+    return raw
+
+def normalize_transcript(text: str) -> str:
+    """NFKC-normalize, collapse runs of spaces and drop blank lines."""
+    text = unicodedata.normalize("NFKC", text)
+    lines = (_SPACES_RE.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def prepare_document(item: SourceItem, chunk_words: int = 120, chunk_overlap: int = 30) -> Document:
+    """Parse, normalize, hash and chunk one item; runs in a worker process."""
+    try:
+        if item.error:
+            raise ValueError(item.error)
+        text = item.text if item.text is not None else parse_transcript(item.path)
+        content = normalize_transcript(text)
+        return Document(
+            item.meeting_id, item.source, content, content_hash(content),
+            chunk_text(content, chunk_words, chunk_overlap), item.mtime, item.size
+        )
+    except Exception as e:
+        return Document(item.meeting_id, item.source, "", "", [], item.mtime, item.size,
+                        error=f"{type(e).__name__}: {e}")
+
+def _prepare_batch(items: List[SourceItem], chunk_words: int, chunk_overlap: int) -> List[Document]:
+    return [prepare_document(item, chunk_words, chunk_overlap) for item in items]
+
+def _record_text(record: Any) -> str:
+    if isinstance(record, dict):
+        segments = record.get("segments")
+        if isinstance(segments, list):
+            return "\n".join(
+                f"{segment.get('speaker')}: {segment.get('text', '')}" if segment.get("speaker")
+                else str(segment.get("text", ""))
+                for segment in segments if isinstance(segment, dict)
+            )
+        text = record.get("content", record.get("transcript"))
+        if isinstance(text, str):
+            return text
+    raise ValueError("Record has no content, transcript or segments")
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class IngestPipeline:
+    """Streams transcripts from sources into a transcript store.
+
+    Items flow through generators: source → skip unchanged → parse,
+    normalize and chunk on a process pool → bulk add to the store, one
+    ``batch_size`` batch at a time, so memory does not grow with the input.
+
+    A manifest maps each meeting id to its content hash and file stat. Files
+    whose size and mtime are unchanged are skipped without being read, and
+    documents whose hash is unchanged are not re-indexed. After each run
+    that changed something, a store with a ``path`` is saved (unless
+    ``save_store`` is off) before the manifest is written to
+    ``manifest_path``, so the manifest never gets ahead of the store.
+    Entries for meetings the store no longer holds (e.g. an in-memory store
+    after a restart) are ignored, so the two cannot drift apart.
+
+    Stores are updated in place, so tools searching the same store see new
+    transcripts immediately; ``watch`` re-ingests a directory periodically.
+    """
+
+    def __init__(
+        self,
+        store: BaseTranscriptStore,
+        manifest_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_size: int = 256,
+        chunk_words: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        save_store: bool = True
+    ):
+        self.store = store
+        self.manifest_path = manifest_path
+        self.save_store = save_store
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_size = batch_size
+        self.chunk_words = chunk_words or getattr(store, "chunk_words", 120)
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else getattr(store, "chunk_overlap", 30)
+        self.manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def ingest_directory(self, root: str, prune: bool = False) -> IngestReport:
+        """Ingest the transcript files under ``root``.
+
+        With ``prune``, meetings previously ingested from ``root`` whose file
+        is gone are removed from the store.
+        """
+        prefix = os.path.join(root, "")
+        return self.run(iter_directory(root), prune_prefix=prefix if prune else None)
+
+    def ingest_jsonl(self, path: str) -> IngestReport:
+        """Ingest the records of a JSONL file."""
+        return self.run(iter_jsonl(path))
+
+    def run(self, items: Iterable[SourceItem], prune_prefix: Optional[str] = None) -> IngestReport:
+        """Ingest ``items``; with ``prune_prefix``, remove unseen meetings from those sources."""
+        with self._lock:
+            report = IngestReport()
+            started = time.perf_counter()
+            seen = set()
+
+            def unchanged_by_stat(item: SourceItem) -> bool:
+                report.seen += 1
+                seen.add(item.meeting_id)
+                entry = self.manifest.get(item.meeting_id)
+                if (
+                    item.path and entry and entry["source"] == item.source
+                    and entry["mtime"] == item.mtime and entry["size"] == item.size
+                    and item.meeting_id in self.store
+                ):
+                    report.unchanged += 1
+                    return True
+                return False
+
+            candidates = (item for item in items if not unchanged_by_stat(item))
+            for batch in _batched(candidates, self.batch_size):
+                self._commit(self._prepare(batch), report)
+
+            if prune_prefix:
+                for meeting_id, entry in list(self.manifest.items()):
+                    if entry["source"].startswith(prune_prefix) and meeting_id not in seen:
+                        self.store.remove(meeting_id)
+                        del self.manifest[meeting_id]
+                        report.removed += 1
+
+            if report.changed:
+                # Store first: a manifest ahead of the store would skip files it lost.
+                if self.save_store and getattr(self.store, "path", None):
+                    self.store.save()
+                self._save_manifest()
+            report.duration = time.perf_counter() - started
+            return report
+
+    def watch(self, root: str, interval: float = 60.0, prune: bool = True) -> None:
+        """Re-ingest ``root`` every ``interval`` seconds on a background thread."""
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.ingest_directory(root, prune=prune)
+                except Exception:
+                    pass  # retried on the next interval
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=loop, name="transcript-ingest", daemon=True)
+        self._watcher.start()
+
+    def close(self) -> None:
+        """Stop watching and shut down the worker pool."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _prepare(self, batch: List[SourceItem]) -> List[Document]:
+        if self.workers <= 1 or len(batch) < 2:
+            return _prepare_batch(batch, self.chunk_words, self.chunk_overlap)
+        if self._pool is None:
+            # spawn: forking a process that runs threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        # One task per worker keeps pickling overhead per batch, not per file.
+        size = -(-len(batch) // self.workers)
+        parts = self._pool.map(
+            _prepare_batch, _batched(batch, size),
+            [self.chunk_words] * self.workers, [self.chunk_overlap] * self.workers
+        )
+        return [document for part in parts for document in part]
+
+    def _commit(self, documents: List[Document], report: IngestReport) -> None:
+        changed = []
+        for document in documents:
+            if document.error:
+                report.failed += 1
+                report.errors[document.meeting_id] = document.error
+                continue
+            entry = self.manifest.get(document.meeting_id)
+            exists = document.meeting_id in self.store
+            if entry and exists and entry["hash"] == document.content_hash:
+                report.unchanged += 1
+            else:
+                changed.append(document)
+                report.updated += exists
+                report.added += not exists
+            self.manifest[document.meeting_id] = {
+                "hash": document.content_hash,
+                "source": document.source,
+                "mtime": document.mtime,
+                "size": document.size
+            }
+
+        if not changed:
+            return
+        add_chunked = getattr(self.store, "add_chunked", None)
+        if add_chunked is not None:
+            add_chunked((d.meeting_id, d.content, d.chunks) for d in changed)
+        else:
+            self.store.add_many((d.meeting_id, d.content) for d in changed)
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self) -> None:
+        if not self.manifest_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.manifest_path)
@@ -0,0 +1,402 @@
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the
+this to was were what when where which who will with about did do does we our
+you your i me my they them their there
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with common stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+@dataclass
+class SearchHit:
+    """A transcript matched by a store query."""
+    meeting_id: str
+    score: float
+    relevance: float  # score normalized to [0, 1] against the query's best case
+
+class BaseTranscriptStore(ABC):
+    """Abstract base class for meeting transcript stores."""
+
+    @abstractmethod
+    def add(self, meeting_id: str, content: str) -> None:
+        """Add or replace a transcript."""
+        pass
+
+    @abstractmethod
+    def remove(self, meeting_id: str) -> bool:
+        """Remove a transcript, returning whether it existed."""
+        pass
+
+    @abstractmethod
+    def get(self, meeting_id: str) -> Optional[str]:
+        """Return a transcript's content, or None if unknown."""
+        pass
+
+    @abstractmethod
+    def search(self, query: str, top_k: int = 5, min_relevance: float = 0.0) -> List[SearchHit]:
+        """Return the best matching transcripts, best first."""
+        pass
+
+    @abstractmethod
+    def ids(self) -> List[str]:
+        """Return the ids of all stored transcripts."""
+        pass
+
+    @property
+    def version(self) -> Optional[int]:
+        """Counter bumped by every change to the transcripts, or None if not tracked."""
+        return None
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """Add several (meeting_id, content) pairs, returning how many were added."""
+        count = 0
+        for meeting_id, content in items:
+            self.add(meeting_id, content)
+            count += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self.ids())
+
+    def __contains__(self, meeting_id: str) -> bool:
+        return self.get(meeting_id) is not None
+
+class BM25TranscriptStore(BaseTranscriptStore):
+    """Transcript store with an inverted index and BM25 ranking.
+
+    The index is split into a read-only base segment, memory-mapped from
+    ``path`` when it exists, and an in-memory delta segment holding
+    transcripts added since. Removals are tombstones until the base is
+    rebuilt.
+
+    ``save`` writes only the transcripts changed since the last save, as a
+    delta file that is replayed on load. Once the delta files would hold
+    more than ``max_delta_docs`` transcripts, it merges both segments into a
+    new compacted base instead, so a cold start mostly maps files rather
+    than re-tokenizing every transcript. Every save ends by replacing
+    ``meta.json``, which names the base and delta files in use, so a crash
+    mid-save leaves the previous save intact.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+        max_delta_docs: int = 1000
+    ):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.max_delta_docs = max_delta_docs
+        self._lock = threading.RLock()
+        self._version = 0
+        self._generation = 0  # saves so far; names the files each save writes
+        self._files: Dict[str, Any] = {"base": None, "deltas": [], "delta_docs": 0}
+        self._dirty: Set[str] = set()  # meeting ids changed since the last save
+        self._reset()
+        if path and os.path.exists(os.path.join(path, "meta.json")):
+            self._load(path)
+
+    def add(self, meeting_id: str, content: str) -> None:
+        tokens = tokenize(f"{meeting_id.replace('_', ' ')} {content}")
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        with self._lock:
+            self._remove_locked(meeting_id)
+            doc = len(self._doc_ids)
+            self._doc_ids.append(meeting_id)
+            self._doc_index[meeting_id] = doc
+            self._new_contents[doc] = content
+            self._append_doc_len(len(tokens))
+            for term, tf in counts.items():
+                docs, tfs = self._delta.setdefault(term, ([], []))
+                docs.append(doc)
+                tfs.append(tf)
+            self._dirty.add(meeting_id)
+            self._version += 1
+
+    def remove(self, meeting_id: str) -> bool:
+        with self._lock:
+            return self._remove_locked(meeting_id)
+
+    def get(self, meeting_id: str) -> Optional[str]:
+        with self._lock:
+            doc = self._doc_index.get(meeting_id)
+            if doc is None:
+                return None
+            if doc in self._new_contents:
+                return self._new_contents[doc]
+            start, end = self._base_offsets[doc], self._base_offsets[doc + 1]
+            return self._base_contents[start:end].decode("utf-8")
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._doc_index)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._doc_index)
+
+    def __contains__(self, meeting_id: str) -> bool:
+        return meeting_id in self._doc_index
+
+    def search(self, query: str, top_k: int = 5, min_relevance: float = 0.0) -> List[SearchHit]:
+        terms = set(tokenize(query))
+        with self._lock:
+            n_live = len(self._doc_index)
+            if not terms or not n_live:
+                return []
+            n_docs = len(self._doc_ids)
+            doc_len = self._doc_len[:n_docs]
+            live = self._live[:n_docs]
+            avg_len = float(doc_len[live].mean()) or 1.0
+
+            scores = np.zeros(n_docs, dtype=np.float32)
+            best_case = 0.0
+            for term in terms:
+                docs, tfs = self._postings(term)
+                keep = live[docs]
+                docs, tfs = docs[keep], tfs[keep]
+                if not len(docs):
+                    continue
+                df = len(docs)
+                idf = math.log(1 + (n_live - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * doc_len[docs] / avg_len)
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+                best_case += idf * (self.k1 + 1)
+
+            candidates = np.flatnonzero(scores)
+            if not len(candidates):
+                return []
+            if len(candidates) > top_k:
+                top = np.argpartition(scores[candidates], -top_k)[-top_k:]
+                candidates = candidates[top]
+            candidates = candidates[np.argsort(scores[candidates])[::-1]]
+
+            hits = []
+            for doc in candidates:
+                score = float(scores[doc])
+                relevance = min(1.0, score / best_case)
+                if relevance >= min_relevance:
+                    hits.append(SearchHit(self._doc_ids[doc], score, relevance))
+            return hits
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the changes since the last save to ``path``, compacting when due."""
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given to save the transcript store to")
+        os.makedirs(path, exist_ok=True)
+
+        with self._lock:
+            # A new path, or an old single-segment layout, needs a full base.
+            moved = (
+                path != self.path or self._files["base"] == ""
+                or not os.path.exists(os.path.join(path, "meta.json"))
+            )
+            if not self._dirty and not moved:
+                return
+            generation = self._generation + 1
+            delta_docs = self._files["delta_docs"] + len(self._dirty)
+            if moved or delta_docs > self.max_delta_docs:
+                files = {"base": self._write_base(path, f"base-{generation}"), "deltas": [], "delta_docs": 0}
+            else:
+                delta = self._write_delta(path, f"delta-{generation}.jsonl")
+                files = {**self._files, "deltas": [*self._files["deltas"], delta], "delta_docs": delta_docs}
+
+            # The switch-over: until this replace, loads see the previous save.
+            _atomic_write(path, "meta.json", json.dumps({
+                "k1": self.k1, "b": self.b, "generation": generation, **files
+            }).encode("utf-8"))
+            self.path = path
+            self._generation, self._files = generation, files
+            self._dirty.clear()
+            if not files["deltas"]:
+                self._load(path)
+            _remove_unused(path, files)
+
+    def _write_base(self, path: str, name: str) -> str:
+        """Write the live transcripts of both segments as a compacted base in ``path/name``."""
+        directory = os.path.join(path, name)
+        os.makedirs(directory, exist_ok=True)
+        live_docs = list(self._doc_index.values())
+        remap = np.full(len(self._doc_ids), -1, dtype=np.int64)
+        remap[live_docs] = np.arange(len(live_docs))
+
+        vocab: Dict[str, List[int]] = {}
+        doc_parts, tf_parts = [], []
+        offset = 0
+        for term in sorted(set(self._vocab) | set(self._delta)):
+            docs, tfs = self._postings(term)
+            new_docs = remap[docs]
+            keep = new_docs >= 0
+            if not keep.any():
+                continue
+            doc_parts.append(new_docs[keep].astype(np.int32))
+            tf_parts.append(tfs[keep].astype(np.float32))
+            vocab[term] = [offset, offset + int(keep.sum())]
+            offset += int(keep.sum())
+
+        contents = [self.get(i).encode("utf-8") for i in self._doc_index]
+        offsets = np.zeros(len(contents) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(c) for c in contents])
+
+        _atomic_save(directory, "postings_docs.npy", np.concatenate(doc_parts) if doc_parts else np.zeros(0, np.int32))
+        _atomic_save(directory, "postings_tfs.npy", np.concatenate(tf_parts) if tf_parts else np.zeros(0, np.float32))
+        _atomic_save(directory, "doc_len.npy", self._doc_len[live_docs].astype(np.float32))
+        _atomic_save(directory, "offsets.npy", offsets)
+        _atomic_write(directory, "contents.bin", b"".join(contents))
+        _atomic_write(directory, "vocab.json", json.dumps(vocab).encode("utf-8"))
+        _atomic_write(directory, "ids.json", json.dumps(list(self._doc_index)).encode("utf-8"))
+        return name
+
+    def _write_delta(self, path: str, name: str) -> str:
+        """Write the current state of each transcript changed since the last save."""
+        lines = []
+        for meeting_id in sorted(self._dirty):
+            content = self.get(meeting_id)
+            record = {"id": meeting_id, "removed": True} if content is None else {"id": meeting_id, "content": content}
+            lines.append(json.dumps(record) + "\n")
+        _atomic_write(path, name, "".join(lines).encode("utf-8"))
+        return name
+
+    def _reset(self) -> None:
+        self._doc_ids: List[str] = []
+        self._doc_index: Dict[str, int] = {}
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._vocab: Dict[str, Tuple[int, int]] = {}
+        self._base_docs = np.zeros(0, dtype=np.int32)
+        self._base_tfs = np.zeros(0, dtype=np.float32)
+        self._base_offsets = np.zeros(1, dtype=np.int64)
+        self._base_contents = b""
+        self._delta: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._new_contents: Dict[int, str] = {}
+
+    def _load(self, path: str) -> None:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self._reset()
+        self.k1, self.b = meta["k1"], meta["b"]
+        base = meta.get("base", "")  # stores saved before delta files kept one base in ``path``
+        if base is not None:
+            self._load_base(os.path.join(path, base), meta.get("ids"))
+        for name in meta.get("deltas", []):
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record.get("removed"):
+                        self._remove_locked(record["id"])
+                    else:
+                        self.add(record["id"], record["content"])
+        self._generation = meta.get("generation", 0)
+        self._files = {"base": base, "deltas": list(meta.get("deltas", [])), "delta_docs": meta.get("delta_docs", 0)}
+        self._dirty.clear()
+
+    def _load_base(self, directory: str, ids: Optional[List[str]] = None) -> None:
+        if ids is None:
+            with open(os.path.join(directory, "ids.json"), encoding="utf-8") as f:
+                ids = json.load(f)
+        with open(os.path.join(directory, "vocab.json"), encoding="utf-8") as f:
+            vocab = json.load(f)
+
+        self._doc_ids = list(ids)
+        self._doc_index = {meeting_id: i for i, meeting_id in enumerate(self._doc_ids)}
+        self._vocab = {term: tuple(span) for term, span in vocab.items()}
+        self._base_docs = _load_array(directory, "postings_docs.npy")
+        self._base_tfs = _load_array(directory, "postings_tfs.npy")
+        self._base_offsets = np.array(_load_array(directory, "offsets.npy"))
+        self._doc_len = np.array(_load_array(directory, "doc_len.npy"))
+        self._live = np.ones(len(self._doc_ids), dtype=bool)
+
+        contents_path = os.path.join(directory, "contents.bin")
+        if os.path.getsize(contents_path):
+            with open(contents_path, "rb") as f:
+                self._base_contents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Postings of a term across the base and delta segments."""
+        docs, tfs = [], []
+        span = self._vocab.get(term)
+        if span:
+            docs.append(self._base_docs[span[0]:span[1]])
+            tfs.append(self._base_tfs[span[0]:span[1]])
+        delta = self._delta.get(term)
+        if delta:
+            docs.append(np.asarray(delta[0], dtype=np.int32))
+            tfs.append(np.asarray(delta[1], dtype=np.float32))
+        if not docs:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        if len(docs) == 1:
+            return docs[0], tfs[0]
+        return np.concatenate(docs), np.concatenate(tfs)
+
+    def _remove_locked(self, meeting_id: str) -> bool:
+        doc = self._doc_index.pop(meeting_id, None)
+        if doc is None:
+            return False
+        self._live[doc] = False
+        self._new_contents.pop(doc, None)
+        self._dirty.add(meeting_id)
+        self._version += 1
+        return True
+
+    def _append_doc_len(self, length: int) -> None:
+        doc = len(self._doc_ids) - 1
+        if doc >= len(self._doc_len):
+            capacity = max(64, 2 * len(self._doc_len))
+            self._doc_len = np.resize(self._doc_len, capacity)
+            live = np.zeros(capacity, dtype=bool)
+            live[:len(self._live)] = self._live
+            self._live = live
+        self._doc_len[doc] = length
+        self._live[doc] = True
+
+def _remove_unused(path: str, files: Dict[str, Any]) -> None:
+    """Delete base and delta files that ``meta.json`` no longer names."""
+    keep = {files["base"], *files["deltas"]}
+    for name in os.listdir(path):
+        if name.startswith(("base-", "delta-")) and name not in keep:
+            target = os.path.join(path, name)
+            if os.path.isdir(target):
+                shutil.rmtree(target, ignore_errors=True)
+            else:
+                os.remove(target)
+
+def _load_array(path: str, name: str) -> np.ndarray:
+    return np.load(os.path.join(path, name), mmap_mode="r")
+
+def _atomic_save(path: str, name: str, array: np.ndarray) -> None:
+    tmp = os.path.join(path, f".{name}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, os.path.join(path, name))
+
+def _atomic_write(path: str, name: str, data: bytes) -> None:
+    tmp = os.path.join(path, f".{name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, os.path.join(path, name))
@@ -0,0 +1,526 @@
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.embeddings import BaseEmbedder, HashingEmbedder
+from .transcript_store import BaseTranscriptStore, BM25TranscriptStore, SearchHit
+
+@dataclass
+class Chunk:
+    """A window of transcript text indexed as one vector."""
+    meeting_id: str
+    index: int
+    text: str
+
+@dataclass
+class ChunkHit:
+    """A chunk matched by a vector query."""
+    chunk: Chunk
+    score: float
+
+def chunk_text(text: str, max_words: int = 120, overlap: int = 30) -> List[str]:
+    """Split text into overlapping windows of at most ``max_words`` words."""
+    words = text.split()
+    if len(words) <= max_words:
+        return [" ".join(words)] if words else []
+    step = max(1, max_words - overlap)
+    return [
+        " ".join(words[start:start + max_words])
+        for start in range(0, len(words) - overlap, step)
+    ]
+
+def kmeans(
+    vectors: np.ndarray,
+    k: int,
+    iterations: int = 20,
+    seed: int = 0,
+    batch_size: int = 65536
+) -> np.ndarray:
+    """Plain Lloyd's k-means returning a ``(k, dim)`` float32 centroid matrix."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignment = assign_nearest(vectors, centroids, batch_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=k).astype(np.float32)
+        empty = counts == 0
+        # Reseed empty clusters so every list stays usable.
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        counts[empty] = 1
+        centroids = sums / counts[:, None]
+    return centroids
+
+def assign_nearest(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+    """Index of the nearest centroid (squared L2) for every vector."""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        distances = centroid_norms[None, :] - 2 * batch @ centroids.T
+        out[start:start + batch_size] = distances.argmin(axis=1)
+    return out
+
+class VectorStore:
+    """Append-friendly float32 embedding matrix with chunk metadata.
+
+    Rows live in one contiguous matrix. With a ``path`` the matrix is a
+    memory-mapped file that grows by doubling and chunk metadata is an
+    append-only JSON lines log, so adding transcripts never rewrites
+    existing rows. Removed rows are masked out until ``compact``.
+    """
+
+    def __init__(self, dim: int, path: Optional[str] = None, initial_capacity: int = 1024):
+        self.dim = dim
+        self.path = path
+        self.chunks: List[Optional[Chunk]] = []
+        self.rows_by_meeting: Dict[str, List[int]] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._lock = threading.RLock()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(self._meta_path):
+                self._load()
+            else:
+                self._allocate(initial_capacity)
+        else:
+            self._allocate(initial_capacity)
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, "chunks.jsonl")
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def live_count(self) -> int:
+        return int(self._live[:len(self.chunks)].sum())
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The populated ``(rows, dim)`` slice of the embedding matrix."""
+        return self._matrix[:len(self.chunks)]
+
+    @property
+    def live(self) -> np.ndarray:
+        return self._live[:len(self.chunks)]
+
+    def add(self, chunks: List[Chunk], vectors: np.ndarray) -> List[int]:
+        """Append chunk vectors, returning their row numbers."""
+        with self._lock:
+            start = len(self.chunks)
+            end = start + len(chunks)
+            if end > len(self._matrix):
+                self._allocate(max(end, 2 * len(self._matrix)))
+            self._matrix[start:end] = vectors
+            self._live[start:end] = True
+            self.chunks.extend(chunks)
+            for row, chunk in enumerate(chunks, start):
+                self.rows_by_meeting.setdefault(chunk.meeting_id, []).append(row)
+            self._log([{"meeting_id": c.meeting_id, "index": c.index, "text": c.text} for c in chunks])
+            self._write_meta()
+            return list(range(start, end))
+
+    def remove_meeting(self, meeting_id: str) -> List[int]:
+        """Mask out every row of a meeting, returning the removed rows."""
+        with self._lock:
+            rows = self.rows_by_meeting.pop(meeting_id, [])
+            for row in rows:
+                self._live[row] = False
+                self.chunks[row] = None
+            if rows:
+                self._log([{"removed": meeting_id}])
+            return rows
+
+    def search(self, queries: np.ndarray, top_k: int = 10, block_size: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k inner-product search for a batch of query vectors.
+
+        Returns ``(scores, rows)`` matrices of shape ``(len(queries), k)``,
+        best first; unused slots have row -1.
+        """
+        with self._lock:
+            n_rows = len(self.chunks)
+            queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+            k = min(top_k, max(self.live_count, 0))
+            best_scores = np.full((len(queries), max(k, 1)), -np.inf, dtype=np.float32)
+            best_rows = np.full((len(queries), max(k, 1)), -1, dtype=np.int64)
+            if not k:
+                return best_scores[:, :0], best_rows[:, :0]
+
+            for start in range(0, n_rows, block_size):
+                block = self._matrix[start:start + block_size][:n_rows - start]
+                scores = queries @ block.T
+                scores[:, ~self._live[start:start + len(block)]] = -np.inf
+                merged_scores = np.concatenate([best_scores, scores], axis=1)
+                merged_rows = np.concatenate(
+                    [best_rows, np.broadcast_to(np.arange(start, start + len(block)), scores.shape)], axis=1
+                )
+                top = np.argpartition(merged_scores, -k, axis=1)[:, -k:]
+                best_scores = np.take_along_axis(merged_scores, top, axis=1)
+                best_rows = np.take_along_axis(merged_rows, top, axis=1)
+
+            order = np.argsort(-best_scores, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+            best_rows[~np.isfinite(best_scores)] = -1
+            return best_scores, best_rows
+
+    def compact(self) -> Dict[int, int]:
+        """Drop removed rows, rewrite storage and return the old-to-new row map."""
+        with self._lock:
+            keep = np.flatnonzero(self.live)
+            remap = {int(old): new for new, old in enumerate(keep)}
+            matrix = np.array(self._matrix[keep])
+            chunks = [self.chunks[i] for i in keep]
+
+            self.chunks = []
+            self.rows_by_meeting = {}
+            if self.path:
+                for name in (self._meta_path, self._matrix_path, self._log_path):
+                    if os.path.exists(name):
+                        os.remove(name)
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+            self._live = np.zeros(0, dtype=bool)
+            self._allocate(max(1024, len(chunks)))
+            if chunks:
+                self.add(chunks, matrix)
+            return remap
+
+    def flush(self) -> None:
+        """Flush the memory-mapped matrix to disk."""
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+
+    def _allocate(self, capacity: int) -> None:
+        old = self._matrix
+        if self.path:
+            if isinstance(old, np.memmap):
+                old.flush()
+            mode = "r+" if os.path.exists(self._matrix_path) else "w+"
+            if mode == "r+":
+                with open(self._matrix_path, "r+b") as f:
+                    f.truncate(capacity * self.dim * 4)
+            self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        else:
+            self._matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            self._matrix[:len(old)] = old
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._live)] = self._live
+        self._live = live
+        self._write_meta()
+
+    def _load(self) -> None:
+        with open(self._meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["dim"] != self.dim:
+            raise ValueError(f"Vector store at {self.path} has dim {meta['dim']}, expected {self.dim}")
+
+        self._matrix = np.memmap(
+            self._matrix_path, dtype=np.float32, mode="r+", shape=(meta["capacity"], self.dim)
+        )
+        self._live = np.zeros(meta["capacity"], dtype=bool)
+        if not os.path.exists(self._log_path):
+            return
+        with open(self._log_path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if "removed" in record:
+                    for row in self.rows_by_meeting.pop(record["removed"], []):
+                        self._live[row] = False
+                        self.chunks[row] = None
+                    continue
+                row = len(self.chunks)
+                if row >= meta["count"]:
+                    break  # metadata logged but rows never committed
+                self.chunks.append(Chunk(record["meeting_id"], record["index"], record["text"]))
+                self.rows_by_meeting.setdefault(record["meeting_id"], []).append(row)
+                self._live[row] = True
+
+    def _log(self, records: List[Dict]) -> None:
+        if not self.path:
+            return
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(r) + "\n" for r in records)
+
+    def _write_meta(self) -> None:
+        if not self.path:
+            return
+        self.flush()
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "capacity": len(self._matrix), "count": len(self.chunks)}, f)
+        os.replace(tmp, self._meta_path)
+
+class IVFPQIndex:
+    """Approximate inner-product index: inverted lists plus product quantization.
+
+    Vectors are assigned to the nearest of ``n_lists`` coarse centroids and
+    their residuals are compressed to ``n_subvectors`` one-byte codes. A
+    query scans only the ``n_probe`` closest lists, scoring codes with
+    per-subspace lookup tables.
+    """
+
+    def __init__(self, dim: int, n_lists: int = 64, n_subvectors: int = 8, n_probe: int = 8):
+        if dim % n_subvectors:
+            raise ValueError(f"dim {dim} is not divisible by n_subvectors {n_subvectors}")
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_subvectors = n_subvectors
+        self.n_probe = n_probe
+        self.sub_dim = dim // n_subvectors
+        self.coarse: Optional[np.ndarray] = None
+        self.codebooks: Optional[np.ndarray] = None  # (n_subvectors, 256, sub_dim)
+        self.lists: List[List[int]] = []
+        self.codes: List[List[np.ndarray]] = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self.coarse is not None
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Learn coarse centroids and PQ codebooks from sample vectors."""
+        self.coarse = kmeans(vectors, self.n_lists)
+        residuals = vectors - self.coarse[assign_nearest(vectors, self.coarse)]
+        self.codebooks = np.stack([
+            self._pad_codebook(kmeans(residuals[:, self._subspace(m)], 256, iterations=10))
+            for m in range(self.n_subvectors)
+        ])
+        self.lists = [[] for _ in range(len(self.coarse))]
+        self.codes = [[] for _ in range(len(self.coarse))]
+
+    def add(self, vectors: np.ndarray, rows: List[int]) -> None:
+        """Encode and add vectors under their store row numbers."""
+        if not self.is_trained:
+            raise ValueError("IVFPQIndex must be trained before adding vectors")
+        assignment = assign_nearest(vectors, self.coarse)
+        residuals = vectors - self.coarse[assignment]
+        codes = np.stack([
+            assign_nearest(residuals[:, self._subspace(m)], self.codebooks[m])
+            for m in range(self.n_subvectors)
+        ], axis=1).astype(np.uint8)
+        for list_id, row, code in zip(assignment, rows, codes):
+            self.lists[list_id].append(row)
+            self.codes[list_id].append(code)
+
+    def search(self, query: np.ndarray, top_k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k ``(scores, rows)`` for one query vector."""
+        coarse_scores = self.coarse @ query
+        probe = np.argsort(-coarse_scores)[:self.n_probe]
+        # Inner product with residual codewords, per subspace.
+        tables = np.einsum("mks,ms->mk", self.codebooks, query.reshape(self.n_subvectors, self.sub_dim))
+
+        all_scores, all_rows = [], []
+        for list_id in probe:
+            if not self.lists[list_id]:
+                continue
+            codes = np.asarray(self.codes[list_id])
+            scores = coarse_scores[list_id] + tables[np.arange(self.n_subvectors), codes].sum(axis=1)
+            all_scores.append(scores)
+            all_rows.append(np.asarray(self.lists[list_id]))
+        if not all_scores:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        scores = np.concatenate(all_scores)
+        rows = np.concatenate(all_rows)
+        top = np.argsort(-scores)[:top_k]
+        return scores[top], rows[top]
+
+    def _subspace(self, m: int) -> slice:
+        return slice(m * self.sub_dim, (m + 1) * self.sub_dim)
+
+    @staticmethod
+    def _pad_codebook(codebook: np.ndarray) -> np.ndarray:
+        """Repeat centroids so small training sets still yield 256 codewords."""
+        if len(codebook) == 256:
+            return codebook
+        return codebook[np.arange(256) % len(codebook)]
+
+class RetrievalEngine(BaseTranscriptStore):
+    """Chunked vector retrieval over meeting transcripts.
+
+    Transcripts are split into overlapping chunks, embedded with a pluggable
+    ``embedder`` and kept in a ``VectorStore``. Queries are answered with
+    exact batched matrix products, or with an ``IVFPQIndex`` (re-ranked
+    exactly) once the corpus reaches ``ann_threshold`` chunks. Content and
+    BM25 keyword scores come from ``keyword_store``; ``search`` blends them
+    with vector similarity using ``hybrid_weight``.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[BaseEmbedder] = None,
+        path: Optional[str] = None,
+        keyword_store: Optional[BaseTranscriptStore] = None,
+        chunk_words: int = 120,
+        chunk_overlap: int = 30,
+        hybrid_weight: float = 0.5,
+        ann_threshold: int = 50000
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.path = path
+        self.chunk_words = chunk_words
+        self.chunk_overlap = chunk_overlap
+        self.hybrid_weight = hybrid_weight
+        self.ann_threshold = ann_threshold
+        self.vectors = VectorStore(self.embedder.dim, os.path.join(path, "vectors") if path else None)
+        self.keyword_store = keyword_store or BM25TranscriptStore(
+            os.path.join(path, "bm25") if path else None
+        )
+        self.ann: Optional[IVFPQIndex] = None
+        self._lock = threading.RLock()
+        self._version = 0
+        if self.vectors.live_count >= ann_threshold:
+            self.build_ann()
+
+    def add(self, meeting_id: str, content: str) -> None:
+        self.add_many([(meeting_id, content)])
+
+    def add_many(self, items) -> int:
+        """Chunk, embed and index transcripts in one batch."""
+        return self.add_chunked(
+            (meeting_id, content, chunk_text(content, self.chunk_words, self.chunk_overlap))
+            for meeting_id, content in items
+        )
+
+    def add_chunked(self, items: Iterable[Tuple[str, str, List[str]]]) -> int:
+        """Embed and index ``(meeting_id, content, chunks)`` already split into chunks."""
+        items = list(items)
+        chunks = [
+            Chunk(meeting_id, i, text)
+            for meeting_id, _, texts in items
+            for i, text in enumerate(texts)
+        ]
+        vectors = self.embedder.embed([c.text for c in chunks]) if chunks else None
+        with self._lock:
+            for meeting_id, content, _ in items:
+                self._remove_vectors(meeting_id)
+                self.keyword_store.add(meeting_id, content)
+            if chunks:
+                rows = self.vectors.add(chunks, vectors)
+                if self.ann is not None:
+                    self.ann.add(vectors, rows)
+                elif self.vectors.live_count >= self.ann_threshold:
+                    self.build_ann()
+            self._version += 1
+        return len(items)
+
+    def remove(self, meeting_id: str) -> bool:
+        with self._lock:
+            self._remove_vectors(meeting_id)
+            removed = self.keyword_store.remove(meeting_id)
+            if removed:
+                self._version += 1
+            return removed
+
+    def get(self, meeting_id: str) -> Optional[str]:
+        return self.keyword_store.get(meeting_id)
+
+    def ids(self) -> List[str]:
+        return self.keyword_store.ids()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self.keyword_store)
+
+    def __contains__(self, meeting_id: str) -> bool:
+        return meeting_id in self.keyword_store
+
+    def build_ann(self, n_lists: Optional[int] = None) -> None:
+        """Train and populate the approximate index from the current vectors."""
+        with self._lock:
+            rows = np.flatnonzero(self.vectors.live)
+            if not len(rows):
+                return
+            matrix = np.asarray(self.vectors.matrix[rows])
+            n_lists = n_lists or max(1, int(np.sqrt(len(rows))))
+            n_subvectors = next(m for m in (16, 8, 4, 2, 1) if self.embedder.dim % m == 0)
+            ann = IVFPQIndex(self.embedder.dim, n_lists=n_lists, n_subvectors=n_subvectors)
+            ann.train(matrix)
+            ann.add(matrix, rows.tolist())
+            self.ann = ann
+
+    def search_chunks(self, query: str, top_k: int = 10) -> List[ChunkHit]:
+        """Return the chunks most similar to the query, best first."""
+        return self.search_chunks_batch([query], top_k)[0]
+
+    def search_chunks_batch(self, queries: List[str], top_k: int = 10) -> List[List[ChunkHit]]:
+        """Vector search for several queries with a single matrix product."""
+        query_vectors = self.embedder.embed(queries)
+        with self._lock:
+            if self.ann is None:
+                scores, rows = self.vectors.search(query_vectors, top_k)
+                return [self._chunk_hits(s, r) for s, r in zip(scores, rows)]
+
+            results = []
+            for query in query_vectors:
+                _, candidates = self.ann.search(query, top_k * 4)
+                candidates = candidates[self.vectors.live[candidates]]
+                exact = self.vectors.matrix[candidates] @ query
+                order = np.argsort(-exact)[:top_k]
+                results.append(self._chunk_hits(exact[order], candidates[order]))
+            return results
+
+    def search(self, query: str, top_k: int = 5, min_relevance: float = 0.0) -> List[SearchHit]:
+        """Rank meetings by their best chunk, fused with keyword relevance."""
+        vector_scores: Dict[str, float] = {}
+        for hit in self.search_chunks(query, top_k * 4):
+            meeting_id = hit.chunk.meeting_id
+            vector_scores[meeting_id] = max(vector_scores.get(meeting_id, 0.0), max(0.0, hit.score))
+
+        keyword_scores = {}
+        if self.hybrid_weight < 1.0:
+            keyword_scores = {
+                hit.meeting_id: hit.relevance
+                for hit in self.keyword_store.search(query, top_k=top_k * 4)
+            }
+
+        fused = {
+            meeting_id: (
+                self.hybrid_weight * vector_scores.get(meeting_id, 0.0)
+                + (1 - self.hybrid_weight) * keyword_scores.get(meeting_id, 0.0)
+            )
+            for meeting_id in set(vector_scores) | set(keyword_scores)
+        }
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [
+            SearchHit(meeting_id, score, min(1.0, score))
+            for meeting_id, score in ranked
+            if score > 0 and score >= min_relevance
+        ]
+
+    def save(self) -> None:
+        """Persist the keyword index and flush vectors to ``path``."""
+        if not self.path:
+            raise ValueError("No path given to save the retrieval engine to")
+        self.vectors.flush()
+        if isinstance(self.keyword_store, BM25TranscriptStore):
+            self.keyword_store.save()
+
+    def _remove_vectors(self, meeting_id: str) -> None:
+        self.vectors.remove_meeting(meeting_id)
+
+    def _chunk_hits(self, scores: np.ndarray, rows: np.ndarray) -> List[ChunkHit]:
+        return [
+            ChunkHit(self.vectors.chunks[row], float(score))
+            for score, row in zip(scores, rows)
+            if row >= 0 and self.vectors.chunks[row] is not None
+        ]
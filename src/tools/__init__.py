@@ -1 +1,15 @@
-from .tool_config import ToolConfig, Parameter 
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+_EXPORTS = {
+    "ToolConfig": ".tool_config", "Parameter": ".tool_config",
+    "ToolRuntime": ".runtime", "ToolTimeoutError": ".runtime", "ToolValidationError": ".runtime",
+    "configure_tool_runtime": ".runtime", "get_tool_runtime": ".runtime",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .tool_config import ToolConfig, Parameter
+    from .runtime import ToolRuntime, ToolTimeoutError, ToolValidationError, configure_tool_runtime, get_tool_runtime
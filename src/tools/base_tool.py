@@ -1,9 +1,21 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional
+from ..utils.structured_output import function_tool, parameter_schema
+from ..utils.tracing import span
+from .runtime import get_tool_runtime
+from .tool_config import Parameter
 
 class BaseTool(ABC):
     """Abstract base class for all tools."""
-    
+
+    parameters: List[Parameter] = []  # Declared for the function-calling schema
+    kind: str = "io"  # Runtime settings, as on ToolConfig
+    timeout: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    cache_ttl: Optional[float] = None
+    heavy: Optional[Callable[[Dict[str, Any]], bool]] = None
+
     @abstractmethod
     def execute(self, params: Dict[str, Any]) -> Any:
         """Execute the tool's main functionality."""
@@ -24,4 +36,24 @@ class BaseTool(ABC):
     @abstractmethod
     def description(self) -> str:
         """Return the tool's description."""
-        pass 
\ No newline at end of file
+        pass
+
+    @cached_property
+    def prompt_fragment(self) -> str:
+        """This tool's entry in agent system prompts, rendered once."""
+        return f"Tool: {self.name}\nDescription: {self.description}\n"
+
+    @cached_property
+    def function_schema(self) -> Dict[str, Any]:
+        """Function-calling schema for the tool, built once from ``parameters``."""
+        return function_tool(
+            self.name,
+            self.description,
+            {param.name: parameter_schema(param.type, param.description) for param in self.parameters},
+            [param.name for param in self.parameters if param.required]
+        )
+
+    def run_tool(self, params: Dict[str, Any]) -> Any:
+        """Execute the tool on the tool runtime; mirrors ``ToolConfig.run_tool``."""
+        with span("tool", tool=self.name, kind=self.kind):
+            return get_tool_runtime().run(self, params)
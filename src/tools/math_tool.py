@@ -0,0 +1,224 @@
+import ast
+import math
+import operator
+import re
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .tool_config import ToolConfig, Parameter
+
+MAX_EXPRESSION_LENGTH = 1000
+MAX_NODES = 500
+MAX_INT_BITS = 4096          # ~1233 decimal digits
+MAX_ARRAY_SIZE = 1_000_000
+DEFAULT_TIME_LIMIT = 0.5     # seconds of evaluation per expression
+HEAVY_VALUES = 100_000       # element-wise inputs this long go to the process pool
+
+class ExpressionError(ValueError):
+    """Raised for expressions that are invalid, unsafe or too expensive."""
+
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf}
+
+FUNCTIONS: Dict[str, Callable] = {
+    "sqrt": np.sqrt, "exp": np.exp, "log": np.log, "log10": np.log10, "log2": np.log2,
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+    "abs": np.abs, "floor": np.floor, "ceil": np.ceil, "round": np.round,
+    "min": np.min, "max": np.max, "sum": np.sum, "mean": np.mean,
+}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+class _Context:
+    """Per-evaluation state: variable bindings and the CPU-time deadline."""
+    __slots__ = ("variables", "deadline")
+
+    def __init__(self, variables: Dict[str, Any], time_limit: float):
+        self.variables = variables
+        self.deadline = time.process_time() + time_limit
+
+    def tick(self) -> None:
+        if time.process_time() > self.deadline:
+            raise ExpressionError("Expression exceeded its CPU time limit")
+
+def _check_magnitude(value: Any) -> Any:
+    if isinstance(value, int) and not isinstance(value, bool) and value.bit_length() > MAX_INT_BITS:
+        raise ExpressionError("Result is too large")
+    if isinstance(value, np.ndarray) and value.size > MAX_ARRAY_SIZE:
+        raise ExpressionError("Result array is too large")
+    return value
+
+def _safe_pow(base: Any, exponent: Any) -> Any:
+    if isinstance(base, np.ndarray) or isinstance(exponent, np.ndarray):
+        # Float arrays overflow to inf instead of growing without bound.
+        return np.power(np.asarray(base, dtype=float), exponent)
+    if abs(base) > 1 and exponent > 0 and exponent * math.log2(abs(base)) > MAX_INT_BITS:
+        raise ExpressionError("Result is too large")
+    return operator.pow(base, exponent)
+
+_BINARY_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+    ast.Pow: _safe_pow,
+}
+_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+def normalize_expression(expression: str) -> str:
+    """Canonical form used as the compiled-expression cache key.
+
+    Runs of whitespace collapse to one space rather than vanish, since
+    ``"3 4"`` is a syntax error but ``"34"`` is not.
+    """
+    return _WHITESPACE_RE.sub(" ", expression).strip()
+
+@lru_cache(maxsize=1024)
+def compile_expression(normalized: str) -> Callable[[_Context], Any]:
+    """Parse and validate an expression into a reusable evaluator.
+
+    Only arithmetic, whitelisted functions and constants, list literals and
+    variable names are allowed; anything else raises ExpressionError.
+    """
+    if len(normalized) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError("Expression is too long")
+    try:
+        tree = ast.parse(normalized, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ExpressionError("Expression is too complex")
+    return _compile_node(tree.body)
+
+def _compile_node(node: ast.AST) -> Callable[[_Context], Any]:
+    if isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise ExpressionError(f"Unsupported constant: {node.value!r}")
+        value = node.value
+        return lambda ctx: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda ctx: value
+
+        def lookup(ctx: _Context) -> Any:
+            if name not in ctx.variables:
+                raise ExpressionError(f"Unknown name: {name}")
+            return ctx.variables[name]
+        return lookup
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        op = _BINARY_OPS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+
+        def binary(ctx: _Context) -> Any:
+            ctx.tick()
+            return _check_magnitude(op(left(ctx), right(ctx)))
+        return binary
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda ctx: op(operand(ctx))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            raise ExpressionError(f"Unsupported function call: {ast.unparse(node.func)}")
+        function = FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+
+        def call(ctx: _Context) -> Any:
+            ctx.tick()
+            return function(*(arg(ctx) for arg in args))
+        return call
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        if len(node.elts) > MAX_NODES:
+            raise ExpressionError("List literal is too long")
+        items = [_compile_node(elt) for elt in node.elts]
+        return lambda ctx: np.asarray([item(ctx) for item in items], dtype=float)
+
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+def _to_python(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, complex) or (isinstance(value, float) and math.isnan(value)):
+        raise ExpressionError("Result is undefined")
+    return value
+
+def evaluate(
+    expression: str,
+    variables: Optional[Dict[str, Any]] = None,
+    time_limit: float = DEFAULT_TIME_LIMIT
+) -> Any:
+    """Safely evaluate an arithmetic expression.
+
+    ``variables`` may bind names to numbers or sequences; sequences become
+    NumPy arrays, so ``"x ** 2 + 1"`` with ``{"x": [1, 2, 3]}`` is
+    evaluated element-wise in one pass.
+    """
+    evaluator = compile_expression(normalize_expression(expression))
+    bindings = {
+        name: np.asarray(value, dtype=float) if isinstance(value, (list, tuple, np.ndarray)) else value
+        for name, value in (variables or {}).items()
+    }
+    try:
+        with np.errstate(all="ignore"):
+            return _to_python(evaluator(_Context(bindings, time_limit)))
+    except ZeroDivisionError:
+        raise ExpressionError("Division by zero") from None
+    except (OverflowError, TypeError, ValueError) as e:
+        if isinstance(e, ExpressionError):
+            raise
+        raise ExpressionError(str(e)) from None
+
+def evaluate_batch(
+    expressions: Sequence[str],
+    variables: Optional[Dict[str, Any]] = None,
+    time_limit: float = DEFAULT_TIME_LIMIT
+) -> List[Any]:
+    """Evaluate several expressions, reporting failures per expression."""
+    results = []
+    for expression in expressions:
+        try:
+            results.append(evaluate(expression, variables, time_limit))
+        except ExpressionError as e:
+            results.append(f"Error: {e}")
+    return results
+
+def calculate(expression: str, values: Optional[Sequence[float]] = None) -> Any:
+    """Calculator tool entry point; ``values`` are bound to ``x``."""
+    return evaluate(expression, {"x": values} if values is not None else None)
+
+def is_heavy_calculation(params: Dict[str, Any]) -> bool:
+    """Whether a calculator call is worth a worker process."""
+    return len(params.get("values") or ()) >= HEAVY_VALUES
+
+def create_calculator_tool() -> ToolConfig:
+    """Create the sandboxed calculator tool."""
+    return ToolConfig(
+        name="calculator",
+        description=(
+            "Performs mathematical calculations (+ - * / // % **, sqrt, log, sin, "
+            "min, max, sum, mean, ...). Pass a list as 'values' to evaluate the "
+            "expression for each x."
+        ),
+        parameters=[
+            Parameter("expression", "Mathematical expression to evaluate", True, "string"),
+            Parameter("values", "Numbers bound to x for element-wise evaluation", False, "array")
+        ],
+        expected_response_format="Numerical result, or a list of results when values are given",
+        callable_function=calculate,
+        # Evaluation is CPU-limited and usually takes microseconds: run it in
+        # the calling thread, and only large element-wise runs in a process.
+        kind="inline",
+        heavy=is_heavy_calculation,
+        timeout=10.0,
+        cache_ttl=3600.0
+    )
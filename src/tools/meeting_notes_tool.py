@@ -1,16 +1,26 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base_tool import BaseTool
+from .tool_config import Parameter
+from ..retrieval.transcript_store import BaseTranscriptStore, BM25TranscriptStore
 
 class GetMeetingNotesTool(BaseTool):
     """Tool for retrieving meeting transcripts based on descriptions."""
+
+    parameters = [
+        Parameter("description", "Description of the meeting or topic to look for", True, "string"),
+        Parameter("top_k", "Maximum number of transcripts to return", False, "integer")
+    ]
     
-    def __init__(self):
-        # In a real implementation, this would connect to your meeting database
-        self._meeting_database = {
-            "product_review_2024": "Meeting transcript about Q1 2024 product review...",
-            "team_standup": "Daily standup meeting notes discussing project progress...",
-            # Add more meeting records here
-        }
+    def __init__(self, store: Optional[BaseTranscriptStore] = None, top_k: int = 5):
+        self.top_k = top_k
+        if store is None:
+            # Without a configured store, serve a small in-memory sample
+            store = BM25TranscriptStore()
+            store.add_many([
+                ("product_review_2024", "Meeting transcript about Q1 2024 product review..."),
+                ("team_standup", "Daily standup meeting notes discussing project progress..."),
+            ])
+        self.store = store
 
     @property
     def name(self) -> str:
@@ -22,6 +32,8 @@ class GetMeetingNotesTool(BaseTool):
 
     def validate_params(self, params: Dict[str, Any]) -> bool:
         """Validate that the required description parameter is present."""
+        if "top_k" in params and not isinstance(params["top_k"], int):
+            return False
         return "description" in params and isinstance(params["description"], str)
 
     def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -31,31 +43,29 @@ class GetMeetingNotesTool(BaseTool):
         Args:
             params: Dictionary containing:
                 - description: String describing the meeting context
+                - top_k: Optional maximum number of transcripts to return
         
         Returns:
             Dictionary containing:
                 - found: Boolean indicating if matching transcripts were found
-                - transcripts: List of relevant transcripts
-                - confidence: Float indicating match confidence
+                - transcripts: List of relevant transcripts, best match first
+                - confidence: Relevance of the best match, between 0 and 1
         """
         if not self.validate_params(params):
             raise ValueError("Invalid parameters. Required: 'description' (string)")
 
-        description = params["description"].lower()
-        
-        # In a real implementation, this would use semantic search or similar
-        # Here we're using simple keyword matching
-        matching_transcripts = []
-        for key, transcript in self._meeting_database.items():
-            if any(word in key.lower() for word in description.split()):
-                matching_transcripts.append({
-                    "id": key,
-                    "content": transcript,
-                    "relevance": 0.8  # In real impl, calculate actual relevance
-                })
+        hits = self.store.search(params["description"], top_k=params.get("top_k", self.top_k))
+        matching_transcripts = [
+            {
+                "id": hit.meeting_id,
+                "content": self.store.get(hit.meeting_id),
+                "relevance": round(hit.relevance, 4)
+            }
+            for hit in hits
+        ]
 
         return {
             "found": len(matching_transcripts) > 0,
             "transcripts": matching_transcripts,
-            "confidence": 0.8 if matching_transcripts else 0.0
-        } 
\ No newline at end of file
+            "confidence": hits[0].relevance if hits else 0.0
+        }
@@ -0,0 +1,254 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Tool kinds: "io" tools run on a thread pool, "cpu" tools on a process pool
+# (their function and arguments must be picklable), "inline" tools on the caller.
+# A tool's optional ``heavy(params)`` moves individual calls to the cpu pool.
+TOOL_KINDS = ("io", "cpu", "inline")
+
+class ToolValidationError(ValueError):
+    """Raised when tool arguments do not match the declared parameters."""
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool call, or the wait for a free slot, exceeds its timeout."""
+
+def _is_integer(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "integer": _is_integer,
+    "number": _is_number,
+    "float": _is_number,
+    "boolean": lambda value: isinstance(value, bool),
+    "array": lambda value: isinstance(value, list),
+    "object": lambda value: isinstance(value, dict),
+}
+
+def validate_arguments(tool: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Check ``params`` against the tool's declared ``Parameter`` list.
+
+    Returns a copy with whole-number floats converted for integer parameters,
+    as models often send ``3.0``. Tools declaring no parameters are not checked.
+    """
+    declared = {param.name: param for param in tool.parameters}
+    if not declared:
+        return dict(params)
+    checked = {}
+    for name, value in params.items():
+        param = declared.get(name)
+        if param is None:
+            raise ToolValidationError(f"Unexpected parameter for {tool.name}: {name}")
+        if param.type == "integer" and isinstance(value, float) and value.is_integer():
+            value = int(value)
+        check = _TYPE_CHECKS.get(param.type)
+        if value is not None and check and not check(value):
+            raise ToolValidationError(
+                f"Parameter {name} of {tool.name} must be {param.type}, got {type(value).__name__}"
+            )
+        checked[name] = value
+    for param in tool.parameters:
+        if param.required and checked.get(param.name) is None:
+            raise ToolValidationError(f"Missing required parameter: {param.name}")
+    return checked
+
+@dataclass
+class ToolRuntimeStats:
+    """Counters describing tool execution."""
+    calls: int = 0
+    cache_hits: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    rejected: int = 0  # failed validation
+
+class _ResultCache:
+    """LRU cache of tool results with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key: Tuple[str, str], value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class ToolRuntime:
+    """Runs tool calls off the request thread with limits and memoization.
+
+    Each tool declares a ``kind`` (see ``TOOL_KINDS``), an optional
+    ``timeout``, ``max_concurrency`` and ``cache_ttl``. Arguments are
+    validated against the declared parameters before dispatch. Results of
+    tools with a ``cache_ttl`` (pure tools) are memoized per argument set.
+
+    A call that times out is abandoned, not killed: its slot is released
+    only when the underlying function returns, so concurrency caps hold.
+    """
+
+    def __init__(
+        self,
+        io_workers: int = 16,
+        cpu_workers: Optional[int] = None,
+        default_timeout: Optional[float] = 30.0,
+        cache_size: int = 1024
+    ):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.default_timeout = default_timeout
+        self.cache = _ResultCache(cache_size)
+        self.stats = ToolRuntimeStats()
+        self._pools: Dict[str, Executor] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def run(self, tool: Any, params: Dict[str, Any]) -> Any:
+        """Validate ``params`` and run ``tool``, returning its result."""
+        try:
+            params = validate_arguments(tool, params)
+        except ToolValidationError:
+            self._count("rejected")
+            raise
+        self._count("calls")
+
+        ttl = getattr(tool, "cache_ttl", None)
+        key = (tool.name, json.dumps(params, sort_keys=True, default=str)) if ttl else None
+        if key:
+            hit, value = self.cache.get(key)
+            if hit:
+                self._count("cache_hits")
+                return value
+
+        timeout = getattr(tool, "timeout", None) or self.default_timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        slot = self._slot(tool)
+        if slot is not None and not slot.acquire(timeout=timeout):
+            self._count("timeouts")
+            raise ToolTimeoutError(f"Tool {tool.name} is at its concurrency limit")
+        try:
+            future = self._submit(tool, params)
+        except BaseException:
+            if slot is not None:
+                slot.release()
+            raise
+        if slot is not None:
+            future.add_done_callback(lambda _: slot.release())
+
+        try:
+            value = future.result(timeout=max(0.0, deadline - time.monotonic()) if deadline else None)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count("timeouts")
+            raise ToolTimeoutError(f"Tool {tool.name} timed out after {timeout}s") from None
+        except Exception:
+            self._count("errors")
+            raise
+        if key:
+            self.cache.set(key, value, ttl)
+        return value
+
+    def _submit(self, tool: Any, params: Dict[str, Any]) -> Future:
+        # Partials of the tool's function stay picklable for process pools.
+        if hasattr(tool, "callable_function"):
+            target = partial(tool.callable_function, **params)
+        else:
+            target = partial(tool.execute, params)
+
+        kind = getattr(tool, "kind", "io")
+        heavy = getattr(tool, "heavy", None)
+        if heavy is not None and kind != "cpu" and heavy(params):
+            kind = "cpu"
+        if kind == "inline":
+            future: Future = Future()
+            try:
+                future.set_result(target())
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._pool(kind).submit(target)
+
+    def _pool(self, kind: str) -> Executor:
+        with self._lock:
+            pool = self._pools.get(kind)
+            if pool is None:
+                if kind == "cpu":
+                    # spawn: forking a process that runs threads is unsafe
+                    pool = ProcessPoolExecutor(
+                        max_workers=self.cpu_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                elif kind == "io":
+                    pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="tool")
+                else:
+                    raise ValueError(f"Unknown tool kind: {kind}")
+                self._pools[kind] = pool
+            return pool
+
+    def _slot(self, tool: Any) -> Optional[threading.BoundedSemaphore]:
+        limit = getattr(tool, "max_concurrency", None)
+        if not limit:
+            return None
+        with self._lock:
+            slot = self._slots.get(tool.name)
+            if slot is None:
+                slot = self._slots[tool.name] = threading.BoundedSemaphore(limit)
+            return slot
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker pools; they are recreated on the next call."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+_runtime: Optional[ToolRuntime] = None
+_runtime_lock = threading.Lock()
+
+def configure_tool_runtime(**options: Any) -> ToolRuntime:
+    """Replace the process-wide runtime, e.g. to size its pools."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is not None:
+            _runtime.shutdown()
+        _runtime = ToolRuntime(**options)
+        return _runtime
+
+def get_tool_runtime() -> ToolRuntime:
+    """Return the process-wide tool runtime, creating it with defaults."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = ToolRuntime()
+        return _runtime
@@ -1,5 +1,9 @@
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Any, Callable, Dict, List, Optional
+from ..utils.structured_output import function_tool, parameter_schema
+from ..utils.tracing import span
+from .runtime import get_tool_runtime
 
 @dataclass
 class Parameter:
@@ -15,6 +19,11 @@ class ToolConfig:
     parameters: List[Parameter]
     expected_response_format: str
     callable_function: Callable
+    kind: str = "io"  # io, cpu or inline; see runtime.TOOL_KINDS
+    timeout: Optional[float] = None  # Seconds per call; runtime default when None
+    max_concurrency: Optional[int] = None  # Calls allowed to run at once
+    cache_ttl: Optional[float] = None  # Memoize results this long (pure tools only)
+    heavy: Optional[Callable[[Dict[str, Any]], bool]] = None  # Calls it flags run on the cpu pool
 
     def get_tool_info(self) -> Dict[str, Any]:
         """Format tool information into a JSON-readable format."""
@@ -33,11 +42,22 @@ class ToolConfig:
             "expected_response_format": self.expected_response_format
         }
 
+    @cached_property
+    def prompt_fragment(self) -> str:
+        """This tool's entry in agent system prompts, rendered once."""
+        return f"Tool: {self.name}\nDescription: {self.description}\n"
+
+    @cached_property
+    def function_schema(self) -> Dict[str, Any]:
+        """Function-calling schema for the tool, built once from its parameters."""
+        return function_tool(
+            self.name,
+            f"{self.description}. Returns: {self.expected_response_format}",
+            {param.name: parameter_schema(param.type, param.description) for param in self.parameters},
+            [param.name for param in self.parameters if param.required]
+        )
+
     def run_tool(self, params: Dict[str, Any]) -> Any:
-        """Execute the tool with given parameters."""
-        # Validate required parameters
-        for param in self.parameters:
-            if param.required and param.name not in params:
-                raise ValueError(f"Missing required parameter: {param.name}")
-        
-        return self.callable_function(**params) 
\ No newline at end of file
+        """Validate the parameters and execute the tool on the tool runtime."""
+        with span("tool", tool=self.name, kind=self.kind):
+            return get_tool_runtime().run(self, params)
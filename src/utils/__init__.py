@@ -1 +1,40 @@
-from .llm_utils import setup_openai, create_chat_completion 
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from .lazy import lazy_exports
+
+_EXPORTS = {
+    "LLMClient": ".llm_utils", "setup_openai": ".llm_utils", "get_llm_client": ".llm_utils",
+    "create_chat_completion": ".llm_utils",
+    "CompletionCache": ".cache", "CacheStats": ".cache",
+    "HashingEmbedder": ".embeddings",
+    "ContextBudget": ".context_budget", "HistorySummarizer": ".context_budget",
+    "PromptReport": ".context_budget", "count_tokens": ".context_budget",
+    "LatencyPolicy": ".latency", "LatencyStats": ".latency",
+    "ModelPolicy": ".model_policy", "StagePolicy": ".model_policy", "get_model_policy": ".model_policy",
+    "DagScheduler": ".scheduler", "TaskNode": ".scheduler", "TaskResult": ".scheduler",
+    "get_scheduler": ".scheduler",
+    "JsonLinesExporter": ".tracing", "OtlpJsonExporter": ".tracing", "RingBufferExporter": ".tracing",
+    "Span": ".tracing", "SpanExporter": ".tracing", "configure_tracing": ".tracing",
+    "current_span": ".tracing", "format_breakdown": ".tracing", "record_error": ".tracing", "span": ".tracing",
+    "IncrementalJsonParser": ".structured_output", "StructuredOutputError": ".structured_output",
+    "ToolCall": ".structured_output", "call_with_repair": ".structured_output",
+    "function_tool": ".structured_output", "parse_json": ".structured_output",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .llm_utils import LLMClient, setup_openai, get_llm_client, create_chat_completion
+    from .cache import CompletionCache, CacheStats
+    from .embeddings import HashingEmbedder
+    from .context_budget import ContextBudget, HistorySummarizer, PromptReport, count_tokens
+    from .latency import LatencyPolicy, LatencyStats
+    from .model_policy import ModelPolicy, StagePolicy, get_model_policy
+    from .scheduler import DagScheduler, TaskNode, TaskResult, get_scheduler
+    from .tracing import (
+        JsonLinesExporter, OtlpJsonExporter, RingBufferExporter, Span, SpanExporter,
+        configure_tracing, current_span, format_breakdown, record_error, span
+    )
+    from .structured_output import (
+        IncrementalJsonParser, StructuredOutputError, ToolCall, call_with_repair, function_tool, parse_json
+    )
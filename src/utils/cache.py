@@ -0,0 +1,268 @@
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .embeddings import BaseEmbedder
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+    """Reduce messages to (role, content) pairs with collapsed whitespace.
+
+    Assistant messages that called tools also keep each call's function and
+    arguments; call ids are left out, since they differ between runs.
+    """
+    normalized = []
+    for m in messages:
+        item: Tuple[Any, ...] = (m.get("role", ""), _WHITESPACE_RE.sub(" ", str(m.get("content") or "")).strip())
+        if m.get("tool_calls"):
+            item += ([(call["function"]["name"], call["function"]["arguments"]) for call in m["tool_calls"]],)
+        normalized.append(item)
+    return normalized
+
+def make_cache_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: Optional[float] = None,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    tool_choice: Any = None
+) -> str:
+    """Build a stable key from the normalized (model, messages, temperature) tuple.
+
+    Function-calling requests add their ``tools`` and ``tool_choice``.
+    """
+    key: List[Any] = [model, normalize_messages(messages), temperature]
+    if tools is not None:
+        key += [tools, tool_choice]
+    payload = json.dumps(key, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+@dataclass
+class CacheStats:
+    """Counters describing cache effectiveness."""
+    hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return (self.hits + self.semantic_hits) / lookups if lookups else 0.0
+
+class BaseCompletionCache(ABC):
+    """Abstract base class for completion caches used by ``LLMClient``."""
+
+    @abstractmethod
+    def get(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Any = None
+    ) -> Optional[str]:
+        """Return a cached completion or None; ``tools`` requests are cached apart."""
+        pass
+
+    @abstractmethod
+    def set(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        value: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Any = None
+    ) -> None:
+        """Store a completion."""
+        pass
+
+@dataclass
+class _Entry:
+    value: str
+    expires_at: float
+    size: int
+    context_key: Optional[str] = None
+    row: Optional[int] = None
+
+@dataclass
+class _SemanticIndex:
+    """Embeddings of cached final messages, grouped by preceding context."""
+    vectors: np.ndarray
+    keys: List[Optional[str]] = field(default_factory=list)
+    groups: Dict[str, List[int]] = field(default_factory=dict)
+    free_rows: List[int] = field(default_factory=list)
+
+class CompletionCache(BaseCompletionCache):
+    """In-memory LRU/TTL completion cache with an optional semantic tier.
+
+    The exact tier matches on the normalized (model, messages, temperature)
+    key. When an ``embedder`` is given, a miss falls back to comparing the
+    final message with cached ones that share the same model, temperature
+    and preceding messages, returning the closest entry whose cosine
+    similarity is at least ``similarity_threshold``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 3600.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        embedder: Optional[BaseEmbedder] = None,
+        similarity_threshold: float = 0.95
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+        self._index = (
+            _SemanticIndex(vectors=np.zeros((0, embedder.dim), dtype=np.float32))
+            if embedder else None
+        )
+
+    def get(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Any = None
+    ) -> Optional[str]:
+        key = make_cache_key(model, messages, temperature, tools, tool_choice)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self._stats.hits += 1
+                return entry.value
+
+        if self._index is not None and messages:
+            context_key = make_cache_key(model, messages[:-1], temperature, tools, tool_choice)
+            query = self.embedder.embed_one(str(messages[-1].get("content") or ""))
+            with self._lock:
+                entry = self._semantic_lookup(context_key, query)
+                if entry is not None:
+                    self._stats.semantic_hits += 1
+                    return entry.value
+
+        with self._lock:
+            self._stats.misses += 1
+        return None
+
+    def set(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        value: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Any = None
+    ) -> None:
+        key = make_cache_key(model, messages, temperature, tools, tool_choice)
+        size = sys.getsizeof(value) + sys.getsizeof(key)
+        if size > self.max_bytes:
+            return
+
+        context_key = vector = None
+        if self._index is not None and messages:
+            context_key = make_cache_key(model, messages[:-1], temperature, tools, tool_choice)
+            vector = self.embedder.embed_one(str(messages[-1].get("content") or ""))
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(value=value, expires_at=expires_at, size=size, context_key=context_key)
+            if vector is not None:
+                entry.row = self._add_vector(key, context_key, vector)
+            self._entries[key] = entry
+            self._stats.bytes += size
+            self._evict()
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            self._stats.entries = len(self._entries)
+            return CacheStats(**vars(self._stats))
+
+    def clear(self) -> None:
+        """Drop every cached entry, keeping the counters."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self._stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _semantic_lookup(self, context_key: str, query: np.ndarray) -> Optional[_Entry]:
+        index = self._index
+        rows = list(index.groups.get(context_key, ()))
+        if not rows:
+            return None
+        scores = index.vectors[rows] @ query
+        for best in np.argsort(scores)[::-1]:
+            if scores[best] < self.similarity_threshold:
+                return None
+            entry = self._lookup(index.keys[rows[best]])
+            if entry is not None:
+                return entry
+        return None
+
+    def _add_vector(self, key: str, context_key: str, vector: np.ndarray) -> int:
+        index = self._index
+        if index.free_rows:
+            row = index.free_rows.pop()
+            index.keys[row] = key
+        else:
+            row = len(index.keys)
+            if row >= len(index.vectors):
+                grown = np.zeros((max(16, 2 * len(index.vectors)), index.vectors.shape[1]), dtype=np.float32)
+                grown[:len(index.vectors)] = index.vectors
+                index.vectors = grown
+            index.keys.append(key)
+        index.groups.setdefault(context_key, []).append(row)
+        index.vectors[row] = vector
+        return row
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._stats.bytes -= entry.size
+        if entry.row is not None:
+            index = self._index
+            index.keys[entry.row] = None
+            group = index.groups[entry.context_key]
+            group.remove(entry.row)
+            if not group:
+                del index.groups[entry.context_key]
+            index.free_rows.append(entry.row)
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._stats.bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+            self._stats.evictions += 1
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .tracing import current_span
+
+_tiktoken = None  # imported on first count; False when not installed
+
+def _load_tiktoken():
+    """The optional tiktoken module, imported lazily as it is slow to load."""
+    global _tiktoken
+    if _tiktoken is None:
+        try:
+            import tiktoken
+            _tiktoken = tiktoken
+        except ImportError:  # fall back to a character-based estimate
+            _tiktoken = False
+    return _tiktoken or None
+
+# Prompt window sizes in tokens for the models this project uses.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens the chat format adds around every message.
+MESSAGE_OVERHEAD = 4
+
+_encoders: Dict[str, object] = {}
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count tokens with tiktoken when available, otherwise estimate."""
+    if not text:
+        return 0
+    tiktoken = _load_tiktoken()
+    if tiktoken is None:
+        return (len(text) + 3) // 4
+    encoder = _encoders.get(model)
+    if encoder is None:
+        try:
+            encoder = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoder = tiktoken.get_encoding("cl100k_base")
+        _encoders[model] = encoder
+    return len(encoder.encode(text))
+
+def count_message_tokens(messages: Sequence[Dict[str, str]], model: str = "gpt-3.5-turbo") -> int:
+    """Count the prompt tokens of a list of chat messages."""
+    return sum(count_tokens(m.get("content") or "", model) + MESSAGE_OVERHEAD for m in messages)
+
+@dataclass
+class PromptReport:
+    """Per-call breakdown of where prompt tokens went."""
+    stage: str
+    model: str
+    budget: int
+    system: int = 0
+    summary: int = 0
+    history: int = 0
+    retrieved: int = 0
+    dropped_messages: int = 0
+    dropped_chunks: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.system + self.summary + self.history + self.retrieved
+
+    def as_dict(self) -> Dict[str, int]:
+        return {**asdict(self), "total": self.total}
+
+class HistorySummarizer:
+    """Incrementally summarizes conversation turns evicted from the prompt.
+
+    With a ``source`` (a ``ConversationStore``), evicted messages are traced
+    to their rows and a session's summary is kept by the id of the last row
+    it covers. Each call folds in only the rows after the best cached
+    summary, including rows that already left the store's hot window, so a
+    sliding window costs one small update per turn. ``max_new_messages``
+    bounds how far back a session without a cached summary is read.
+
+    Without a source, or for messages it did not hand out, summaries are
+    cached by the hash of the evicted prefix. When more turns are evicted
+    later, the cached summary of the longest known prefix is extended with
+    only the new turns instead of re-summarizing everything.
+    """
+
+    def __init__(
+        self,
+        summarize_fn: Optional[Callable[[str, List[Dict[str, str]]], str]] = None,
+        max_entries: int = 256,
+        source: Optional[Any] = None,
+        max_new_messages: int = 200
+    ):
+        self.summarize_fn = summarize_fn or _llm_summarize
+        self.max_entries = max_entries
+        self.source = source
+        self.max_new_messages = max_new_messages
+        self._cache: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        # session id -> [(last row id covered, summary)], newest last
+        self._sessions: "OrderedDict[str, List[Tuple[int, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def summarize(self, evicted: List[Dict[str, str]]) -> str:
+        """Return a summary of the evicted messages."""
+        if not evicted:
+            return ""
+        location = self.source.locate(evicted[-1]) if self.source is not None else None
+        if location is not None:
+            return self._summarize_session(*location)
+
+        prefix_keys = _prefix_hashes(evicted)
+        known_len, summary = 0, ""
+        with self._lock:
+            for length in range(len(evicted), 0, -1):
+                cached = self._cache.get(prefix_keys[length - 1])
+                if cached:
+                    known_len, summary = cached
+                    self._cache.move_to_end(prefix_keys[length - 1])
+                    break
+        if known_len == len(evicted):
+            return summary
+
+        summary = self.summarize_fn(summary, evicted[known_len:])
+        with self._lock:
+            self._cache[prefix_keys[-1]] = (len(evicted), summary)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return summary
+
+    def _summarize_session(self, session_id: str, through_id: int) -> str:
+        """Summary of a session's rows up to ``through_id``, extending the best cached one."""
+        with self._lock:
+            runs = self._sessions.get(session_id, [])
+            base_id, summary = max((run for run in runs if run[0] <= through_id), default=(0, ""))
+            if runs:
+                self._sessions.move_to_end(session_id)
+        if base_id == through_id:
+            return summary
+
+        new = self.source.rows_between(session_id, base_id, through_id, self.max_new_messages)
+        if new:
+            summary = self.summarize_fn(summary, new)
+        with self._lock:
+            runs = self._sessions.setdefault(session_id, [])
+            runs.append((through_id, summary))
+            # Routing and phrasing evict at different points; a few runs cover both.
+            del runs[:-4]
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+        return summary
+
+def _prefix_hashes(messages: List[Dict[str, str]]) -> List[str]:
+    """Rolling hash of every prefix of ``messages``."""
+    digest = hashlib.sha256()
+    hashes = []
+    for message in messages:
+        digest.update(json.dumps([message.get("role"), message.get("content")]).encode("utf-8"))
+        hashes.append(digest.copy().hexdigest())
+    return hashes
+
+def _llm_summarize(previous: str, messages: List[Dict[str, str]]) -> str:
+    from .llm_utils import get_llm_client
+    from .model_policy import get_model_policy
+
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = [
+        {"role": "system", "content": (
+            "Update the running summary of a conversation with the new turns. "
+            "Keep facts, names, numbers and open questions. Reply with the summary only."
+        )},
+        {"role": "user", "content": f"Summary so far:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"}
+    ]
+    return get_model_policy().run(
+        "summarization", lambda model: get_llm_client().chat(prompt, model=model, temperature=0)
+    )
+
+@dataclass
+class ContextBudget:
+    """Fits system prompt, retrieved chunks and history into a token budget.
+
+    ``max_prompt_tokens`` defaults to the model's context window minus
+    ``completion_reserve``. History is kept newest-first; older turns are
+    folded into a summary when a ``summarizer`` is set, or dropped otherwise.
+    """
+    model: str = "gpt-3.5-turbo"
+    max_prompt_tokens: Optional[int] = None
+    completion_reserve: int = 1024
+    summarizer: Optional[HistorySummarizer] = None
+    summary_share: float = 0.2  # Portion of the history budget a summary may use
+    reports: List[PromptReport] = field(default_factory=list, repr=False)
+    max_reports: int = 100
+
+    @property
+    def budget(self) -> int:
+        if self.max_prompt_tokens is not None:
+            return self.max_prompt_tokens
+        window = MODEL_CONTEXT_WINDOWS.get(self.model, DEFAULT_CONTEXT_WINDOW)
+        return max(0, window - self.completion_reserve)
+
+    def fit_chunks(
+        self,
+        chunks: Sequence[Tuple[str, float]],
+        budget: int
+    ) -> Tuple[List[str], int, int]:
+        """Pick the most relevant (text, score) chunks that fit in ``budget``.
+
+        Returns the kept texts in their original order, their token count and
+        the number of chunks dropped.
+        """
+        ranked = sorted(range(len(chunks)), key=lambda i: chunks[i][1], reverse=True)
+        kept, used = [], 0
+        for i in ranked:
+            tokens = count_tokens(chunks[i][0], self.model) + 1
+            if used + tokens <= budget:
+                kept.append(i)
+                used += tokens
+        kept.sort()
+        return [chunks[i][0] for i in kept], used, len(chunks) - len(kept)
+
+    def fit_history(
+        self,
+        history: Sequence[Dict[str, str]],
+        budget: int
+    ) -> Tuple[List[Dict[str, str]], List[Dict[str, str]], int]:
+        """Keep the newest messages that fit; return (kept, evicted, tokens)."""
+        kept, used = [], 0
+        for index in range(len(history) - 1, -1, -1):
+            tokens = count_tokens(history[index].get("content") or "", self.model) + MESSAGE_OVERHEAD
+            if used + tokens > budget and kept:
+                return list(reversed(kept)), list(history[:index + 1]), used
+            kept.append(history[index])
+            used += tokens
+        return list(reversed(kept)), [], used
+
+    def build(
+        self,
+        stage: str,
+        system_prompt: str,
+        history: Sequence[Dict[str, str]],
+        retrieved: Sequence[Tuple[str, float]] = (),
+        retrieved_header: str = "Relevant context:"
+    ) -> Tuple[List[Dict[str, str]], PromptReport]:
+        """Assemble the messages for one call and record its token breakdown."""
+        report = PromptReport(stage=stage, model=self.model, budget=self.budget)
+        report.system = count_tokens(system_prompt, self.model) + MESSAGE_OVERHEAD
+        remaining = max(0, self.budget - report.system)
+
+        if retrieved:
+            texts, report.retrieved, report.dropped_chunks = self.fit_chunks(retrieved, remaining // 2)
+            if texts:
+                system_prompt = f"{system_prompt}\n\n{retrieved_header}\n" + "\n---\n".join(texts)
+            remaining -= report.retrieved
+
+        kept, evicted, report.history = self.fit_history(history, remaining)
+        messages = [{"role": "system", "content": system_prompt}]
+        if evicted:
+            summary_budget = int(remaining * self.summary_share) if self.summarizer else 0
+            if summary_budget:
+                kept, evicted, report.history = self.fit_history(history, remaining - summary_budget)
+            report.dropped_messages = len(evicted)
+            summary = self._summarize(evicted, summary_budget)
+            if summary:
+                report.summary = count_tokens(summary, self.model) + MESSAGE_OVERHEAD
+                messages.append({"role": "system", "content": f"Summary of earlier conversation: {summary}"})
+        messages.extend(kept)
+
+        self.reports.append(report)
+        del self.reports[:-self.max_reports]
+        current_span().set(
+            prompt_tokens_budgeted=report.total,
+            dropped_messages=report.dropped_messages,
+            dropped_chunks=report.dropped_chunks
+        )
+        return messages, report
+
+    def _summarize(self, evicted: List[Dict[str, str]], budget: int) -> str:
+        if self.summarizer is None or budget <= 0:
+            return ""
+        try:
+            summary = self.summarizer.summarize(evicted)
+        except Exception:
+            return ""  # a missing summary only costs context, never the turn
+        return summary if count_tokens(summary, self.model) <= budget else ""
@@ -0,0 +1,57 @@
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+class BaseEmbedder(ABC):
+    """Abstract base class for text embedders."""
+
+    @property
+    @abstractmethod
+    def dim(self) -> int:
+        """Return the embedding dimensionality."""
+        pass
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an L2-normalized ``(len(texts), dim)`` float32 matrix."""
+        pass
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed a single text into a ``(dim,)`` vector."""
+        return self.embed([text])[0]
+
+class HashingEmbedder(BaseEmbedder):
+    """Deterministic, dependency-free embedder based on feature hashing.
+
+    Word unigrams and bigrams are hashed into a fixed number of signed
+    buckets, so similar wording yields similar vectors without any model
+    download or network access.
+    """
+
+    def __init__(self, dim: int = 256, use_bigrams: bool = True):
+        self._dim = dim
+        self.use_bigrams = use_bigrams
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self._dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            features = tokens
+            if self.use_bigrams:
+                features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self._dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
@@ -0,0 +1,222 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import Context, ContextVar, copy_context
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+@dataclass
+class LatencyPolicy:
+    """Opt-in settings that spend extra tokens to cut tail latency.
+
+    Hedging sends a duplicate of a completion that has not returned after
+    ``hedge_delay`` seconds (by default the model's recent p95 latency) and
+    keeps whichever finishes first. Speculation starts the router's likely
+    agent while the routing model is still deciding; agents may call tools
+    with side effects, so it is off by default. Both stop once the tokens
+    spent on discarded work reach ``max_extra_tokens``: a speculative run
+    reserves ``speculation_tokens`` up front, grows its reservation as it
+    spends, and is cancelled at its next LLM call once the cap is reached.
+    """
+    hedge: bool = True
+    hedge_delay: Optional[float] = None  # Seconds; None: p95 of the model's recent calls
+    hedge_min_samples: int = 20  # Calls needed before the adaptive delay is used
+    speculate: bool = False
+    speculate_confidence: float = 0.25  # Router confidence needed to start an agent early
+    speculation_tokens: int = 2000  # Tokens reserved when a speculative run starts
+    max_extra_tokens: int = 50000  # Tokens hedges and discarded speculation may waste in total
+
+@dataclass
+class LatencyStats:
+    """What the latency mode did and what it saved."""
+    hedges_sent: int = 0
+    hedge_wins: int = 0  # the duplicate answered first
+    hedge_saved_s: float = 0.0  # measured where the losing original still completed
+    speculations: int = 0
+    speculation_hits: int = 0
+    speculation_saved_s: float = 0.0
+    extra_tokens: int = 0  # prompt estimates of hedges plus tokens of discarded work
+    over_budget: int = 0  # hedges or speculations skipped by max_extra_tokens
+
+class LatencyTracker:
+    """Applies a ``LatencyPolicy``: enforces its token cap and keeps its stats."""
+
+    def __init__(self, policy: LatencyPolicy):
+        self.policy = policy
+        self.stats = LatencyStats()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> bool:
+        """Charge ``tokens`` of extra spend if it fits the cap; False when it does not."""
+        with self._lock:
+            if self.stats.extra_tokens + tokens > self.policy.max_extra_tokens:
+                self.stats.over_budget += 1
+                return False
+            self.stats.extra_tokens += tokens
+            return True
+
+    def charge(self, tokens: int) -> None:
+        """Record extra spend after the fact, e.g. tokens of a discarded run."""
+        with self._lock:
+            self.stats.extra_tokens += tokens
+
+    def release(self, tokens: int) -> None:
+        """Return a reservation that did not turn into waste."""
+        with self._lock:
+            self.stats.extra_tokens -= tokens
+
+    def count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            setattr(self.stats, name, getattr(self.stats, name) + amount)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**asdict(self.stats), "max_extra_tokens": self.policy.max_extra_tokens}
+
+class SpeculationCancelled(Exception):
+    """Raised in a speculative run once its result is no longer wanted."""
+
+class SpendAccount:
+    """Collects the tokens of LLM calls made under it (see ``spend_account``).
+
+    Until it is claimed or discarded, its spend counts against the tracker's
+    cap through a reservation that grows with it; when the cap refuses more,
+    the account is exhausted. Once exhausted or discarded, further requests
+    raise ``SpeculationCancelled``; after a discard, the tokens of calls
+    still in flight are charged to the tracker as they land.
+    """
+
+    def __init__(self, tracker: LatencyTracker, reserved: int = 0):
+        self.tracker = tracker
+        self.tokens = 0
+        self.reserved = reserved  # already charged to the tracker
+        self.claimed = False
+        self.discarded = False
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.discarded or self.exhausted
+
+    def add(self, tokens: int) -> None:
+        with self._lock:
+            self.tokens += tokens
+            if self.claimed:
+                return
+            if not self.discarded:
+                over = self.tokens - self.reserved
+                if over > 0:
+                    if self.tracker.reserve(over):
+                        self.reserved += over
+                    else:
+                        self.exhausted = True
+                return
+        self.tracker.charge(tokens)
+
+    def claim(self) -> bool:
+        """Keep the spend as regular work; False if the run was already cut off."""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.claimed = True
+            reserved, self.reserved = self.reserved, 0
+        self.tracker.release(reserved)
+        return True
+
+    def discard(self) -> None:
+        with self._lock:
+            if self.discarded or self.claimed:
+                return
+            self.discarded = True
+            tokens, reserved, self.reserved = self.tokens, self.reserved, 0
+        self.tracker.release(reserved)
+        self.tracker.charge(tokens)
+
+_spend_account: ContextVar[Optional[SpendAccount]] = ContextVar("spend_account", default=None)
+
+def spend_account() -> Optional[SpendAccount]:
+    """The account LLM calls in the current context are charged to, if any."""
+    return _spend_account.get()
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _speculation_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="speculate")
+        return _pool
+
+class Speculation:
+    """An agent run started before routing confirmed the agent.
+
+    The routing step either ``adopt``s it, and waits for its ``result``
+    instead of running the agent again, or ``discard``s it.
+    """
+
+    def __init__(self, tracker: LatencyTracker, agent_name: str, reserved: int = 0, args: Tuple[Any, ...] = ()):
+        self.tracker = tracker
+        self.agent_name = agent_name
+        self.args = args  # What the run was started with
+        self.account = SpendAccount(tracker, reserved)
+        self.started = time.perf_counter()
+        self.future: Any = None  # concurrent Future or asyncio Task
+        tracker.count("speculations")
+
+    def context(self) -> Context:
+        """A copy of the current context whose LLM calls go to this run's account."""
+        context = copy_context()
+        context.run(_spend_account.set, self.account)
+        return context
+
+    def adopt(self) -> bool:
+        """Keep the run; its latency win is recorded once it finishes.
+
+        Returns False, leaving the run to be discarded, when it was cut off
+        by the token cap.
+        """
+        if not self.account.claim():
+            return False
+        decided = time.perf_counter()
+        self.tracker.count("speculation_hits")
+
+        def record(_future: Any) -> None:
+            # Run afterwards it would have finished at decided + duration.
+            self.tracker.count("speculation_saved_s", min(time.perf_counter(), decided) - self.started)
+
+        self.future.add_done_callback(record)
+        return True
+
+    def discard(self) -> None:
+        """Stop the run at its next LLM call and count its tokens as waste."""
+        self.account.discard()
+        self.future.cancel()
+
+    def result(self) -> Any:
+        return self.future.result()
+
+    async def result_async(self) -> Any:
+        return await self.future
+
+def speculate(
+    tracker: LatencyTracker, agent_name: str, fn: Callable[..., Any], *args: Any
+) -> Optional[Speculation]:
+    """Start ``fn(*args)`` on a background thread as a speculative run; None when over budget."""
+    if not tracker.reserve(tracker.policy.speculation_tokens):
+        return None
+    speculation = Speculation(tracker, agent_name, tracker.policy.speculation_tokens, args)
+    speculation.future = _speculation_pool().submit(speculation.context().run, fn, *args)
+    return speculation
+
+def speculate_async(
+    tracker: LatencyTracker, agent_name: str, fn: Callable[..., Any], *args: Any
+) -> Optional[Speculation]:
+    """Start the coroutine ``fn(*args)`` as a speculative task; None when over budget."""
+    if not tracker.reserve(tracker.policy.speculation_tokens):
+        return None
+    speculation = Speculation(tracker, agent_name, tracker.policy.speculation_tokens, args)
+    speculation.future = asyncio.get_running_loop().create_task(fn(*args), context=speculation.context())
+    return speculation
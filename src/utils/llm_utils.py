@@ -1,22 +1,657 @@
-import openai
-from typing import List, Dict, Any
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+from dataclasses import dataclass
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
 
-def setup_openai(api_key: str) -> None:
-    """Setup OpenAI with the provided API key."""
-    openai.api_key = api_key
+from .context_budget import count_message_tokens
+from .latency import LatencyPolicy, LatencyTracker, SpeculationCancelled, spend_account
+from .model_policy import current_stage, get_model_policy, record_stage_usage
+from .tracing import current_span, span
+
+# The SDK takes about half a second to import, so it is loaded with the first client.
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+    from .cache import BaseCompletionCache
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[type, ...]:
+    """Errors worth retrying; everything else (auth, bad request, ...) fails fast."""
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    return (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+@dataclass
+class CallMetrics:
+    """Latency and token usage of a single completion call."""
+    model: str
+    latency: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    attempts: int = 1
+    error: Optional[str] = None
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` requests per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class LLMClient:
+    """Pooled OpenAI client shared by every component that needs completions.
+
+    Connections are kept alive in bounded HTTP/2 pools, requests are paced by
+    per-model token buckets and transient failures are retried with jittered
+    exponential backoff. Every call is recorded in ``metrics``. When a
+    ``cache`` is configured, chat and function-calling requests consult it
+    before the network.
+
+    With a ``latency_policy``, non-streaming requests are hedged: a slow
+    request gets a duplicate and the first response wins (see
+    ``LatencyPolicy``). ``latency`` then tracks the extra spend and wins.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        rate_limits: Optional[Dict[str, float]] = None,
+        default_rate_limit: Optional[float] = None,
+        metrics_window: int = 1000,
+        cache: Optional["BaseCompletionCache"] = None,
+        latency_policy: Optional[LatencyPolicy] = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.http2 = http2
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.default_rate_limit = default_rate_limit
+        self.max_connections = max_connections
+        self.cache = cache
+        self.latency = LatencyTracker(latency_policy) if latency_policy else None
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+
+        import httpx
+        from openai import OpenAI
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.metrics: Deque[CallMetrics] = deque(maxlen=metrics_window)
+        self._totals: Dict[str, Dict[str, int]] = {}  # Per-model counters, never windowed
+        self._totals_lock = threading.Lock()
+
+        self._buckets = {
+            model: TokenBucket(rate) for model, rate in (rate_limits or {}).items()
+        }
+        self._buckets_lock = threading.Lock()
+
+        # Retries are handled here so that they share the rate limiter.
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            timeout=timeout,
+            http_client=httpx.Client(limits=self.limits, http2=http2, timeout=timeout)
+        )
+        self._async_client: Optional["AsyncOpenAI"] = None
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        """Async SDK client sharing this client's pool settings, created on first use."""
+        if self._async_client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,
+                timeout=self.timeout,
+                http_client=httpx.AsyncClient(
+                    limits=self.limits, http2=self.http2, timeout=self.timeout
+                )
+            )
+        return self._async_client
+
+    def create(self, messages: List[Dict[str, str]], model: str = DEFAULT_MODEL, **kwargs) -> Any:
+        """Create a chat completion and return the raw SDK response."""
+        start = time.perf_counter()
+        if self.latency and self.latency.policy.hedge:
+            response, attempts = self._hedged_request(messages, model, start, **kwargs)
+        else:
+            response, attempts = self._request(messages, model, start, **kwargs)
+        self._record(model, start, getattr(response, "usage", None), attempts)
+        return response
+
+    async def acreate(self, messages: List[Dict[str, str]], model: str = DEFAULT_MODEL, **kwargs) -> Any:
+        """Async counterpart of ``create``."""
+        start = time.perf_counter()
+        if self.latency and self.latency.policy.hedge:
+            response, attempts = await self._ahedged_request(messages, model, start, **kwargs)
+        else:
+            response, attempts = await self._arequest(messages, model, start, **kwargs)
+        self._record(model, start, getattr(response, "usage", None), attempts)
+        return response
+
+    def _request(self, messages: List[Dict[str, str]], model: str, start: float, **kwargs) -> Tuple[Any, int]:
+        """Send a request with rate limiting and retries; return (response, attempts)."""
+        bucket = self._bucket(model)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_account()
+            if bucket:
+                bucket.acquire()
+            try:
+                return self.client.chat.completions.create(
+                    model=model, messages=messages, **kwargs
+                ), attempt
+            except retryable_errors() as e:
+                if attempt > self.max_retries:
+                    self._record(model, start, None, attempt, e)
+                    raise
+                time.sleep(self._backoff(attempt, e))
+            except Exception as e:
+                self._record(model, start, None, attempt, e)
+                raise
+
+    async def _arequest(self, messages: List[Dict[str, str]], model: str, start: float, **kwargs) -> Tuple[Any, int]:
+        """Async counterpart of ``_request``."""
+        bucket = self._bucket(model)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_account()
+            if bucket:
+                await bucket.acquire_async()
+            try:
+                return await self.async_client.chat.completions.create(
+                    model=model, messages=messages, **kwargs
+                ), attempt
+            except retryable_errors() as e:
+                if attempt > self.max_retries:
+                    self._record(model, start, None, attempt, e)
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+            except Exception as e:
+                self._record(model, start, None, attempt, e)
+                raise
+
+    def _hedged_request(self, messages: List[Dict[str, str]], model: str, start: float, **kwargs) -> Tuple[Any, int]:
+        """``_request``, plus a duplicate if it is slower than the hedge delay; the first response wins.
+
+        The losing request cannot be interrupted and is left to finish; its
+        tokens are counted as extra spend.
+        """
+        delay = self._hedge_delay(model)
+        if delay is None:
+            return self._request(messages, model, start, **kwargs)
+        pool = self._hedge_threads()
+        primary = pool.submit(copy_context().run, self._request, messages, model, start, **kwargs)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        if not self.latency.reserve(count_message_tokens(messages, model)):
+            return primary.result()
+
+        self.latency.count("hedges_sent")
+        current_span().set(hedged=True)
+        hedge = pool.submit(copy_context().run, self._request, messages, model, time.perf_counter(), **kwargs)
+        racers, error = {primary, hedge}, None
+        while racers:
+            done, racers = wait(racers, return_when=FIRST_COMPLETED)
+            for winner in done:
+                if winner.exception() is None:
+                    finished = time.perf_counter()
+                    if winner is hedge:
+                        self.latency.count("hedge_wins")
+                        current_span().set(hedge_won=True)
+                    for loser in racers | (done - {winner}):
+                        loser.add_done_callback(
+                            lambda future, original=loser is primary: self._settle_loser(
+                                future, model, start, finished if original else None
+                            )
+                        )
+                    return winner.result()
+                error = error or winner.exception()
+        raise error
+
+    async def _ahedged_request(
+        self, messages: List[Dict[str, str]], model: str, start: float, **kwargs
+    ) -> Tuple[Any, int]:
+        """Async counterpart of ``_hedged_request``; the losing request is cancelled."""
+        delay = self._hedge_delay(model)
+        if delay is None:
+            return await self._arequest(messages, model, start, **kwargs)
+        primary = asyncio.ensure_future(self._arequest(messages, model, start, **kwargs))
+        racers = {primary}
+        try:
+            done, _ = await asyncio.wait(racers, timeout=delay)
+            if done or not self.latency.reserve(count_message_tokens(messages, model)):
+                return await primary
+
+            self.latency.count("hedges_sent")
+            current_span().set(hedged=True)
+            hedge = asyncio.ensure_future(self._arequest(messages, model, time.perf_counter(), **kwargs))
+            racers.add(hedge)
+            error = None
+            while racers:
+                done, racers = await asyncio.wait(racers, return_when=asyncio.FIRST_COMPLETED)
+                for winner in done:
+                    if winner.exception() is None:
+                        if winner is hedge:
+                            self.latency.count("hedge_wins")
+                            current_span().set(hedge_won=True)
+                        for loser in done - {winner}:
+                            self._settle_loser(loser, model, start, None)
+                        return winner.result()
+                    error = error or winner.exception()
+            raise error
+        finally:
+            for task in racers:
+                task.cancel()
+
+    def _settle_loser(self, future: Any, model: str, start: float, winner_finished: Optional[float]) -> None:
+        """Record a completed losing request and charge its completion tokens."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        response, attempts = future.result()
+        usage = getattr(response, "usage", None)
+        self._record(model, start, usage, attempts)
+        # Its prompt was charged when the hedge was sent.
+        self.latency.charge(getattr(usage, "completion_tokens", 0) or 0)
+        if winner_finished is not None:
+            self.latency.count("hedge_saved_s", time.perf_counter() - winner_finished)
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None to not hedge."""
+        policy = self.latency.policy
+        if policy.hedge_delay is not None:
+            return policy.hedge_delay
+        latencies = sorted(m.latency for m in list(self.metrics) if m.model == model and not m.error)
+        if len(latencies) < policy.hedge_min_samples:
+            return None
+        return _percentile(latencies, 95)
+
+    def _hedge_threads(self) -> ThreadPoolExecutor:
+        with self._buckets_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="llm-hedge")
+            return self._hedge_pool
+
+    @staticmethod
+    def _check_account() -> None:
+        account = spend_account()
+        if account is not None and account.cancelled:
+            raise SpeculationCancelled(
+                "Speculative run discarded" if account.discarded else "Speculative run over max_extra_tokens"
+            )
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        use_cache: bool = True,
+        **kwargs
+    ) -> str:
+        """Create a chat completion and return the message content."""
+        with span("llm", model=model) as llm_span:
+            cache = self.cache if use_cache else None
+            if cache is not None:
+                cached = cache.get(model, messages, kwargs.get("temperature"))
+                llm_span.set(cache="miss" if cached is None else "hit")
+                if cached is not None:
+                    return cached
+
+            content = self.create(messages, model=model, **kwargs).choices[0].message.content
+            if cache is not None and content is not None:
+                cache.set(model, messages, kwargs.get("temperature"), content)
+            return content
+
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        use_cache: bool = True,
+        **kwargs
+    ) -> str:
+        """Async counterpart of ``chat``."""
+        with span("llm", model=model) as llm_span:
+            cache = self.cache if use_cache else None
+            if cache is not None:
+                cached = cache.get(model, messages, kwargs.get("temperature"))
+                llm_span.set(cache="miss" if cached is None else "hit")
+                if cached is not None:
+                    return cached
+
+            response = await self.acreate(messages, model=model, **kwargs)
+            content = response.choices[0].message.content
+            if cache is not None and content is not None:
+                cache.set(model, messages, kwargs.get("temperature"), content)
+            return content
+
+    def chat_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        model: str = DEFAULT_MODEL,
+        tool_choice: Any = "auto",
+        use_cache: bool = True,
+        **kwargs
+    ) -> Any:
+        """Create a completion with function calling and return the assistant message.
+
+        Cached replies come back as a light copy with the same ``content``
+        and ``tool_calls`` attributes.
+        """
+        with span("llm", model=model, tools=len(tools)) as llm_span:
+            cache = self.cache if use_cache else None
+            if cache is not None:
+                cached = cache.get(model, messages, kwargs.get("temperature"), tools, tool_choice)
+                llm_span.set(cache="miss" if cached is None else "hit")
+                if cached is not None:
+                    return _message_from_cache(cached)
+
+            response = self.create(messages, model=model, tools=tools, tool_choice=tool_choice, **kwargs)
+            message = response.choices[0].message
+            if cache is not None:
+                cache.set(model, messages, kwargs.get("temperature"), _message_to_cache(message), tools, tool_choice)
+            return message
+
+    async def achat_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        model: str = DEFAULT_MODEL,
+        tool_choice: Any = "auto",
+        use_cache: bool = True,
+        **kwargs
+    ) -> Any:
+        """Async counterpart of ``chat_tools``."""
+        with span("llm", model=model, tools=len(tools)) as llm_span:
+            cache = self.cache if use_cache else None
+            if cache is not None:
+                cached = cache.get(model, messages, kwargs.get("temperature"), tools, tool_choice)
+                llm_span.set(cache="miss" if cached is None else "hit")
+                if cached is not None:
+                    return _message_from_cache(cached)
+
+            response = await self.acreate(messages, model=model, tools=tools, tool_choice=tool_choice, **kwargs)
+            message = response.choices[0].message
+            if cache is not None:
+                cache.set(model, messages, kwargs.get("temperature"), _message_to_cache(message), tools, tool_choice)
+            return message
+
+    def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        use_cache: bool = True,
+        **kwargs
+    ) -> Iterator[str]:
+        """Stream a chat completion, yielding content deltas as they arrive.
+
+        Retries only happen before the first chunk; a cached completion is
+        yielded as a single delta.
+        """
+        with span("llm", model=model, stream=True) as llm_span:
+            cache = self.cache if use_cache else None
+            if cache is not None:
+                cached = cache.get(model, messages, kwargs.get("temperature"))
+                llm_span.set(cache="miss" if cached is None else "hit")
+                if cached is not None:
+                    yield cached
+                    return
+
+            start = time.perf_counter()
+            stage = current_stage()
+            stream, attempts = self._request(
+                messages, model, start, stream=True, stream_options={"include_usage": True}, **kwargs
+            )
+            usage, parts = None, []
+            try:
+                for chunk in stream:
+                    usage = chunk.usage or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not parts:
+                            llm_span.set(first_token_ms=round((time.perf_counter() - start) * 1000, 1))
+                        parts.append(chunk.choices[0].delta.content)
+                        yield parts[-1]
+            finally:
+                stream.close()
+                self._record(model, start, usage, attempts, trace_span=llm_span, stage=stage)
+            if cache is not None:
+                cache.set(model, messages, kwargs.get("temperature"), "".join(parts))
+
+    async def astream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        use_cache: bool = True,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Async counterpart of ``stream_chat``."""
+        with span("llm", model=model, stream=True) as llm_span:
+            cache = self.cache if use_cache else None
+            if cache is not None:
+                cached = cache.get(model, messages, kwargs.get("temperature"))
+                llm_span.set(cache="miss" if cached is None else "hit")
+                if cached is not None:
+                    yield cached
+                    return
+
+            start = time.perf_counter()
+            stage = current_stage()
+            stream, attempts = await self._arequest(
+                messages, model, start, stream=True, stream_options={"include_usage": True}, **kwargs
+            )
+            usage, parts = None, []
+            try:
+                async for chunk in stream:
+                    usage = chunk.usage or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not parts:
+                            llm_span.set(first_token_ms=round((time.perf_counter() - start) * 1000, 1))
+                        parts.append(chunk.choices[0].delta.content)
+                        yield parts[-1]
+            finally:
+                await stream.close()
+                self._record(model, start, usage, attempts, trace_span=llm_span, stage=stage)
+            if cache is not None:
+                cache.set(model, messages, kwargs.get("temperature"), "".join(parts))
+
+    def metrics_summary(self) -> Dict[str, Dict[str, float]]:
+        """Aggregate the recorded call metrics per model."""
+        by_model: Dict[str, List[CallMetrics]] = {}
+        for metric in list(self.metrics):
+            by_model.setdefault(metric.model, []).append(metric)
+
+        summary = {}
+        for model, calls in by_model.items():
+            latencies = sorted(m.latency for m in calls)
+            summary[model] = {
+                "calls": len(calls),
+                "errors": sum(1 for m in calls if m.error),
+                "retries": sum(m.attempts - 1 for m in calls),
+                "latency_p50": _percentile(latencies, 50),
+                "latency_p95": _percentile(latencies, 95),
+                "prompt_tokens": sum(m.prompt_tokens for m in calls),
+                "completion_tokens": sum(m.completion_tokens for m in calls)
+            }
+        return summary
+
+    def usage_totals(self) -> Dict[str, Dict[str, int]]:
+        """Calls and tokens per model since the client was created."""
+        with self._totals_lock:
+            return {model: dict(totals) for model, totals in self._totals.items()}
+
+    def latency_report(self) -> Dict[str, Any]:
+        """Hedging and speculation counters, empty unless a latency policy is set."""
+        return self.latency.report() if self.latency else {}
+
+    def close(self) -> None:
+        """Release pooled connections."""
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        self.client.close()
+
+    def _bucket(self, model: str) -> Optional[TokenBucket]:
+        if model not in self._buckets and self.default_rate_limit:
+            with self._buckets_lock:
+                self._buckets.setdefault(model, TokenBucket(self.default_rate_limit))
+        return self._buckets.get(model)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, honouring ``Retry-After`` when sent."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max) + random.uniform(0, self.backoff_base)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _record(
+        self,
+        model: str,
+        start: float,
+        usage: Any,
+        attempts: int,
+        error: Optional[Exception] = None,
+        trace_span: Any = None,
+        stage: Any = None
+    ) -> None:
+        metric = CallMetrics(
+            model=model,
+            latency=time.perf_counter() - start,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            attempts=attempts,
+            error=str(error) if error else None
+        )
+        self.metrics.append(metric)
+        account = spend_account()
+        if account is not None:
+            account.add(metric.prompt_tokens + metric.completion_tokens)
+        # Streams may finish in another context, so they pass their span and stage.
+        record_stage_usage(model, metric.prompt_tokens, metric.completion_tokens, stage)
+        with self._totals_lock:
+            totals = self._totals.setdefault(model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += metric.prompt_tokens
+            totals["completion_tokens"] += metric.completion_tokens
+        llm_span = trace_span or current_span()
+        llm_span.add("prompt_tokens", metric.prompt_tokens)
+        llm_span.add("completion_tokens", metric.completion_tokens)
+        llm_span.add("retries", attempts - 1)
+
+def _message_to_cache(message: Any) -> str:
+    """Serialize an assistant message's content and tool calls for the completion cache."""
+    return json.dumps({
+        "content": message.content,
+        "tool_calls": [
+            {"id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+            for call in message.tool_calls or []
+        ]
+    })
+
+def _message_from_cache(text: str) -> SimpleNamespace:
+    payload = json.loads(text)
+    return SimpleNamespace(content=payload["content"], tool_calls=[
+        SimpleNamespace(
+            id=call["id"], type="function",
+            function=SimpleNamespace(name=call["name"], arguments=call["arguments"])
+        )
+        for call in payload["tool_calls"]
+    ] or None)
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+_shared_client: Optional[LLMClient] = None
+_shared_lock = threading.Lock()
+
+def setup_openai(api_key: str, **client_options) -> LLMClient:
+    """Setup the shared LLM client with the provided API key."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+        _shared_client = LLMClient(api_key=api_key, **client_options)
+        return _shared_client
+
+def get_llm_client(api_key: Optional[str] = None) -> LLMClient:
+    """Return the shared LLM client, creating it on first use."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        return _shared_client
 
 def create_chat_completion(
-    messages: List[Dict[str, str]], 
-    model: str = "gpt-4-turbo",
+    messages: List[Dict[str, str]],
+    model: Optional[str] = None,
     temperature: float = 0.7
 ) -> str:
-    """Create a chat completion using OpenAI's API."""
+    """Create a chat completion using the shared LLM client.
+
+    ``model`` defaults to the model policy's synthesis model.
+    """
     try:
-        response = openai.ChatCompletion.create(
-            model=model,
-            messages=messages,
-            temperature=temperature
-        )
-        return response.choices[0].message.content
+        model = model or get_model_policy().model("synthesis")
+        return get_llm_client().chat(messages, model=model, temperature=temperature)
     except Exception as e:
-        raise Exception(f"Error in chat completion: {str(e)}") 
\ No newline at end of file
+        raise Exception(f"Error in chat completion: {str(e)}")
@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .tracing import current_span
+
+T = TypeVar("T")
+
+# USD per 1K (prompt, completion) tokens, used for cost estimates.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4": (0.03, 0.06),
+}
+
+# Pipeline stages that pick their model from the policy:
+#   routing             choosing an agent (ChatManager, MessageHandler)
+#   tool_selection      an agent's tool-calling steps
+#   synthesis           answering from retrieved material
+#   response            phrasing the final reply to the user
+#   summarization       condensing conversation history evicted from prompts
+STAGES = ("routing", "tool_selection", "synthesis", "response", "summarization")
+
+# Failures of a model to produce usable output, answered by the fallback model.
+PARSE_ERRORS = (ValueError, KeyError)
+
+def estimate_cost(usage: Dict[str, Dict[str, int]], prices: Optional[Dict[str, Tuple[float, float]]] = None) -> float:
+    """Estimated USD cost of per-model token usage; unknown models count as free."""
+    prices = prices or MODEL_PRICES
+    cost = 0.0
+    for model, totals in usage.items():
+        prompt_price, completion_price = prices.get(model, (0.0, 0.0))
+        cost += totals["prompt_tokens"] / 1000 * prompt_price
+        cost += totals["completion_tokens"] / 1000 * completion_price
+    return cost
+
+@dataclass
+class StagePolicy:
+    """Model for one stage, and the larger model to escalate to."""
+    model: str
+    fallback: Optional[str] = None  # Retried on parse failure or rejected output
+    min_confidence: Optional[float] = None  # Below this input confidence, start with the fallback
+
+DEFAULT_STAGE_POLICIES: Dict[str, StagePolicy] = {
+    "routing": StagePolicy("gpt-3.5-turbo", fallback="gpt-4-turbo"),
+    "tool_selection": StagePolicy("gpt-3.5-turbo", fallback="gpt-4-turbo"),
+    "synthesis": StagePolicy("gpt-4-turbo"),
+    "response": StagePolicy("gpt-3.5-turbo"),
+    "summarization": StagePolicy("gpt-3.5-turbo"),
+}
+
+@dataclass
+class StageStats:
+    """Counters for one stage; tokens and cost cover every model it used."""
+    calls: int = 0
+    escalations: int = 0
+    failures: int = 0
+    latency_s: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    models: Dict[str, int] = field(default_factory=dict)  # Calls per model
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000), repr=False)
+
+_current_stage: ContextVar[Optional[Tuple["ModelPolicy", str]]] = ContextVar("current_stage", default=None)
+
+def current_stage() -> Optional[Tuple["ModelPolicy", str]]:
+    """The policy and stage accounting LLM calls in this context, if any."""
+    return _current_stage.get()
+
+def record_stage_usage(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    stage: Optional[Tuple["ModelPolicy", str]] = None
+) -> None:
+    """Attribute a completion's tokens to ``stage``, or the stage running in this context, if any."""
+    current = stage or _current_stage.get()
+    if current is not None:
+        policy, stage = current
+        policy._add_usage(stage, model, prompt_tokens, completion_tokens)
+
+class ModelPolicy:
+    """Chooses the model for each pipeline stage and accounts for it.
+
+    Each stage in ``STAGES`` has a ``StagePolicy``. ``run`` calls a stage
+    with its model and, when the output cannot be parsed or is rejected by
+    ``accept``, once more with the fallback model. Latency, escalations,
+    tokens and estimated cost are kept per stage (see ``report``).
+
+    Policies can be loaded from JSON (``from_file``), so models can be
+    changed without code changes; stages left out keep their defaults.
+    """
+
+    def __init__(
+        self,
+        stages: Optional[Dict[str, StagePolicy]] = None,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        self.stages = {**DEFAULT_STAGE_POLICIES, **(stages or {})}
+        self.prices = {**MODEL_PRICES, **(prices or {})}
+        self.stats = {name: StageStats() for name in self.stages}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "ModelPolicy":
+        """Load ``{"stages": {name: {"model", "fallback", "min_confidence"}}, "prices": {model: [prompt, completion]}}``."""
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        unknown = set(config.get("stages", {})) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown stages in {path}: {', '.join(sorted(unknown))}")
+        return cls(
+            stages={name: StagePolicy(**options) for name, options in config.get("stages", {}).items()},
+            prices={model: tuple(price) for model, price in config.get("prices", {}).items()}
+        )
+
+    def model(self, stage: str) -> str:
+        """The model a stage starts with."""
+        return self.stages[stage].model
+
+    @contextmanager
+    def stage(self, stage: str, model: Optional[str] = None) -> Iterator[str]:
+        """Account the LLM calls made inside the block to ``stage``; yields the model to use."""
+        model = model or self.model(stage)
+        token = _current_stage.set((self, stage))
+        start = time.perf_counter()
+        try:
+            yield model
+        finally:
+            try:
+                _current_stage.reset(token)
+            except ValueError:
+                pass  # exited in another context (e.g. a stream resumed elsewhere), which never saw it
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self.stats[stage]
+                stats.calls += 1
+                stats.latency_s += elapsed
+                stats.latencies.append(elapsed)
+                stats.models[model] = stats.models.get(model, 0) + 1
+
+    def run(
+        self,
+        stage: str,
+        fn: Callable[[str], T],
+        accept: Optional[Callable[[T], bool]] = None,
+        confidence: Optional[float] = None,
+        model: Optional[str] = None
+    ) -> T:
+        """Call ``fn(model)`` for ``stage``, escalating to the fallback model when needed.
+
+        ``model`` overrides the stage's first model; ``confidence`` is a
+        score of the stage's input (e.g. retrieval confidence) compared with
+        the stage's ``min_confidence``.
+        """
+        candidates = self._candidates(stage, confidence, model)
+        for index, name in enumerate(candidates):
+            last = index == len(candidates) - 1
+            if index:
+                self._count_escalation(stage)
+            with self.stage(stage, name):
+                try:
+                    result = fn(name)
+                except PARSE_ERRORS:
+                    self._count_failure(stage)
+                    if last:
+                        raise
+                    continue
+            if last or accept is None or accept(result):
+                return result
+            self._count_failure(stage)
+
+    async def run_async(
+        self,
+        stage: str,
+        fn: Callable[[str], Awaitable[T]],
+        accept: Optional[Callable[[T], bool]] = None,
+        confidence: Optional[float] = None,
+        model: Optional[str] = None
+    ) -> T:
+        """Async counterpart of ``run``."""
+        candidates = self._candidates(stage, confidence, model)
+        for index, name in enumerate(candidates):
+            last = index == len(candidates) - 1
+            if index:
+                self._count_escalation(stage)
+            with self.stage(stage, name):
+                try:
+                    result = await fn(name)
+                except PARSE_ERRORS:
+                    self._count_failure(stage)
+                    if last:
+                        raise
+                    continue
+            if last or accept is None or accept(result):
+                return result
+            self._count_failure(stage)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage calls, escalations, latency, tokens and estimated cost."""
+        report = {}
+        with self._lock:
+            for name, stats in self.stats.items():
+                if not stats.calls:
+                    continue
+                latencies = sorted(stats.latencies)
+                report[name] = {
+                    "calls": stats.calls,
+                    "escalations": stats.escalations,
+                    "failures": stats.failures,
+                    "latency_mean_s": stats.latency_s / stats.calls,
+                    "latency_p95_s": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cost_usd": stats.cost_usd,
+                    "models": dict(stats.models)
+                }
+        return report
+
+    def _candidates(self, stage: str, confidence: Optional[float], model: Optional[str]) -> List[str]:
+        policy = self.stages[stage]
+        first = model or policy.model
+        if (
+            policy.fallback and confidence is not None and policy.min_confidence is not None
+            and confidence < policy.min_confidence
+        ):
+            self._count_escalation(stage)
+            return [policy.fallback]
+        return [first, policy.fallback] if policy.fallback and policy.fallback != first else [first]
+
+    def _count_failure(self, stage: str) -> None:
+        with self._lock:
+            self.stats[stage].failures += 1
+
+    def _count_escalation(self, stage: str) -> None:
+        with self._lock:
+            self.stats[stage].escalations += 1
+        current_span().set(escalated=stage)
+
+    def _add_usage(self, stage: str, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        prompt_price, completion_price = self.prices.get(model, (0.0, 0.0))
+        with self._lock:
+            stats = self.stats[stage]
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost_usd += prompt_tokens / 1000 * prompt_price + completion_tokens / 1000 * completion_price
+
+_policy: Optional[ModelPolicy] = None
+_policy_lock = threading.Lock()
+
+def configure_model_policy(policy: ModelPolicy) -> ModelPolicy:
+    """Replace the process-wide model policy."""
+    global _policy
+    with _policy_lock:
+        _policy = policy
+        return _policy
+
+def get_model_policy() -> ModelPolicy:
+    """Return the process-wide policy, loaded from MODEL_POLICY when that names a file."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            path = os.getenv("MODEL_POLICY")
+            _policy = ModelPolicy.from_file(path) if path else ModelPolicy()
+        return _policy
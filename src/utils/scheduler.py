@@ -0,0 +1,223 @@
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+@dataclass
+class TaskNode:
+    """A unit of work in a DAG.
+
+    ``fn`` receives a dict mapping each dependency id to its result. It may
+    be a coroutine function when the DAG is run with ``run_async``.
+    """
+    id: str
+    fn: Callable[[Dict[str, Any]], Any]
+    depends_on: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+
+@dataclass
+class TaskResult:
+    """Outcome of a node: status is ok, error, timeout or cancelled."""
+    id: str
+    status: str
+    value: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+def validate_dag(nodes: List[TaskNode]) -> List[str]:
+    """Check ids and dependencies, returning a topological order."""
+    by_id = {}
+    for node in nodes:
+        if node.id in by_id:
+            raise ValueError(f"Duplicate task id: {node.id}")
+        by_id[node.id] = node
+    for node in nodes:
+        for dep in node.depends_on:
+            if dep not in by_id:
+                raise ValueError(f"Task {node.id} depends on unknown task {dep}")
+
+    indegree = {node.id: len(node.depends_on) for node in nodes}
+    dependents: Dict[str, List[str]] = {node.id: [] for node in nodes}
+    for node in nodes:
+        for dep in node.depends_on:
+            dependents[dep].append(node.id)
+    ready = [node_id for node_id, degree in indegree.items() if degree == 0]
+    order = []
+    while ready:
+        node_id = ready.pop()
+        order.append(node_id)
+        for child in dependents[node_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    if len(order) != len(nodes):
+        raise ValueError("Task dependencies contain a cycle")
+    return order
+
+class DagScheduler:
+    """Runs independent tasks concurrently, respecting dependencies.
+
+    Sync runs use a shared thread pool; ``run_async`` uses the event loop,
+    offloading plain functions to threads. A node whose dependency failed,
+    timed out or was cancelled is cancelled. With ``fail_fast`` any failure
+    cancels all work that has not started yet.
+    """
+
+    def __init__(self, max_workers: int = 8, fail_fast: bool = False):
+        self.max_workers = max_workers
+        self.fail_fast = fail_fast
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Not used as a context manager: a timed-out task must not block
+        # the caller while its thread finishes in the background.
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="dag"
+                )
+            return self._executor
+
+    def run(self, nodes: List[TaskNode], timeout: Optional[float] = None) -> Dict[str, TaskResult]:
+        """Run the DAG on the thread pool and return results by node id."""
+        validate_dag(nodes)
+        by_id = {node.id: node for node in nodes}
+        results: Dict[str, TaskResult] = {}
+        running: Dict[Future, tuple] = {}
+        submitted = set()
+        deadline = time.monotonic() + timeout if timeout else None
+
+        def submit_ready() -> None:
+            for node in nodes:
+                if node.id in results or node.id in submitted:
+                    continue
+                deps = [results.get(dep) for dep in node.depends_on]
+                if any(dep is not None and not dep.ok for dep in deps):
+                    results[node.id] = TaskResult(node.id, "cancelled", error="dependency did not succeed")
+                elif all(dep is not None for dep in deps):
+                    inputs = {dep: results[dep].value for dep in node.depends_on}
+                    # Run in the caller's context so tracing spans nest correctly.
+                    future = self.executor.submit(contextvars.copy_context().run, node.fn, inputs)
+                    running[future] = (node.id, time.monotonic())
+                    submitted.add(node.id)
+
+        submit_ready()
+        while running:
+            now = time.monotonic()
+            wait_for = [
+                by_id[node_id].timeout - (now - started)
+                for node_id, started in running.values() if by_id[node_id].timeout
+            ]
+            if deadline:
+                wait_for.append(deadline - now)
+            done, _ = wait(running, timeout=max(0.0, min(wait_for)) if wait_for else None,
+                           return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for future in list(running):
+                node_id, started = running[future]
+                node = by_id[node_id]
+                if future in done:
+                    del running[future]
+                    error = future.exception()
+                    results[node_id] = (
+                        TaskResult(node_id, "error", error=str(error), duration=now - started)
+                        if error else
+                        TaskResult(node_id, "ok", value=future.result(), duration=now - started)
+                    )
+                elif (node.timeout and now - started >= node.timeout) or (deadline and now >= deadline):
+                    del running[future]
+                    future.cancel()
+                    results[node_id] = TaskResult(
+                        node_id, "timeout", error=f"timed out after {now - started:.1f}s", duration=now - started
+                    )
+
+            failed = any(not r.ok for r in results.values())
+            if (self.fail_fast and failed) or (deadline and time.monotonic() >= deadline):
+                break
+            submit_ready()
+
+        for future, (node_id, started) in running.items():
+            future.cancel()
+            results[node_id] = TaskResult(node_id, "cancelled", duration=time.monotonic() - started)
+        for node in nodes:
+            results.setdefault(node.id, TaskResult(node.id, "cancelled"))
+        return results
+
+    async def run_async(self, nodes: List[TaskNode], timeout: Optional[float] = None) -> Dict[str, TaskResult]:
+        """Run the DAG on the event loop and return results by node id."""
+        tasks: Dict[str, asyncio.Task] = {}
+        results: Dict[str, TaskResult] = {}
+
+        async def run_node(node: TaskNode) -> TaskResult:
+            deps = [await tasks[dep] for dep in node.depends_on]
+            if any(not dep.ok for dep in deps):
+                return TaskResult(node.id, "cancelled", error="dependency did not succeed")
+            inputs = {dep.id: dep.value for dep in deps}
+            started = time.monotonic()
+            if inspect.iscoroutinefunction(node.fn):
+                call = node.fn(inputs)
+            else:
+                call = asyncio.to_thread(node.fn, inputs)
+            try:
+                value = await asyncio.wait_for(call, node.timeout)
+            except asyncio.TimeoutError:
+                return TaskResult(node.id, "timeout", error=f"timed out after {node.timeout}s",
+                                  duration=time.monotonic() - started)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result = TaskResult(node.id, "error", error=str(e), duration=time.monotonic() - started)
+                if self.fail_fast:
+                    for task in tasks.values():
+                        if task is not asyncio.current_task():
+                            task.cancel()
+                return result
+            return TaskResult(node.id, "ok", value=value, duration=time.monotonic() - started)
+
+        by_id = {node.id: node for node in nodes}
+        for node_id in validate_dag(nodes):
+            tasks[node_id] = asyncio.create_task(run_node(by_id[node_id]))
+
+        done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        for node_id, task in tasks.items():
+            if task in done and not task.cancelled():
+                results[node_id] = task.result()
+            else:
+                results[node_id] = TaskResult(node_id, "cancelled")
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return results
+
+    def shutdown(self) -> None:
+        """Stop the thread pool without waiting for running tasks."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+_schedulers: Dict[str, DagScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(name: str = "default") -> DagScheduler:
+    """Return a named process-wide scheduler.
+
+    Nested DAGs (e.g. tool calls inside delegated agents) should use a
+    different name than their parent so they cannot starve its pool.
+    """
+    with _schedulers_lock:
+        if name not in _schedulers:
+            _schedulers[name] = DagScheduler()
+        return _schedulers[name]
@@ -0,0 +1,311 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+class StructuredOutputError(ValueError):
+    """Raised when no JSON value can be recovered from model output."""
+
+# Parameter.type values mapped to JSON schema fragments.
+PARAMETER_TYPES = {
+    "string": {"type": "string"},
+    "integer": {"type": "integer"},
+    "number": {"type": "number"},
+    "float": {"type": "number"},
+    "boolean": {"type": "boolean"},
+    "array": {"type": "array", "items": {}},
+    "object": {"type": "object"},
+}
+
+_LITERALS = ("true", "false", "null")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_PYTHON_LITERAL_RE = re.compile(r"\b(True|False|None)\b")
+
+class IncrementalJsonParser:
+    """Recovers a JSON value from streamed or slightly malformed model output.
+
+    Text before the first ``{`` or ``[`` (prose, code fences) and after the
+    top-level value is ignored. ``value()`` closes open strings, literals and
+    containers, so a partial stream yields the object parsed so far.
+    Feeding is linear in the input; state is kept between chunks.
+    """
+
+    def __init__(self):
+        self._buf: List[str] = []
+        self._stack: List[List[str]] = []  # [bracket, expected next token]
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._literal = ""
+        self.started = False
+        self.complete = False
+
+    def feed(self, chunk: str) -> None:
+        for char in chunk:
+            if self.complete:
+                return
+            if not self.started:
+                if char not in "{[":
+                    continue
+                self.started = True
+            self._consume(char)
+
+    def _consume(self, char: str) -> None:
+        self._buf.append(char)
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                self._stack[-1][1] = "colon" if self._string_is_key else "comma"
+            return
+
+        frame = self._stack[-1] if self._stack else None
+        if char.isalnum() or char in ".+-":
+            self._literal += char
+            frame[1] = "comma"
+            return
+        self._literal = ""
+
+        if char == '"':
+            self._in_string = True
+            self._string_is_key = frame[0] == "{" and frame[1] == "key"
+        elif char in "{[":
+            self._stack.append([char, "key" if char == "{" else "value"])
+        elif char in "}]":
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] = "comma"
+            else:
+                self.complete = True
+        elif char == ":":
+            frame[1] = "value"
+        elif char == ",":
+            frame[1] = "key" if frame[0] == "{" else "value"
+
+    def text(self) -> str:
+        """The buffered JSON text, completed so that it can be parsed."""
+        text = "".join(self._buf)
+        if self.complete or not self.started:
+            return text
+        stack = [list(frame) for frame in self._stack]
+
+        if self._in_string:
+            if self._escape:
+                text = text[:-1]
+            text += '"'
+            stack[-1][1] = "colon" if self._string_is_key else "comma"
+        elif self._literal:
+            text = text[:-len(self._literal)] + _complete_literal(self._literal)
+            if not _complete_literal(self._literal):
+                stack[-1][1] = "value"
+
+        # Outer containers are mid-value: each holds the next open container.
+        for frame in stack[:-1]:
+            frame[1] = "comma"
+        for bracket, expect in reversed(stack):
+            text = text.rstrip()
+            if bracket == "{":
+                if expect == "colon":
+                    text += ":null"
+                elif expect == "value":
+                    text += "null"
+                elif expect == "key" and text.endswith(","):
+                    text = text[:-1]
+                text += "}"
+            else:
+                if expect == "value" and text.endswith(","):
+                    text = text[:-1]
+                text += "]"
+        return text
+
+    def value(self) -> Any:
+        """Parse the buffered text; raises StructuredOutputError if impossible."""
+        if not self.started:
+            raise StructuredOutputError("No JSON object found in model output")
+        return _loads_repaired(self.text())
+
+def _complete_literal(literal: str) -> str:
+    for word in _LITERALS:
+        if word.startswith(literal):
+            return word
+    return literal.rstrip(".eE+-")
+
+def _loads_repaired(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    repaired = _TRAILING_COMMA_RE.sub(r"\1", text)
+    repaired = _PYTHON_LITERAL_RE.sub(lambda m: _PYTHON_LITERALS[m.group(1)], repaired)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Could not repair model JSON: {e.msg}") from None
+
+def parse_json(text: str) -> Any:
+    """Parse JSON from model output, extracting and repairing it if needed."""
+    try:
+        return json.loads(text)
+    except (TypeError, json.JSONDecodeError):
+        pass
+    parser = IncrementalJsonParser()
+    parser.feed(text or "")
+    return parser.value()
+
+def parameter_schema(param_type: str, description: str = "") -> Dict[str, Any]:
+    """JSON schema for a ``Parameter.type`` value."""
+    schema = dict(PARAMETER_TYPES.get(param_type, {"type": "string"}))
+    if description:
+        schema["description"] = description
+    return schema
+
+def function_tool(
+    name: str,
+    description: str,
+    properties: Optional[Dict[str, Dict[str, Any]]] = None,
+    required: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """An OpenAI ``tools`` entry describing one callable function."""
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {
+                "type": "object",
+                "properties": properties or {},
+                "required": list(required)
+            }
+        }
+    }
+
+@dataclass
+class ToolCall:
+    """A function call requested by the model, with parsed arguments."""
+    id: str
+    name: str
+    raw_arguments: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def as_message(self) -> Dict[str, Any]:
+        """The call as it appears in an assistant message."""
+        return {
+            "id": self.id,
+            "type": "function",
+            "function": {"name": self.name, "arguments": self.raw_arguments}
+        }
+
+def parse_tool_calls(message: Any, tools: Sequence[Dict[str, Any]]) -> List[ToolCall]:
+    """Parse and check the tool calls of an assistant message.
+
+    Arguments are parsed leniently; unknown functions, unparseable arguments
+    and missing required parameters are recorded in ``ToolCall.error``.
+    """
+    schemas = {tool["function"]["name"]: tool["function"]["parameters"] for tool in tools}
+    calls = []
+    for raw in getattr(message, "tool_calls", None) or []:
+        call = ToolCall(raw.id, raw.function.name, raw.function.arguments or "{}")
+        schema = schemas.get(call.name)
+        if schema is None:
+            call.error = f"Unknown function {call.name}"
+        else:
+            try:
+                arguments = parse_json(call.raw_arguments) if call.raw_arguments.strip() else {}
+                if not isinstance(arguments, dict):
+                    raise StructuredOutputError("Arguments must be a JSON object")
+                call.arguments = arguments
+                missing = [name for name in schema.get("required", []) if name not in arguments]
+                if missing:
+                    call.error = f"Missing required arguments: {', '.join(missing)}"
+            except StructuredOutputError as e:
+                call.error = str(e)
+        calls.append(call)
+    return calls
+
+def repair_messages(
+    messages: List[Dict[str, Any]],
+    call: ToolCall
+) -> List[Dict[str, Any]]:
+    """Messages asking the model to redo only ``call``, quoting its error."""
+    return [
+        *messages,
+        {"role": "assistant", "content": None, "tool_calls": [call.as_message()]},
+        {
+            "role": "tool",
+            "tool_call_id": call.id,
+            "content": f"Invalid call: {call.error}. Call {call.name} again with corrected arguments."
+        }
+    ]
+
+def forced_choice(name: str) -> Dict[str, Any]:
+    """``tool_choice`` value forcing the model to call function ``name``."""
+    return {"type": "function", "function": {"name": name}}
+
+def call_with_repair(
+    llm: Any,
+    messages: List[Dict[str, Any]],
+    tools: List[Dict[str, Any]],
+    model: str,
+    tool_choice: Any = "auto",
+    max_repairs: int = 1,
+    **kwargs
+) -> tuple[Any, List[ToolCall]]:
+    """Call ``llm`` with tools and re-ask only for calls that came back broken.
+
+    Returns the assistant message and its tool calls, with repaired calls
+    substituted in place.
+    """
+    message = llm.chat_tools(messages, tools, model=model, tool_choice=tool_choice, **kwargs)
+    calls = parse_tool_calls(message, tools)
+    known = {tool["function"]["name"] for tool in tools}
+    for index, call in enumerate(calls):
+        attempts = 0
+        while not call.ok and attempts < max_repairs and call.name in known:
+            attempts += 1
+            retry = llm.chat_tools(
+                repair_messages(messages, call), tools, model=model,
+                tool_choice=forced_choice(call.name), **kwargs
+            )
+            fixed = parse_tool_calls(retry, tools)
+            if fixed:
+                fixed[0].id = call.id
+                call = fixed[0]
+        calls[index] = call
+    return message, calls
+
+async def acall_with_repair(
+    llm: Any,
+    messages: List[Dict[str, Any]],
+    tools: List[Dict[str, Any]],
+    model: str,
+    tool_choice: Any = "auto",
+    max_repairs: int = 1,
+    **kwargs
+) -> tuple[Any, List[ToolCall]]:
+    """Async counterpart of ``call_with_repair``."""
+    message = await llm.achat_tools(messages, tools, model=model, tool_choice=tool_choice, **kwargs)
+    calls = parse_tool_calls(message, tools)
+    known = {tool["function"]["name"] for tool in tools}
+    for index, call in enumerate(calls):
+        attempts = 0
+        while not call.ok and attempts < max_repairs and call.name in known:
+            attempts += 1
+            retry = await llm.achat_tools(
+                repair_messages(messages, call), tools, model=model,
+                tool_choice=forced_choice(call.name), **kwargs
+            )
+            fixed = parse_tool_calls(retry, tools)
+            if fixed:
+                fixed[0].id = call.id
+                call = fixed[0]
+        calls[index] = call
+    return message, calls
@@ -0,0 +1,271 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterable, List, Optional, Union
+
+class Span:
+    """A timed stage of a turn, nested under the span active when it started."""
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "attributes",
+        "start_ns", "end_ns", "_start", "duration", "status", "error", "_trace", "_token"
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self._start = time.perf_counter()
+        self.duration = 0.0
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._trace: List["Span"] = parent._trace if parent else []
+        self._trace.append(self)
+        self._token = None
+
+    def set(self, **attributes: Any) -> None:
+        """Set attributes on the span."""
+        self.attributes.update(attributes)
+
+    def add(self, name: str, amount: Union[int, float] = 1) -> None:
+        """Increment a numeric attribute, e.g. a token count."""
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def record_error(self, error: Union[BaseException, str]) -> None:
+        """Mark the span as failed, including errors that are handled."""
+        self.status = "error"
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+    @property
+    def is_root(self) -> bool:
+        return self.parent_id is None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self._start
+        self.end_ns = self.start_ns + int(self.duration * 1e9)
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.record_error(exc)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            pass  # exited in another context (e.g. a generator resumed elsewhere), which never saw it
+        if self.is_root:
+            _tracer.export(self._trace)
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled; every method does nothing."""
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def add(self, name: str, amount: Union[int, float] = 1) -> None:
+        pass
+
+    def record_error(self, error: Union[BaseException, str]) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    async def __aenter__(self) -> "_NoopSpan":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class SpanExporter(ABC):
+    """Receives every finished trace as a list of spans, root first."""
+
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class RingBufferExporter(SpanExporter):
+    """Keeps the most recent ``max_traces`` traces in memory."""
+
+    def __init__(self, max_traces: int = 100):
+        self.traces: Deque[List[Span]] = deque(maxlen=max_traces)
+
+    def export(self, spans: List[Span]) -> None:
+        self.traces.append(spans)
+
+    def last(self) -> Optional[List[Span]]:
+        return self.traces[-1] if self.traces else None
+
+class JsonLinesExporter(SpanExporter):
+    """Appends one JSON object per span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(span.as_dict(), default=str) + "\n" for span in spans)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+class OtlpJsonExporter(JsonLinesExporter):
+    """Writes each trace as an OTLP/JSON ``ExportTraceServiceRequest`` line.
+
+    The files can be replayed into an OpenTelemetry collector or any backend
+    that accepts OTLP JSON.
+    """
+
+    def __init__(self, path: str, service_name: str = "agentic-ai"):
+        super().__init__(path)
+        self.service_name = service_name
+
+    def export(self, spans: List[Span]) -> None:
+        request = {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{
+                "scope": {"name": "src.utils.tracing"},
+                "spans": [_otlp_span(span) for span in spans]
+            }]
+        }]}
+        with self._lock:
+            self._file.write(json.dumps(request) + "\n")
+            self._file.flush()
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    converted = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            converted.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            converted.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            converted.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            converted.append({"key": key, "value": {"stringValue": str(value)}})
+    return converted
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    converted = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "status": {"code": 2, "message": span.error} if span.status == "error" else {"code": 1}
+    }
+    if span.parent_id:
+        converted["parentSpanId"] = span.parent_id
+    return converted
+
+class Tracer:
+    """Creates spans and hands finished traces to the exporters."""
+
+    def __init__(self):
+        self.enabled = False
+        self.exporters: List[SpanExporter] = []
+
+    def configure(self, exporters: Iterable[SpanExporter], enabled: bool = True) -> None:
+        for exporter in self.exporters:
+            exporter.close()
+        self.exporters = list(exporters)
+        self.enabled = enabled and bool(self.exporters)
+
+    def export(self, spans: List[Span]) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception:
+                pass  # tracing must never fail a turn
+
+_tracer = Tracer()
+
+def configure_tracing(*exporters: SpanExporter, enabled: bool = True) -> Tracer:
+    """Enable tracing with the given exporters; with none, tracing is off."""
+    _tracer.configure(exporters, enabled)
+    return _tracer
+
+def tracing_enabled() -> bool:
+    return _tracer.enabled
+
+def span(name: str, **attributes: Any) -> Union[Span, _NoopSpan]:
+    """Start a span as a context manager, nested under the current span."""
+    if not _tracer.enabled:
+        return NOOP_SPAN
+    return Span(name, _current_span.get(), attributes)
+
+def current_span() -> Union[Span, _NoopSpan]:
+    """The active span, or a no-op span when there is none."""
+    return _current_span.get() or NOOP_SPAN
+
+def record_error(error: Union[BaseException, str]) -> None:
+    """Record a handled error on the active span."""
+    current_span().record_error(error)
+
+def format_breakdown(spans: List[Span]) -> str:
+    """Render a trace as an indented per-stage timing table."""
+    if not spans:
+        return ""
+    children: Dict[Optional[str], List[Span]] = {}
+    for item in spans:
+        children.setdefault(item.parent_id, []).append(item)
+    total = spans[0].duration or 1e-9
+
+    lines = [f"{'stage':40} {'ms':>9} {'share':>6}  details"]
+
+    def walk(item: Span, depth: int) -> None:
+        details = " ".join(f"{k}={v}" for k, v in item.attributes.items())
+        if item.error:
+            details = f"{details} error={item.error!r}".strip()
+        label = ("  " * depth + item.name)[:40]
+        lines.append(f"{label:40} {item.duration * 1000:9.1f} {item.duration / total:6.1%}  {details}")
+        for child in sorted(children.get(item.span_id, []), key=lambda s: s.start_ns):
+            walk(child, depth + 1)
+
+    walk(spans[0], 0)
+    return "\n".join(lines)
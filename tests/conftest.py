@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.mock_llm_server import MockLLMConfig, MockLLMServer
+from src.utils.llm_utils import LLMClient
+
+@pytest.fixture
+def mock_llm():
+    """A local OpenAI-compatible server answering instantly."""
+    with MockLLMServer(MockLLMConfig(latency_dist="fixed", latency_ms=1, tokens_per_second=0, seed=0)) as server:
+        yield server
+
+@pytest.fixture
+def llm_client(mock_llm):
+    client = LLMClient(api_key="test", base_url=mock_llm.url, max_retries=0)
+    yield client
+    client.close()
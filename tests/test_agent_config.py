@@ -0,0 +1,95 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents import agent_config
+from src.agents.agent_config import AgentConfig
+from src.tools.tool_config import Parameter, ToolConfig
+from src.utils.context_budget import count_message_tokens, count_tokens
+
+MODEL = "gpt-3.5-turbo"
+
+class ScriptedLLM:
+    """Calls the lookup tool with fresh arguments until final_result is forced.
+
+    ``sent`` counts each request's prompt tokens the way agents budget them.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    def chat_tools(self, messages, tools, model, tool_choice="auto", **kwargs):
+        self.sent.append(count_message_tokens(messages, MODEL) + sum(
+            count_tokens(call["function"]["arguments"], MODEL)
+            for message in messages for call in message.get("tool_calls") or []
+        ))
+        if isinstance(tool_choice, dict):
+            return _message("final_result", {"result": "done"})
+        return _message("lookup", {"query": f"page {len(self.sent)}"})
+
+    async def achat_tools(self, messages, tools, model, tool_choice="auto", **kwargs):
+        return self.chat_tools(messages, tools, model, tool_choice, **kwargs)
+
+def _message(name, arguments):
+    call = SimpleNamespace(
+        id=f"call_{name}", type="function",
+        function=SimpleNamespace(name=name, arguments=json.dumps(arguments))
+    )
+    return SimpleNamespace(content=None, tool_calls=[call])
+
+@pytest.fixture
+def scripted_llm(monkeypatch):
+    llm = ScriptedLLM()
+    monkeypatch.setattr(agent_config, "get_llm_client", lambda: llm)
+    return llm
+
+def lookup_agent(**options):
+    lookup = ToolConfig(
+        "lookup", "Look up a page", [Parameter("query", "What to look up", True, "string")],
+        "Page text", lambda query: "lorem ipsum " * 100, kind="inline"
+    )
+    return AgentConfig("Lookup", "Looks things up", [lookup], "An answer", model=MODEL, **options)
+
+@pytest.mark.parametrize("budget", [500, 1000, 2500, 4000])
+def test_run_stays_within_max_run_tokens(scripted_llm, budget):
+    result, context = lookup_agent(max_steps=20, max_run_tokens=budget).run_agent("Find the page")
+    assert sum(scripted_llm.sent) <= budget
+    assert "error" not in context
+
+def test_max_steps_run_ends_with_a_final_call(scripted_llm):
+    result, context = lookup_agent(max_steps=3, max_run_tokens=None).run_agent("Find the page")
+    assert result == "done"
+    assert context["steps"] == 3
+    assert len(scripted_llm.sent) == 4
+
+class AsyncOnlyLLM(ScriptedLLM):
+    """Answers only async requests, after a short wait, tracking how many overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_flight = self.max_in_flight = 0
+
+    def chat_tools(self, *args, **kwargs):
+        raise AssertionError("async runs must not make blocking LLM calls")
+
+    async def achat_tools(self, messages, tools, model, tool_choice="auto", **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return ScriptedLLM.chat_tools(self, messages, tools, model, tool_choice, **kwargs)
+
+def test_async_runs_share_the_event_loop(monkeypatch):
+    llm = AsyncOnlyLLM()
+    monkeypatch.setattr(agent_config, "get_llm_client", lambda: llm)
+    agent = lookup_agent(max_steps=2, max_run_tokens=None)
+
+    async def run_many():
+        return await asyncio.gather(*(agent.run_agent_async(f"Find page {i}") for i in range(100)))
+
+    results = asyncio.run(run_many())
+    assert all(result == "done" and context["steps"] == 2 for result, context in results)
+    # Blocking runs would be capped by the default executor's threads.
+    assert llm.max_in_flight == 100
@@ -0,0 +1,64 @@
+import asyncio
+
+from src.core.async_chat_manager import AsyncChatManager
+from src.core.events import DoneEvent
+from src.utils.model_policy import ModelPolicy
+
+class RecordingChatManager(AsyncChatManager):
+    """Skips routing and records the history each turn routes on."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.seen = []
+
+    async def agentic_action_async(self, message_history):
+        self.seen.append([m["content"] for m in message_history])
+        return "done", {}
+
+def test_back_to_back_turns_see_previous_reply(llm_client):
+    manager = RecordingChatManager(llm_client=llm_client)
+
+    async def conversation():
+        first = await manager.handle_input_async("q1", "c1")
+        await manager.handle_input_async("q2", "c1")
+        return first
+
+    first = asyncio.run(conversation())
+    assert manager.seen == [["q1"], ["q1", first, "q2"]]
+    assert [m["content"] for m in manager.store.history("c1")][:3] == ["q1", first, "q2"]
+
+def test_streamed_turns_see_previous_reply(llm_client):
+    manager = RecordingChatManager(llm_client=llm_client)
+    manager.route_async = lambda history: _record_route(manager, history)
+
+    async def conversation():
+        async for _ in manager.handle_input_stream_async("q1", "c1"):
+            pass
+        async for _ in manager.handle_input_stream_async("q2", "c1"):
+            pass
+
+    asyncio.run(conversation())
+    assert manager.seen[0] == ["q1"]
+    assert manager.seen[1][0] == "q1" and manager.seen[1][-1] == "q2" and len(manager.seen[1]) == 3
+
+async def _record_route(manager, history):
+    manager.seen.append([m["content"] for m in history])
+    return {"action": "none", "tier": "test"}
+
+def test_streamed_response_is_accounted_to_its_stage(llm_client):
+    policy = ModelPolicy()
+    manager = AsyncChatManager(llm_client=llm_client, model_policy=policy)
+    manager.route_async = lambda history: _no_action()
+
+    async def turn():
+        return [event async for event in manager.handle_input_stream_async("hello", "c1")]
+
+    done = asyncio.run(turn())[-1]
+    assert isinstance(done, DoneEvent)
+    assert done.response and "I apologize" not in done.response
+    response = policy.report()["response"]
+    assert response["calls"] == 1
+    assert response["completion_tokens"] > 0
+
+async def _no_action():
+    return {"action": "none", "tier": "test"}
@@ -0,0 +1,28 @@
+import json
+
+from src.core.batch import BatchRunner, load_checkpoint
+from src.core.chat_manager import ChatManager
+from src.utils.cache import CompletionCache
+
+def write_questions(path, questions):
+    path.write_text("".join(json.dumps({"id": str(i), "question": q}) + "\n" for i, q in enumerate(questions)))
+
+def test_failed_answers_are_not_cached_or_checkpointed(tmp_path, mock_llm, llm_client):
+    questions, output = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    write_questions(questions, ["What is the capital of France?", "Tell me a joke"])
+    cache = CompletionCache()
+    runner = BatchRunner(ChatManager(llm_client=llm_client), concurrency=2, cache=cache)
+
+    mock_llm.config.error_rate, mock_llm.config.error_status = 1.0, 500
+    report = runner.run(str(questions), str(output))
+    assert (report.answered, report.errors) == (0, 2)
+    assert load_checkpoint(str(output)) == set()
+    assert all(json.loads(line)["error"] for line in output.read_text().splitlines())
+
+    mock_llm.config.error_rate = 0.0
+    report = runner.run(str(questions), str(output))
+    assert (report.answered, report.errors, report.resumed, report.deduplicated) == (2, 0, 0, 0)
+    assert load_checkpoint(str(output)) == {"0", "1"}
+
+    report = runner.run(str(questions), str(output))
+    assert (report.answered, report.resumed) == (0, 2)
@@ -0,0 +1,92 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.utils import cache as cache_module
+from src.utils.cache import CompletionCache, make_cache_key
+from src.utils.embeddings import HashingEmbedder
+from src.utils.llm_utils import LLMClient
+from src.utils.structured_output import function_tool, parse_tool_calls
+
+LOOKUP = function_tool("lookup", "Look something up", {"query": {"type": "string"}}, ["query"])
+ANSWER = function_tool("answer", "Answer directly", {"text": {"type": "string"}}, ["text"])
+MESSAGES = [{"role": "system", "content": "Route the request."}, {"role": "user", "content": "find the notes"}]
+
+def test_tool_calls_are_served_from_the_cache(mock_llm):
+    client = LLMClient(api_key="test", base_url=mock_llm.url, max_retries=0, cache=CompletionCache())
+    try:
+        first = parse_tool_calls(client.chat_tools(MESSAGES, [LOOKUP], tool_choice="required"), [LOOKUP])
+        again = parse_tool_calls(client.chat_tools(MESSAGES, [LOOKUP], tool_choice="required"), [LOOKUP])
+        async_again = parse_tool_calls(
+            asyncio.run(client.achat_tools(MESSAGES, [LOOKUP], tool_choice="required")), [LOOKUP]
+        )
+        assert mock_llm.stats.requests == 1
+        assert first == again == async_again and first[0].ok
+
+        client.chat_tools(MESSAGES, [LOOKUP, ANSWER], tool_choice="required")
+        client.chat_tools(MESSAGES, [LOOKUP], tool_choice="auto")
+        assert mock_llm.stats.requests == 3
+    finally:
+        client.close()
+
+def test_cache_key_covers_tools_and_earlier_tool_calls():
+    call = {"id": "call_1", "type": "function", "function": {"name": "lookup", "arguments": '{"query": "a"}'}}
+    other = {**call, "function": {"name": "lookup", "arguments": '{"query": "b"}'}}
+    with_call = MESSAGES + [{"role": "assistant", "content": None, "tool_calls": [call]}]
+    with_other = MESSAGES + [{"role": "assistant", "content": None, "tool_calls": [other]}]
+    renamed = MESSAGES + [{"role": "assistant", "content": None, "tool_calls": [{**call, "id": "call_2"}]}]
+
+    assert make_cache_key("m", with_call) != make_cache_key("m", with_other)
+    assert make_cache_key("m", with_call) == make_cache_key("m", renamed)
+    assert make_cache_key("m", MESSAGES) != make_cache_key("m", MESSAGES, tools=[LOOKUP])
+    assert make_cache_key("m", MESSAGES, tools=[LOOKUP], tool_choice="auto") != make_cache_key(
+        "m", MESSAGES, tools=[LOOKUP], tool_choice="required"
+    )
+
+def ask(text):
+    return [{"role": "system", "content": "Be brief."}, {"role": "user", "content": text}]
+
+def test_least_recently_used_entries_are_evicted():
+    cache = CompletionCache(max_entries=2)
+    cache.set("m", ask("one"), None, "1")
+    cache.set("m", ask("two"), None, "2")
+    assert cache.get("m", ask("one")) == "1"
+    cache.set("m", ask("three"), None, "3")
+
+    assert cache.get("m", ask("two")) is None
+    assert cache.get("m", ask("one")) == "1" and cache.get("m", ask("three")) == "3"
+    stats = cache.stats()
+    assert (stats.entries, stats.evictions, stats.hits, stats.misses) == (2, 1, 3, 1)
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    cache = CompletionCache(ttl=60.0)
+    cache.set("m", ask("one"), None, "1")
+
+    clock.now += 59
+    assert cache.get("m", ask("one")) == "1"
+    clock.now += 2
+    assert cache.get("m", ask("one")) is None
+    assert cache.stats().expirations == 1 and cache.stats().entries == 0
+
+def test_keys_ignore_whitespace_but_not_model_or_temperature():
+    cache = CompletionCache()
+    cache.set("m", ask("what  is\nthe plan"), 0.0, "plan")
+    assert cache.get("m", ask(" what is the plan "), 0.0) == "plan"
+    assert cache.get("other", ask("what is the plan"), 0.0) is None
+    assert cache.get("m", ask("what is the plan"), 0.7) is None
+
+def test_semantic_tier_matches_close_questions_in_the_same_context():
+    cache = CompletionCache(embedder=HashingEmbedder(), similarity_threshold=0.8)
+    cache.set("m", ask("When is the release planned?"), None, "Friday")
+
+    assert cache.get("m", ask("when is the release planned")) == "Friday"
+    assert cache.get("m", ask("Who owns the budget review?")) is None
+    other_context = [{"role": "system", "content": "Be verbose."}, ask("When is the release planned?")[1]]
+    assert cache.get("m", other_context) is None
+    assert cache.stats().semantic_hits == 1
+
+def test_oversized_values_are_not_cached():
+    cache = CompletionCache(max_bytes=1000)
+    cache.set("m", ask("one"), None, "x" * 2000)
+    assert cache.get("m", ask("one")) is None
@@ -0,0 +1,43 @@
+from src.core.conversation_store import ConversationStore
+from src.utils.context_budget import ContextBudget, HistorySummarizer
+
+class RecordingSummarize:
+    """summarize_fn that records the messages it was given."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, previous, messages):
+        self.calls.append([m["content"] for m in messages])
+        return f"summary {len(self.calls)}"
+
+def message(role, turn):
+    return {"role": role, "content": f"{role} message {turn} " + "word " * 30}
+
+def test_sliding_window_summarizes_only_new_evictions():
+    store = ConversationStore(hot_window=10)
+    summarize = RecordingSummarize()
+    budget = ContextBudget(max_prompt_tokens=300, summarizer=HistorySummarizer(summarize, source=store))
+
+    for turn in range(30):
+        store.append("s", message("user", turn))
+        messages, report = budget.build("response", "system", store.history("s"))
+        store.append("s", message("assistant", turn))
+
+    assert report.dropped_messages
+    assert all(len(call) <= 2 for call in summarize.calls[1:])
+    # Everything before the kept messages was summarized once, in order, including
+    # messages that already left the store's hot window.
+    summarized = [content for call in summarize.calls for content in call]
+    first_kept = next(m["content"] for m in messages if m["role"] != "system")
+    everything = [row["content"] for row in store.rows_between("s", 0, 10 ** 9)]
+    assert summarized == everything[:everything.index(first_kept)]
+
+def test_prefix_cache_without_source():
+    summarize = RecordingSummarize()
+    summarizer = HistorySummarizer(summarize)
+    history = [message("user", turn) for turn in range(6)]
+
+    assert summarizer.summarize(history[:4]) == summarizer.summarize(list(history[:4]))
+    summarizer.summarize(history)
+    assert [len(call) for call in summarize.calls] == [4, 2]
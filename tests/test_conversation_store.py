@@ -0,0 +1,67 @@
+import pytest
+
+from src.core.conversation_store import ConversationStore
+
+def say(store, session_id, *contents):
+    for content in contents:
+        store.append(session_id, {"role": "user", "content": content})
+
+def contents(messages):
+    return [message["content"] for message in messages]
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "conversations.db")
+
+def test_history_survives_reopening(db_path):
+    store = ConversationStore(db_path, compact_interval=None)
+    say(store, "alice", "one", "two")
+    say(store, "bob", "hello")
+    store.close()
+
+    reopened = ConversationStore(db_path, compact_interval=None)
+    assert contents(reopened.history("alice")) == ["one", "two"]
+    assert sorted(reopened.sessions()) == ["alice", "bob"]
+    say(reopened, "alice", "three")
+    assert contents(reopened.history("alice")) == ["one", "two", "three"]
+    reopened.close()
+
+def test_hot_window_keeps_newest_messages_and_disk_keeps_all():
+    store = ConversationStore(hot_window=3)
+    say(store, "s", *map(str, range(10)))
+    assert contents(store.history("s")) == ["7", "8", "9"]
+    assert store.message_count("s") == 10
+    assert contents(store.rows_between("s", 0, 10**9, limit=4)) == ["6", "7", "8", "9"]
+
+def test_least_recently_used_sessions_are_evicted_and_reloaded(db_path):
+    store = ConversationStore(db_path, max_sessions=2, compact_interval=None)
+    say(store, "a", "a1")
+    say(store, "b", "b1")
+    store.history("a")  # "b" is now the least recently used
+    say(store, "c", "c1")
+    assert store.resident_sessions == 2
+    assert "b" not in store._sessions
+
+    assert contents(store.history("b")) == ["b1"]
+    assert list(store._sessions) == ["c", "b"]
+    store.close()
+
+def test_locate_tracks_only_resident_messages():
+    store = ConversationStore(hot_window=2)
+    say(store, "s", "first")
+    first = store.history("s")[0]
+    session_id, row_id = store.locate(first)
+    assert session_id == "s"
+    say(store, "s", "second", "third")
+    assert store.locate(first) is None
+    assert contents(store.rows_between("s", row_id - 1, row_id)) == ["first"]
+
+def test_compact_keeps_the_newest_rows_per_session(db_path):
+    store = ConversationStore(db_path, retain_messages=2, compact_interval=None)
+    say(store, "a", "1", "2", "3")
+    say(store, "b", "x")
+    assert store.compact() == 1
+    assert store.message_count("a") == 2 and store.message_count("b") == 1
+    store.clear("a")
+    assert store.sessions() == ["b"] and store.history("a") == []
+    store.close()
@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+from benchmarks.import_budget import BUDGETS_MS, DEFERRED_MODULES, measure
+
+# Test machines are noisier than benchmark runs; IMPORT_BUDGET_SCALE widens the budgets.
+SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "2"))
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_import_stays_within_budget(module):
+    timings, loaded = [], set()
+    for _ in range(3):
+        elapsed, loaded = measure(module)
+        timings.append(elapsed)
+    assert sorted(name for name in DEFERRED_MODULES if name in loaded) == []
+    assert min(timings) <= BUDGETS_MS[module] * SCALE
+
+@pytest.mark.parametrize("module", ["src.utils", "src.tools"])
+def test_heavy_sdks_load_on_first_use(module):
+    _, loaded = measure(module)
+    assert "openai" not in loaded and "numpy" not in loaded
@@ -0,0 +1,31 @@
+import os
+
+from src.retrieval.ingest import IngestPipeline
+from src.retrieval.transcript_store import BM25TranscriptStore
+
+
+class RecordingStore(BM25TranscriptStore):
+    def __init__(self, path, manifest_path):
+        super().__init__(path)
+        self.manifest_path = manifest_path
+        self.manifest_existed_at_save = []
+
+    def save(self, path=None):
+        self.manifest_existed_at_save.append(os.path.exists(self.manifest_path))
+        super().save(path)
+
+
+def test_store_is_saved_before_the_manifest(tmp_path):
+    transcripts = tmp_path / "transcripts"
+    transcripts.mkdir()
+    (transcripts / "standup.txt").write_text("Alice: the release ships on Friday.")
+    manifest_path = str(tmp_path / "index" / "manifest.json")
+    store = RecordingStore(str(tmp_path / "index" / "bm25"), manifest_path)
+    pipeline = IngestPipeline(store, manifest_path=manifest_path, workers=1)
+
+    report = pipeline.ingest_directory(str(transcripts))
+
+    assert report.added == 1
+    assert store.manifest_existed_at_save == [False]
+    assert os.path.exists(manifest_path)
+    assert "standup" in BM25TranscriptStore(store.path)
@@ -0,0 +1,50 @@
+import pytest
+
+from src.core.chat_manager import ChatManager
+from src.utils.latency import LatencyPolicy, LatencyTracker, SpeculationCancelled, speculate
+
+def chat_until_cancelled(client):
+    calls = 0
+    with pytest.raises(SpeculationCancelled):
+        for _ in range(100):
+            client.chat([{"role": "user", "content": f"question {calls}"}], use_cache=False)
+            calls += 1
+    return calls
+
+def test_speculation_is_cut_off_at_the_token_cap(llm_client):
+    tracker = LatencyTracker(LatencyPolicy(speculate=True, speculation_tokens=100, max_extra_tokens=300))
+
+    speculation = speculate(tracker, "agent", chat_until_cancelled, llm_client)
+    calls = speculation.result()
+    assert 0 < calls < 100
+    assert not speculation.adopt()
+    speculation.discard()
+
+    report = tracker.report()
+    assert report["extra_tokens"] <= 300 + 100  # at most one call past the cap
+    assert report["over_budget"] >= 1
+    assert report["speculation_hits"] == 0
+
+def test_speculation_refused_without_budget_and_adopted_runs_are_free(llm_client):
+    tracker = LatencyTracker(LatencyPolicy(speculate=True, speculation_tokens=100, max_extra_tokens=150))
+
+    first = speculate(tracker, "agent", llm_client.chat, [{"role": "user", "content": "hi"}])
+    assert speculate(tracker, "agent", llm_client.chat, [{"role": "user", "content": "hi"}]) is None
+    first.result()
+    assert first.adopt()
+    assert tracker.report()["extra_tokens"] == 0
+    assert speculate(tracker, "agent", llm_client.chat, [{"role": "user", "content": "hi"}]) is not None
+
+@pytest.mark.parametrize("instruction, adopted", [
+    ("what about yesterday's?", True),
+    ("What did the team decide about the budget in yesterday's standup?", False),
+])
+def test_speculation_adopted_only_for_the_routed_instruction(instruction, adopted):
+    tracker = LatencyTracker(LatencyPolicy(speculate=True, speculation_tokens=10, max_extra_tokens=100))
+    speculation = speculate(tracker, "Meetings", lambda message: f"answer to {message}", "what about yesterday's?")
+    speculation.result()
+    decision = {"action": "delegate", "agent": "Meetings", "instruction": instruction}
+
+    ChatManager._settle_speculation(speculation, decision)
+    assert ("speculation" in decision) == adopted
+    assert tracker.report()["speculation_hits"] == int(adopted)
@@ -0,0 +1,39 @@
+import pytest
+
+from src.tools.math_tool import ExpressionError, evaluate, normalize_expression
+
+@pytest.mark.parametrize("expression", ["3 4", "1 000 + 1", "2 .5"])
+def test_whitespace_is_not_dropped(expression):
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+
+def test_formatting_shares_a_cache_key():
+    assert normalize_expression(" 2 *\n  (3 + 4) ") == normalize_expression("2 * (3 + 4)")
+    assert evaluate(" 2 *\n  (3 + 4) ") == 14
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('true')",
+    "().__class__.__bases__",
+    "open('/etc/passwd')",
+    "(lambda: 1)()",
+    "[x for x in [1, 2]]",
+    "'a' * 3",
+    "sqrt(x=4)",
+    "pi.real",
+])
+def test_only_whitelisted_syntax_is_evaluated(expression):
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+
+@pytest.mark.parametrize("expression", ["9**9**9", "10**5000", "2**4097"])
+def test_huge_powers_are_refused(expression):
+    with pytest.raises(ExpressionError, match="too large"):
+        evaluate(expression)
+
+def test_cpu_time_limit_stops_evaluation():
+    expression = " + ".join(["sqrt(x) * x"] * 20)
+    with pytest.raises(ExpressionError, match="time limit"):
+        evaluate(expression, {"x": list(range(1_000_000))}, time_limit=0.001)
+
+def test_element_wise_values():
+    assert evaluate("x ** 2 + 1", {"x": [1, 2, 3]}) == [2.0, 5.0, 10.0]
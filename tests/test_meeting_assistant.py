@@ -0,0 +1,43 @@
+import pytest
+
+from src.agents.meeting_assistant import MeetingAssistant
+from src.retrieval.transcript_store import BM25TranscriptStore
+from src.tools.meeting_notes_tool import GetMeetingNotesTool
+from src.utils.llm_utils import setup_openai
+
+@pytest.fixture
+def assistant(mock_llm):
+    setup_openai("test", base_url=mock_llm.url, max_retries=0)
+    store = BM25TranscriptStore()
+    store.add_many([
+        ("product_review", "The Q3 budget was approved at 1.2 million. Marketing asked for more headcount."),
+        ("team_standup", "Alice finished the login page. Bob is blocked on the API migration."),
+    ])
+    return MeetingAssistant(tools=[GetMeetingNotesTool(store)]), store
+
+def test_lookup_is_answered_from_transcript_and_cached(assistant):
+    agent, store = assistant
+
+    response, context = agent.run_agent("What was the Q3 budget approved at?")
+    assert context["answer"] == "extractive"
+    assert "1.2 million" in response
+    assert agent.run_agent("what was the Q3 budget approved at")[1]["answer"] == "cached"
+
+    store.add("team_standup", "Alice and Bob paired on the API migration.")
+    assert agent.run_agent("What was the Q3 budget approved at?")[1]["answer"] == "cached"
+    store.add("product_review", "The Q3 budget was cut to 0.9 million.")
+    assert agent.run_agent("What was the Q3 budget approved at?")[1]["answer"] == "generated"
+
+def test_summaries_and_explanations_are_generated(assistant):
+    agent, _ = assistant
+
+    for question in ("What happened in the product review?", "Why was the Q3 budget approved?"):
+        assert agent.run_agent(question)[1]["answer"] == "generated", question
+
+def test_failures_are_reported_not_raised(assistant, mock_llm):
+    agent, _ = assistant
+    mock_llm.config.error_rate, mock_llm.config.error_status = 1.0, 500
+
+    response, context = agent.run_agent("Why was the Q3 budget approved?")
+    assert context["error"]
+    assert response.startswith("Error executing agent Meeting Assistant")
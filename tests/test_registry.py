@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+from src.core.registry import Registry
+
+def square_root(x):
+    return x ** 0.5
+
+def round_down(x):
+    return int(x)
+
+def config(sqrt_description="Square root"):
+    return {
+        "tools": [
+            {"name": "sqrt", "description": sqrt_description, "function": "tests.test_registry:square_root",
+             "parameters": [{"name": "x", "type": "number", "required": True}]},
+            {"name": "floor", "description": "Round down", "function": "tests.test_registry:round_down",
+             "parameters": [{"name": "x", "type": "number", "required": True}]},
+        ],
+        "agents": [
+            {"name": "Roots", "background": "Takes roots", "keywords": ["root"], "tools": ["sqrt"]},
+            {"name": "Rounding", "background": "Rounds numbers", "keywords": ["round"], "tools": ["floor"]},
+        ],
+    }
+
+def write(path, data, mtime):
+    path.write_text(json.dumps(data))
+    os.utime(path, (mtime, mtime))  # distinct mtimes however fast the test runs
+
+@pytest.fixture
+def registry_file(tmp_path):
+    path = tmp_path / "registry.json"
+    write(path, config(), 1_000_000)
+    return path
+
+def test_loaded_specs_are_built_on_first_use(registry_file):
+    registry = Registry.load(str(registry_file))
+    assert [agent.name for agent in registry.lazy_agents()] == ["Roots", "Rounding"]
+    assert registry.built() == []
+
+    assert registry.tool("sqrt").run_tool({"x": 9}) == 3
+    assert registry.built() == ["sqrt"]
+    assert registry.agent("Roots").tools[0] is registry.tool("sqrt")
+
+def test_reload_rebuilds_only_what_changed(registry_file):
+    registry = Registry.load(str(registry_file))
+    roots, rounding = registry.agent("Roots"), registry.agent("Rounding")
+    version = registry.version
+    assert registry.reload() is False
+
+    write(registry_file, config(sqrt_description="Square root of a number"), 1_000_010)
+    assert registry.reload() is True
+    assert registry.version == version + 1
+    assert registry.tool_spec("sqrt").description == "Square root of a number"
+    assert registry.agent("Rounding") is rounding
+    assert registry.agent("Roots") is not roots
+    assert "Square root of a number" in registry.lazy_agents()[0].tools[0].prompt_fragment
+
+def test_rewritten_but_identical_file_keeps_version(registry_file):
+    registry = Registry.load(str(registry_file))
+    version = registry.version
+    write(registry_file, config(), 1_000_010)
+    assert registry.reload() is False
+    assert registry.version == version
+
+def test_invalid_file_keeps_previous_specs(registry_file):
+    registry = Registry.load(str(registry_file))
+    broken = config()
+    broken["agents"][0]["tools"] = ["cube_root"]
+    write(registry_file, broken, 1_000_010)
+    with pytest.raises(ValueError, match="cube_root"):
+        registry.reload()
+    assert registry.agent_spec("Roots").tools == ("sqrt",)
+
+def test_resource_references_are_bound_at_build_time():
+    store = object()
+    registry = Registry(resources={"store": store})
+    registry.register_tool("notes", "Meeting notes", lambda store: ("notes", store), {"store": "$store"})
+    assert registry.tool("notes") == ("notes", store)
+    registry.register_tool("broken", "Missing", lambda store: store, {"store": "$missing"})
+    with pytest.raises(KeyError, match="missing"):
+        registry.tool("broken")
@@ -0,0 +1,63 @@
+from src.agents.agent_config import AgentConfig
+from src.core.registry import Registry
+from src.core.router import TieredRouter
+
+AGENTS = {
+    "Math Assistant": ["calculate", "compute", "math", "sum", "multiply", "divide", "square root"],
+    "Weather Assistant": ["weather", "forecast", "temperature", "rain", "snow", "sunny"],
+    "Meeting Assistant": ["meeting", "discussion", "call", "sync", "standup", "review", "transcript"],
+}
+
+class StockAgent(AgentConfig):
+    """Agent with its own can_handle, routed without any keywords."""
+
+    def can_handle(self, instruction: str) -> bool:
+        return "$" in instruction
+
+def make_registry(built):
+    registry = Registry()
+
+    def factory(tools, name):
+        built.append(name)
+        return AgentConfig(name, "", tools, "")
+
+    for name, keywords in AGENTS.items():
+        registry.register_agent(name, f"{name} background", "", keywords, factory=factory, options={"name": name})
+    return registry
+
+def test_lazy_agents_route_on_whole_words_without_building():
+    built = []
+    router = TieredRouter(make_registry(built).lazy_agents())
+
+    for message in (
+        "I am training for a marathon",
+        "Summarize this paragraph",
+        "Can you recall what I said?",
+    ):
+        decision = router.route(message)
+        assert decision is None or decision.tier != "keyword", message
+    assert router.route("Will it rain or snow tomorrow?").agent_name == "Weather Assistant"
+    assert built == []
+
+def test_lazy_agent_with_custom_handler_is_consulted():
+    built = []
+    registry = make_registry(built)
+    registry.register_agent(
+        "Stock Assistant", "Quotes share prices", "", ["stock"], factory=lambda tools: StockAgent("Stock Assistant", "", tools, ""),
+        custom_handler=True
+    )
+    router = TieredRouter(registry.lazy_agents())
+
+    decision = router.route("What is $ACME trading at and what is the stock price trend?")
+    assert decision.agent_name == "Stock Assistant"
+    assert decision.tier == "keyword"
+    assert built == []
+
+def test_single_keyword_defers_to_llm():
+    router = TieredRouter(make_registry([]).lazy_agents())
+
+    for message in ("I will call you later", "Add the sum to my notes"):
+        decision = router.route(message)
+        assert decision is None or decision.tier != "keyword", message
+    decision = router.route("Please calculate the sum and multiply it by two")
+    assert (decision.agent_name, decision.tier) == ("Math Assistant", "keyword")
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.scheduler import DagScheduler, TaskNode, validate_dag
+
+def run(scheduler, nodes, use_async, timeout=None):
+    """Run ``nodes`` and return ``(results, seconds)``.
+
+    The async run is timed inside the loop: ``asyncio.run`` itself waits for
+    abandoned worker threads on shutdown.
+    """
+    if use_async:
+        async def timed():
+            started = time.perf_counter()
+            results = await scheduler.run_async(nodes, timeout)
+            return results, time.perf_counter() - started
+        return asyncio.run(timed())
+    started = time.perf_counter()
+    results = scheduler.run(nodes, timeout)
+    return results, time.perf_counter() - started
+
+def sleeper(seconds, value=None):
+    def fn(inputs):
+        time.sleep(seconds)
+        return value
+    return fn
+
+def fail(inputs):
+    raise RuntimeError("boom")
+
+@pytest.fixture
+def scheduler():
+    scheduler = DagScheduler(max_workers=4)
+    yield scheduler
+    scheduler.shutdown()
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_independent_tasks_run_together_and_pass_results_on(scheduler, use_async):
+    nodes = [
+        TaskNode("a", sleeper(0.2, 1)),
+        TaskNode("b", sleeper(0.2, 2)),
+        TaskNode("sum", lambda inputs: inputs["a"] + inputs["b"], depends_on=["a", "b"]),
+    ]
+    results, seconds = run(scheduler, nodes, use_async)
+    assert seconds < 0.35
+    assert results["sum"].ok and results["sum"].value == 3
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_failures_and_timeouts_cancel_dependents(scheduler, use_async):
+    nodes = [
+        TaskNode("broken", fail),
+        TaskNode("slow", sleeper(1.0), timeout=0.1),
+        TaskNode("after_broken", lambda inputs: "ran", depends_on=["broken"]),
+        TaskNode("after_slow", lambda inputs: "ran", depends_on=["slow"]),
+        TaskNode("fine", lambda inputs: "ran"),
+    ]
+    results, seconds = run(scheduler, nodes, use_async)
+    assert seconds < 0.8
+    assert results["broken"].status == "error" and results["broken"].error == "boom"
+    assert results["slow"].status == "timeout"
+    assert results["after_broken"].status == "cancelled"
+    assert results["after_slow"].status == "cancelled"
+    assert results["fine"].value == "ran"
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_overall_timeout_cancels_unfinished_tasks(scheduler, use_async):
+    nodes = [TaskNode("quick", sleeper(0, "done")), TaskNode("slow", sleeper(1.0))]
+    results, _ = run(scheduler, nodes, use_async, timeout=0.2)
+    assert results["quick"].ok
+    assert results["slow"].status in ("timeout", "cancelled")
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_fail_fast_skips_work_not_yet_started(use_async):
+    scheduler = DagScheduler(max_workers=1, fail_fast=True)
+    nodes = [
+        TaskNode("broken", fail),
+        TaskNode("next", sleeper(0.5, "ran")),
+        TaskNode("later", lambda inputs: "ran", depends_on=["next"]),
+    ]
+    try:
+        results, _ = run(scheduler, nodes, use_async)
+    finally:
+        scheduler.shutdown()
+    assert results["broken"].status == "error"
+    assert results["later"].status == "cancelled"
+
+def test_invalid_graphs_are_rejected():
+    noop = lambda inputs: None
+    assert validate_dag([TaskNode("b", noop, ["a"]), TaskNode("a", noop)]) == ["a", "b"]
+    with pytest.raises(ValueError, match="cycle"):
+        validate_dag([TaskNode("a", noop, ["b"]), TaskNode("b", noop, ["a"])])
+    with pytest.raises(ValueError, match="unknown"):
+        validate_dag([TaskNode("a", noop, ["missing"])])
+    with pytest.raises(ValueError, match="Duplicate"):
+        validate_dag([TaskNode("a", noop), TaskNode("a", noop)])
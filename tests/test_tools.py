@@ -0,0 +1,110 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents.agent_config import AgentConfig
+from src.tools import runtime as runtime_module
+from src.tools.math_tool import create_calculator_tool
+from src.tools.runtime import ToolRuntime, ToolTimeoutError, ToolValidationError, get_tool_runtime
+from src.tools.tool_config import Parameter, ToolConfig
+
+
+def slow_agent(timeout):
+    slow = ToolConfig("slow", "Sleeps past its deadline", [], "none", lambda: time.sleep(2) or "done")
+    return AgentConfig("Slow", "", [slow], "", tool_timeout=timeout)
+
+
+def test_single_tool_call_respects_tool_timeout():
+    agent = slow_agent(0.2)
+    started = time.perf_counter()
+    result, metadata = agent._dispatch({"action": "use_tool", "tool": "slow", "parameters": {}})
+    assert time.perf_counter() - started < 1.0
+    assert metadata["tool_used"] == "slow"
+    assert "timed out" in metadata["error"]
+
+
+def test_small_calculation_stays_off_the_process_pool():
+    runtime = get_tool_runtime()
+    runtime.shutdown()
+    assert create_calculator_tool().run_tool({"expression": "2+3*4"}) == 14
+    assert "cpu" not in runtime._pools
+
+
+def counting_tool(calls, **options):
+    def double(n):
+        calls.append(n)
+        return n * 2
+    params = [Parameter("n", "A number", True, "integer")]
+    return ToolConfig("double", "Doubles a number", params, "number", double, **options)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(runtime_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_cached_tool_results_are_reused_until_they_expire(clock):
+    runtime, calls = ToolRuntime(), []
+    tool = counting_tool(calls, kind="inline", cache_ttl=10)
+    assert runtime.run(tool, {"n": 2}) == 4
+    assert runtime.run(tool, {"n": 2.0}) == 4  # normalized to the same arguments
+    assert runtime.run(tool, {"n": 3}) == 6
+    assert calls == [2, 3] and runtime.stats.cache_hits == 1
+
+    clock[0] += 11
+    assert runtime.run(tool, {"n": 2}) == 4
+    assert calls == [2, 3, 2]
+
+
+def test_tools_without_cache_ttl_always_run():
+    runtime, calls = ToolRuntime(), []
+    tool = counting_tool(calls, kind="inline")
+    runtime.run(tool, {"n": 1})
+    runtime.run(tool, {"n": 1})
+    assert calls == [1, 1] and runtime.stats.cache_hits == 0
+
+
+def test_result_cache_evicts_least_recently_used(clock):
+    runtime, calls = ToolRuntime(cache_size=2), []
+    tool = counting_tool(calls, kind="inline", cache_ttl=60)
+    for n in (1, 2, 1, 3, 1, 2):
+        runtime.run(tool, {"n": n})
+    assert calls == [1, 2, 3, 2]
+
+
+def test_invalid_arguments_are_rejected_before_running():
+    runtime, calls = ToolRuntime(), []
+    tool = counting_tool(calls, kind="inline", cache_ttl=60)
+    with pytest.raises(ToolValidationError):
+        runtime.run(tool, {"n": "two"})
+    with pytest.raises(ToolValidationError):
+        runtime.run(tool, {})
+    assert calls == [] and runtime.stats.rejected == 2
+
+
+def test_concurrency_limit_times_out_waiting_callers():
+    release = threading.Event()
+    blocker = ToolConfig("blocker", "Waits", [], "none", lambda: release.wait(5), max_concurrency=1, timeout=0.2)
+    runtime, errors = ToolRuntime(), []
+
+    def hold_slot():
+        try:
+            runtime.run(blocker, {})
+        except ToolTimeoutError as e:
+            errors.append(str(e))
+
+    first = threading.Thread(target=hold_slot)
+    first.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(ToolTimeoutError, match="concurrency limit"):
+            runtime.run(blocker, {})
+    finally:
+        release.set()
+        first.join()
+        runtime.shutdown()
+    assert errors == ["Tool blocker timed out after 0.2s"]  # the holder gave up, its slot stayed taken
@@ -0,0 +1,121 @@
+import json
+import os
+
+import pytest
+
+from src.retrieval import transcript_store
+from src.retrieval.transcript_store import BM25TranscriptStore
+from src.tools.meeting_notes_tool import GetMeetingNotesTool
+
+MEETINGS = [
+    ("budget_review", "Finance reviewed the Q3 budget. The budget was approved with a small increase."),
+    ("release_sync", "The release ships Friday after the last round of testing."),
+    ("hiring_plan", "We plan to hire two engineers for the platform team."),
+]
+
+def ranked(store, query):
+    return [(hit.meeting_id, round(hit.score, 4)) for hit in store.search(query, top_k=10)]
+
+def test_search_ranks_by_bm25():
+    store = BM25TranscriptStore()
+    store.add_many(MEETINGS)
+    hits = store.search("budget approved")
+    assert hits[0].meeting_id == "budget_review"
+    assert 0 < hits[0].relevance <= 1
+    assert store.search("budget", min_relevance=1.0) == []
+    assert store.search("the and of") == []
+
+def test_add_replaces_and_remove_deletes():
+    store = BM25TranscriptStore()
+    store.add_many(MEETINGS)
+    version = store.version
+    store.add("release_sync", "The launch moved to Monday.")
+    assert store.get("release_sync") == "The launch moved to Monday."
+    assert ranked(store, "friday") == []
+    assert store.remove("hiring_plan") and not store.remove("hiring_plan")
+    assert "hiring_plan" not in store and len(store) == 2
+    assert store.version > version
+
+def test_saved_store_loads_with_the_same_results(tmp_path):
+    store = BM25TranscriptStore()
+    store.add_many(MEETINGS)
+    store.remove("hiring_plan")
+    expected = {query: ranked(store, query) for query in ["budget", "release testing", "engineers"]}
+    with pytest.raises(ValueError):
+        store.save()
+    store.save(str(tmp_path / "bm25"))
+
+    loaded = BM25TranscriptStore(str(tmp_path / "bm25"))
+    assert sorted(loaded.ids()) == ["budget_review", "release_sync"]
+    assert loaded.get("budget_review") == MEETINGS[0][1]
+    assert {query: ranked(loaded, query) for query in expected} == expected
+
+def test_meeting_notes_tool_searches_its_store():
+    store = BM25TranscriptStore()
+    store.add_many(MEETINGS)
+    result = GetMeetingNotesTool(store, top_k=2).run_tool({"description": "Q3 budget"})
+    assert result["found"] and result["transcripts"][0]["id"] == "budget_review"
+    assert result["transcripts"][0]["content"] == MEETINGS[0][1]
+    assert result["confidence"] == pytest.approx(result["transcripts"][0]["relevance"], abs=1e-4)
+
+def files(path):
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta["base"], meta["deltas"]
+
+def test_saves_write_only_the_changes(tmp_path):
+    path = str(tmp_path / "bm25")
+    store = BM25TranscriptStore(path)
+    store.add_many([("standup", "The release ships Friday."), ("retro", "Testing took too long.")])
+    store.save()
+    base, deltas = files(path)
+    contents = os.path.join(path, base, "contents.bin")
+    written = os.stat(contents).st_mtime_ns
+
+    store.add("planning", "The budget for Q3 was approved.")
+    store.remove("retro")
+    store.save()
+    assert files(path) == (base, ["delta-2.jsonl"])
+    assert os.stat(contents).st_mtime_ns == written
+    with open(os.path.join(path, "delta-2.jsonl"), encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+    loaded = BM25TranscriptStore(path)
+    assert sorted(loaded.ids()) == ["planning", "standup"]
+    assert loaded.get("planning") == "The budget for Q3 was approved."
+    assert [hit.meeting_id for hit in loaded.search("budget approved")] == ["planning"]
+    assert loaded.search("testing") == []
+
+def test_delta_files_are_compacted_into_a_new_base(tmp_path):
+    path = str(tmp_path / "bm25")
+    store = BM25TranscriptStore(path, max_delta_docs=2)
+    store.add("standup", "The release ships Friday.")
+    store.save()
+    for i in range(3):
+        store.add(f"sync_{i}", f"Sync number {i} covered the roadmap.")
+        store.save()
+
+    base, deltas = files(path)
+    assert base == "base-4" and deltas == []
+    assert sorted(os.listdir(path)) == ["base-4", "meta.json"]
+    loaded = BM25TranscriptStore(path)
+    assert len(loaded) == 4
+    assert loaded.search("roadmap", top_k=10)[0].meeting_id.startswith("sync_")
+
+def test_failed_save_leaves_the_previous_one(tmp_path, monkeypatch):
+    path = str(tmp_path / "bm25")
+    store = BM25TranscriptStore(path)
+    store.add("standup", "The release ships Friday.")
+    store.save()
+
+    write = transcript_store._atomic_write
+    def crash_on_meta(directory, name, data):
+        if name == "meta.json":
+            raise OSError("disk full")
+        write(directory, name, data)
+    monkeypatch.setattr(transcript_store, "_atomic_write", crash_on_meta)
+    store.add("planning", "The budget for Q3 was approved.")
+    with pytest.raises(OSError):
+        store.save()
+
+    assert BM25TranscriptStore(path).ids() == ["standup"]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from src.retrieval.vector_index import Chunk, IVFPQIndex, RetrievalEngine, VectorStore, chunk_text
+
+def unit_vectors(n, dim, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def chunks_for(meeting_id, n):
+    return [Chunk(meeting_id, i, f"{meeting_id} part {i}") for i in range(n)]
+
+def test_chunks_overlap_and_cover_the_text():
+    words = [f"w{i}" for i in range(25)]
+    chunks = chunk_text(" ".join(words), max_words=10, overlap=3)
+    assert all(len(chunk.split()) <= 10 for chunk in chunks)
+    assert chunks[0].split()[-3:] == chunks[1].split()[:3]
+    assert chunks[-1].split()[-1] == "w24"
+    assert chunk_text("", 10, 3) == [] and chunk_text("short text", 10, 3) == ["short text"]
+
+def test_exact_search_matches_brute_force_across_blocks():
+    vectors = unit_vectors(300, 16)
+    store = VectorStore(16, initial_capacity=8)
+    store.add(chunks_for("a", 150), vectors[:150])
+    store.add(chunks_for("b", 150), vectors[150:])
+    store.remove_meeting("b")
+    queries = unit_vectors(5, 16, seed=1)
+
+    scores, rows = store.search(queries, top_k=7, block_size=64)
+    expected = np.argsort(-(queries @ vectors[:150].T), axis=1)[:, :7]
+    assert (rows == expected).all()
+    assert np.allclose(scores, np.take_along_axis(queries @ vectors.T, rows, axis=1), atol=1e-5)
+
+def test_store_persists_rows_and_removals(tmp_path):
+    vectors = unit_vectors(20, 8)
+    store = VectorStore(8, str(tmp_path / "vectors"), initial_capacity=4)
+    store.add(chunks_for("a", 10), vectors[:10])
+    store.add(chunks_for("b", 10), vectors[10:])
+    store.remove_meeting("a")
+    store.flush()
+
+    loaded = VectorStore(8, str(tmp_path / "vectors"))
+    assert len(loaded) == 20 and loaded.live_count == 10
+    assert loaded.chunks[12] == Chunk("b", 2, "b part 2") and loaded.chunks[0] is None
+    assert np.allclose(loaded.matrix[10:], vectors[10:])
+    with pytest.raises(ValueError):
+        VectorStore(16, str(tmp_path / "vectors"))
+
+def test_compact_drops_removed_rows():
+    vectors = unit_vectors(6, 8)
+    store = VectorStore(8)
+    store.add(chunks_for("a", 3), vectors[:3])
+    store.add(chunks_for("b", 3), vectors[3:])
+    store.remove_meeting("a")
+    assert store.compact() == {3: 0, 4: 1, 5: 2}
+    assert len(store) == 3 and store.rows_by_meeting == {"b": [0, 1, 2]}
+    _, rows = store.search(vectors[4], top_k=1)
+    assert rows[0, 0] == 1
+
+def test_ivfpq_finds_most_vectors_among_its_top_candidates():
+    vectors = unit_vectors(2000, 32)
+    index = IVFPQIndex(32, n_lists=16, n_subvectors=8, n_probe=4)
+    index.train(vectors)
+    index.add(vectors, list(range(2000)))
+
+    found = sum(row in index.search(vectors[row], top_k=10)[1] for row in range(0, 2000, 20))
+    assert found >= 90
+    with pytest.raises(ValueError):
+        IVFPQIndex(30, n_subvectors=8)
+
+def test_engine_answers_the_same_with_the_approximate_index():
+    engine = RetrievalEngine(ann_threshold=10**9, hybrid_weight=1.0, chunk_words=20, chunk_overlap=5)
+    engine.add_many([
+        ("budget", "The finance team approved the Q3 budget after a long review of costs."),
+        ("release", "The release ships on Friday once testing on staging is finished."),
+        ("hiring", "Two engineers will be hired for the platform team next quarter."),
+    ])
+    exact = [hit.meeting_id for hit in engine.search("budget approval", top_k=1)]
+    engine.build_ann(n_lists=1)
+    assert [hit.meeting_id for hit in engine.search("budget approval", top_k=1)] == exact == ["budget"]
+
+    engine.remove("budget")
+    assert "budget" not in [hit.meeting_id for hit in engine.search("budget approval")]